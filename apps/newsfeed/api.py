@@ -1,119 +1,300 @@
-from fastapi import FastAPI, BackgroundTasks, Query, HTTPException
-from fastapi.responses import FileResponse, PlainTextResponse
-from src.news_generator import NewsGenerator  # adjust import to real path
-from store import search_segments, client
-from typing import Optional, Dict
+from fastapi import FastAPI, BackgroundTasks, Query, HTTPException, Header, Depends
+from fastapi.responses import PlainTextResponse, StreamingResponse, Response
+from src.audio.broadcast import BroadcastHub
+from src.core.config import CONFIG
+from src.core.generator import NewsGenerator
+from src.core.jobs import JobManager
+from src.core.offload import shutdown_pools
+from src.core.scheduler import LeaderLease, Scheduler
+from src.data.export import arrow_stream, gzip_stream, markdown_stream, ndjson_stream, pyarrow_available
+from src.nlp.projection import get_projection
+from store import search_segments, get_collection, close_collection, persona_timeline, timeline_items
+from typing import Optional, Dict, Literal
 from pathlib import Path
-from apscheduler.schedulers.background import BackgroundScheduler
 import json
-import pathlib
 import datetime
-import io
 import asyncio
-import numpy as np
-from sklearn.manifold import TSNE
-from scipy.stats import gaussian_kde
+import hmac
+import sqlite3
+from urllib.parse import quote
 
 app = FastAPI(title="NewsFeed API")
 
-# Initialize scheduler
-scheduler = BackgroundScheduler()
+# The live stream hub consumes the generator's audio output and fans it out to HTTP listeners
+hub = BroadcastHub() if CONFIG["audio"]["live_stream"] else None
+generator = NewsGenerator(audio_queue=hub.queue if hub else None)
+projection = get_projection()
+generator.segment_writer.listeners.append(projection.add_records)
 
-def scheduled_run():
-    """Run the news generator on a schedule"""
-    loop = asyncio.get_event_loop()
-    loop.create_task(generator.run_once())
+# With several API workers, only the one holding the lease runs refresh jobs; the others queue them
+lease = LeaderLease("generator")
+jobs = JobManager(generator.run_once, owner=lease.holder)
+scheduler = Scheduler(lease)
+scheduler.on_leadership(jobs.set_executor)
+if hub:
+    scheduler.on_leadership(hub.set_on_air)
 
-# Schedule to run every hour
-scheduler.add_job(scheduled_run, "interval", hours=1)
+async def scheduled_refresh():
+    """Queue the periodic refresh (joins a refresh already in flight)"""
+    try:
+        await jobs.submit()
+    except OverflowError:
+        pass
 
-# Directory for storing broadcast files
-BCAST_DIR = pathlib.Path("data/broadcasts")
-BCAST_DIR.mkdir(parents=True, exist_ok=True)
+scheduler.every(CONFIG["scheduler"]["refresh_interval"], scheduled_refresh)
+scheduler.every(CONFIG["scheduler"]["job_poll_interval"], jobs.pump, name="job_dispatch")
 
-def save_broadcast(broadcast):
-    """Save broadcast data to a JSON file"""
-    ts = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S")
-    fname = BCAST_DIR / f"{broadcast['broadcast_id']}_{ts}.json"
-    fname.write_text(json.dumps(broadcast, indent=2))
+async def broadcast_retention():
+    """Move expired broadcasts to the archive files (leader only, so one process writes them)"""
+    await asyncio.to_thread(generator.broadcast_store.apply_retention)
 
-generator = NewsGenerator()
+scheduler.every(CONFIG["broadcasts"]["retention_interval"], broadcast_retention, run_at_start=True)
 
-# Start the scheduler
-scheduler.start()
+@app.on_event("startup")
+async def warm_up_generator():
+    """Load models in the background so the API starts serving immediately."""
+    app.state.warm_up_task = asyncio.create_task(asyncio.to_thread(generator.warm_up))
+    if hub:
+        hub.start(asyncio.get_running_loop())
+    app.state.projection_task = asyncio.create_task(projection.maintain(get_collection, lambda: scheduler.is_leader))
+    await scheduler.start()
 
-@app.post("/refresh")
-async def refresh(feeds: list[str] | None = None):
+@app.on_event("shutdown")
+async def stop_worker_pools():
+    if hub:
+        hub.stop()
+    app.state.projection_task.cancel()
+    await jobs.close()
+    await scheduler.stop()
+    await generator.segment_writer.close()
+    await asyncio.to_thread(projection.flush)
+    await asyncio.to_thread(close_collection)
+    shutdown_pools()
+
+@app.get("/health")
+def health():
+    """Liveness probe: the process is up."""
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: models and personas are loaded."""
+    if generator.failed_components:
+        raise HTTPException(503, {"status": "degraded", "failed": generator.failed_components})
+    if not generator.ready:
+        raise HTTPException(503, "warming up")
+    return {"status": "ready"}
+
+@app.post("/refresh", status_code=202)
+async def refresh(response: Response, feeds: list[str] | None = None):
     """
-    Trigger an immediate fetch / summarise / cluster pass.
-    If `feeds` is provided, override the feeds.yaml list for this run.
-    Returns the new broadcast_id that the client can poll.
+    Queue a fetch / summarise / cluster / broadcast run and return its job at once.
+    If `feeds` is provided, override the feeds.yaml list for this run. A request matching a
+    queued or running job joins it (`merged`). Poll /jobs/{job_id}, or follow
+    /jobs/{job_id}/events; the finished job carries the broadcast_id.
     """
-    broadcast_id = await generator.run_once(feeds)
-    broadcast = generator.load_broadcast(broadcast_id)
-    save_broadcast(broadcast)
-    return {"broadcast_id": broadcast_id}
+    try:
+        job, merged = await jobs.submit(feeds)
+    except OverflowError as e:
+        raise HTTPException(429, str(e))
+    except sqlite3.Error as e:
+        raise HTTPException(503, f"job queue unavailable: {e}")
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return {**job.to_dict(), "merged": merged}
+
+@app.get("/jobs")
+def list_jobs():
+    """Queued, running and recently finished refresh jobs, oldest first."""
+    return [job.to_dict() for job in jobs.recent()]
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: the job's state on every change, ending when it finishes."""
+    try:
+        job = await asyncio.to_thread(jobs.get, job_id)
+    except sqlite3.Error as e:
+        raise HTTPException(503, f"job queue unavailable: {e}")
+    if job is None:
+        raise HTTPException(404, "job not found")
+
+    async def events():
+        async for snapshot in jobs.watch(job):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {snapshot['status']}\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics")
+def metrics():
+    """Per-operation latency histograms and counters in Prometheus text format."""
+    return PlainTextResponse(
+        generator.performance_monitor.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard for /admin/*: the X-Admin-Token header must match ADMIN_TOKEN (unset disables them)."""
+    expected = CONFIG["profiling"]["admin_token"]
+    if not expected:
+        raise HTTPException(404, "admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(403, "invalid admin token")
+
+def profile_response(result, format: str):
+    if format == "cpu":
+        return PlainTextResponse(result.cpu_folded())
+    if format == "alloc":
+        return PlainTextResponse(result.alloc_folded())
+    return result.summary()
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile(seconds: float = Query(10, gt=0), allocations: bool = False, format: Literal["cpu", "alloc", "json"] = "cpu"):
+    """
+    Sample every thread's stack for `seconds` and return collapsed stacks (flamegraph.pl / speedscope).
+    With allocations=true, format=alloc returns bytes still allocated per allocation stack.
+    """
+    if generator.profiler.active:
+        raise HTTPException(409, "a profile is already running")
+    result = await generator.profiler.profile_for(seconds, allocations, label="api")
+    return profile_response(result, format)
+
+@app.post("/admin/profile/next-cycle", dependencies=[Depends(require_admin)])
+def profile_next_cycle(allocations: bool = False):
+    """Profile the next pipeline cycle; fetch the result from /admin/profile/latest."""
+    generator.profiler.request_next_cycle(allocations)
+    return {"armed": True, "allocations": allocations}
+
+@app.get("/admin/profile/latest", dependencies=[Depends(require_admin)])
+def latest_profile(format: Literal["cpu", "alloc", "json"] = "json"):
+    if generator.profiler.latest is None:
+        raise HTTPException(404, "no profile has been captured yet")
+    return profile_response(generator.profiler.latest, format)
+
+@app.get("/stream/live.mp3")
+async def live_stream():
+    """The live broadcast as a continuous MP3 stream; listeners join at what is on air now."""
+    if hub is None:
+        raise HTTPException(404, "live streaming is disabled")
+    if not scheduler.is_leader: # Only the worker running the pipeline produces audio
+        raise HTTPException(503, "the live stream is served by the leader worker", headers={"Retry-After": "30"})
+    return StreamingResponse(hub.listen(), media_type="audio/mpeg", headers={"Cache-Control": "no-cache, no-store"})
+
+@app.get("/broadcasts")
+def list_broadcasts(
+    start: Optional[datetime.datetime] = Query(None, description="Created at or after (ISO 8601)"),
+    end: Optional[datetime.datetime] = Query(None, description="Created before (ISO 8601)"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Archived broadcasts in a time range, newest first (IDs and summaries only)."""
+    return generator.broadcast_store.list_range(
+        start.timestamp() if start else None, end.timestamp() if end else None, limit
+    )
 
 @app.get("/broadcast/{broadcast_id}")
-async def get_broadcast(broadcast_id: str):
+def get_broadcast(broadcast_id: str):
     """
-    Return the generated segments, summaries and TTS URLs for this broadcast.
+    Return the generated segments, summaries and TTS URLs for this broadcast ("latest" for the newest).
     """
-    return generator.load_broadcast(broadcast_id)
+    broadcast = generator.load_broadcast(broadcast_id)
+    if broadcast is None:
+        raise HTTPException(404, "broadcast not found")
+    return broadcast
+
+EXPORT_MEDIA_TYPES = {
+    "json": "application/json",
+    "md": "text/markdown",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+def export_response(chunks, filename: str, format: str, compress: bool) -> StreamingResponse:
+    """Stream an export as a download, gzipped on the fly when `compress` is set."""
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if compress:
+        chunks, media_type, filename = gzip_stream(chunks), "application/gzip", f"{filename}.gz"
+    return StreamingResponse(chunks, media_type=media_type, headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+def export_chunks(broadcasts, format: str):
+    if format == "arrow":
+        if not pyarrow_available:
+            raise HTTPException(501, "arrow export requires pyarrow")
+        return arrow_stream(broadcasts)
+    return ndjson_stream(broadcasts)
 
 @app.get("/broadcast/{broadcast_id}/export")
-def export_broadcast(broadcast_id: str, format: str = "json"):
-    """Export broadcast in JSON or Markdown format"""
+def export_broadcast(
+    broadcast_id: str,
+    format: Literal["json", "md", "ndjson", "arrow"] = "json",
+    compress: bool = Query(False, description="gzip the download")
+):
+    """Export a broadcast as JSON, Markdown, NDJSON or Arrow (one row per segment)."""
     broadcast = generator.load_broadcast(broadcast_id)
-    
+    if broadcast is None:
+        raise HTTPException(404, "broadcast not found")
+    filename = f"{broadcast['broadcast_id']}.{format}"
     if format == "json":
-        f = io.BytesIO(json.dumps(broadcast, indent=2).encode())
-        return FileResponse(
-            f, 
-            media_type="application/json",
-            filename=f"{broadcast_id}.json"
-        )
-    if format == "md":
-        # Convert to markdown
-        md = ["# Broadcast", f"ID: **{broadcast_id}**", ""]
-        for seg in broadcast["segments"]:
-            md += [
-                f"## {seg['title']}", 
-                seg["summary"], 
-                "",
-                f"> {seg['comment']}", 
-                ""
-            ]
-        return PlainTextResponse(
-            "\n".join(md), 
-            media_type="text/markdown",
-            headers={"Content-Disposition": f"attachment; filename={broadcast_id}.md"}
-        )
-    raise HTTPException(400, "format must be json or md")
+        chunks = iter([json.dumps(broadcast, indent=2).encode()])
+    elif format == "md":
+        chunks = markdown_stream(broadcast)
+    else:
+        chunks = export_chunks([broadcast], format)
+    return export_response(chunks, filename, format, compress)
 
-@app.get("/persona/{persona_id}/timeline")
-def persona_timeline(persona_id: str, n: int = 200):
-    """Get timeline data for a persona's commentary"""
-    coll = client.get_collection("news_segments")
-    docs = coll.query(
-        where={"persona": persona_id},
-        n_results=n,
-        include=["documents", "metadatas", "embeddings"]
+@app.get("/broadcasts/export")
+def export_broadcasts(
+    start: Optional[datetime.datetime] = Query(None, description="Created at or after (ISO 8601)"),
+    end: Optional[datetime.datetime] = Query(None, description="Created before (ISO 8601)"),
+    format: Literal["ndjson", "arrow"] = "ndjson",
+    compress: bool = Query(True, description="gzip the download")
+):
+    """
+    Bulk export of a time range, oldest first: NDJSON (one broadcast per line) or an Arrow IPC
+    stream (one row per segment). Read from the archive and written out in batches, so memory
+    use does not grow with the size of the range.
+    """
+    broadcasts = generator.broadcast_store.iter_range(
+        start.timestamp() if start else None, end.timestamp() if end else None
     )
-    
-    # Flatten for convenience
-    items = []
-    for doc, meta, vec in zip(*docs.values()):
-        items.append({
-            "summary": doc,
-            "title": meta["title"],
-            "timestamp": meta.get("timestamp"),
-            "embedding": vec
-        })
-    
-    # Sort oldest→newest
-    items.sort(key=lambda x: x["timestamp"])
-    return items
+    stamp = f"{start.date() if start else 'all'}_{end.date() if end else 'now'}"
+    return export_response(export_chunks(broadcasts, format), f"broadcasts_{stamp}.{format}", format, compress)
+
+@app.get("/persona/{persona_id}/timeline")
+def get_persona_timeline(
+    persona_id: str,
+    n: int = Query(200, ge=1, le=5000, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    order: Literal["asc", "desc"] = "asc",
+    embedding: Literal["none", "f16", "list"] = Query("none", description="f16: base64 little-endian float16")
+):
+    """
+    A persona's commentary in time order, one page at a time. The body is a JSON array streamed
+    as it is built; the next page's cursor is in the X-Next-Cursor and Link headers.
+    """
+    try:
+        rows, next_cursor = persona_timeline(persona_id, n, cursor, descending=order == "desc")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def body():
+        yield b"["
+        for i, item in enumerate(timeline_items(rows, None if embedding == "none" else embedding)):
+            yield (b"," if i else b"") + json.dumps(item).encode()
+        yield b"]"
+
+    headers = {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'</persona/{quote(persona_id)}/timeline?n={n}&order={order}&embedding={embedding}&cursor={next_cursor}>; rel="next"'
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
 
 @app.get("/search")
 async def semantic_search(
@@ -123,35 +304,11 @@ async def semantic_search(
     limit: int = Query(5, ge=1, le=20, description="Number of results to return")
 ):
     """
-    Search for news segments semantically similar to the query.
-    Optionally filter by persona and limit the number of results.
+    Search for news segments by meaning and wording (vector similarity blended with BM25).
+    Persona and keyword filters are applied before ranking, so a filtered search still
+    returns up to `limit` matching segments.
     """
-    # Apply filters
-    filters = {}
-    if persona:
-        filters["persona"] = persona
-    
-    # Get semantic search results
-    results = search_segments(query, filters=filters, limit=limit)
-    
-    # Apply keyword filter if provided
-    if keyword:
-        keyword = keyword.lower()
-        filtered_results = {
-            "ids": [[]], 
-            "documents": [[]], 
-            "metadatas": [[]], 
-            "distances": [[]]
-        }
-        
-        for i, doc in enumerate(results["documents"][0]):
-            if keyword in doc.lower():
-                filtered_results["ids"][0].append(results["ids"][0][i])
-                filtered_results["documents"][0].append(doc)
-                filtered_results["metadatas"][0].append(results["metadatas"][0][i])
-                filtered_results["distances"][0].append(results["distances"][0][i])
-        
-        results = filtered_results
+    results = await search_segments(query, persona=persona, limit=limit, keyword=keyword)
     return {
         "query": query,
         "results": [
@@ -159,58 +316,36 @@ async def semantic_search(
                 "id": id,
                 "summary": doc,
                 "metadata": metadata,
-                "distance": float(distance)
+                "distance": float(distance),
+                "score": score
             }
-            for id, doc, metadata, distance in zip(
+            for id, doc, metadata, distance, score in zip(
                 results["ids"][0],
                 results["documents"][0],
                 results["metadatas"][0],
-                results["distances"][0]
+                results["distances"][0],
+                results["scores"][0]
             )
         ]
     }
 
 @app.get("/clusters/global")
-def global_heatmap(n_bins: int = 20):
-    """Get global cluster data for heatmap visualization"""
-    # Get all embeddings from ChromaDB
-    coll = client.get_collection("news_segments")
-    docs = coll.query(
-        n_results=1000,
-        include=["embeddings"]
-    )
-    
-    if not docs["embeddings"]:
+def global_heatmap(
+    n_bins: int = Query(20, ge=2, le=200),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Density of all stored segments on the shared 2D map, as {row_i: [...]}. The map is
+    maintained in the background; grids are cached per n_bins and revalidated by ETag.
+    """
+    density = projection.density(n_bins)
+    if density is None: # First layout still being fitted
         return {}
-
-    # Convert embeddings to numpy array
-    embeddings = np.array(docs["embeddings"])
-    
-    # Project to 2D using TSNE
-    tsne = TSNE(n_components=2, random_state=42)
-    coords = tsne.fit_transform(embeddings)
-    
-    # Calculate density using Gaussian KDE
-    kernel = gaussian_kde(coords.T)
-    
-    # Create grid of points
-    x_min, x_max = coords[:, 0].min(), coords[:, 0].max()
-    y_min, y_max = coords[:, 1].min(), coords[:, 1].max()
-    
-    x = np.linspace(x_min, x_max, n_bins)
-    y = np.linspace(y_min, y_max, n_bins)
-    X, Y = np.meshgrid(x, y)
-    
-    # Calculate density at each grid point
-    positions = np.vstack([X.ravel(), Y.ravel()])
-    density = kernel(positions).reshape(n_bins, n_bins)
-    
-    # Convert to row-based format for heatmap
-    result = {}
-    for i in range(n_bins):
-        result[f"row_{i}"] = density[i].tolist()
-    
-    return result
+    etag, body = density
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/persona/create")
 def create_persona(p: Dict):
@@ -235,18 +370,11 @@ def load_personas():
 
 @app.get("/compare")
 def compare_persona_comments(broadcast_id: str = "latest"):
-    """Get persona comments comparison for a broadcast"""
-    if broadcast_id == "latest":
-        # Get the most recent broadcast
-        broadcasts = list(BCAST_DIR.glob("*.json"))
-        if not broadcasts:
-            return []
-        broadcast_file = max(broadcasts, key=lambda x: x.stat().st_mtime)
-        broadcast = json.loads(broadcast_file.read_text())
-    else:
-        # Load specific broadcast
-        broadcast = generator.load_broadcast(broadcast_id)
-    
+    """Get persona comments comparison for a broadcast ("latest" for the newest)"""
+    broadcast = generator.load_broadcast(broadcast_id)
+    if broadcast is None:
+        return []
+
     # Extract and format segments with persona comments
     segments = []
     for segment in broadcast.get("segments", []):
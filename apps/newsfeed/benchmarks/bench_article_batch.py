@@ -0,0 +1,87 @@
+"""
+ArticleBatch benchmark: per-article Python scoring and ranking vs the columnar batch.
+
+Run from apps/newsfeed:
+    python benchmarks/bench_article_batch.py [--sizes 1000 10000 50000] [--clusters 50]
+
+The "loop" path reproduces the old calculate_importance_scores / create_broadcast_segments
+logic over Article objects (with sentiment already computed); the "batch" path builds an
+ArticleBatch, scores it in one expression and picks the top 2 per cluster with argpartition.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.batch import ArticleBatch
+from src.core.models import Article
+
+WORDS = "the government said on tuesday that markets would rally after the storm while officials warned of delays".split()
+
+def synthetic_articles(n: int, clusters: int):
+    rng = random.Random(0)
+    now = datetime.now()
+    return [
+        Article(
+            title=" ".join(rng.choices(WORDS, k=8)),
+            content=". ".join(" ".join(rng.choices(WORDS, k=15)) for _ in range(rng.randint(2, 30))) + ".",
+            url=f"https://example.com/{i}",
+            published=now - timedelta(hours=rng.uniform(0, 72)),
+            source="bench",
+            sentiment_score=rng.uniform(-1, 1),
+            relevancy_score=rng.uniform(0, 10),
+            cluster_id=rng.randrange(clusters),
+        )
+        for i in range(n)
+    ]
+
+def loop_path(articles, threshold):
+    for article in articles:
+        hours_old = (datetime.now() - article.published).total_seconds() / 3600
+        freshness = max(0, 1 - (hours_old / 48))
+        content_quality = min(1.0, len(article.content) / 800)
+        sentences = len(re.split(r'[.!?]+', article.content))
+        words = len(article.content.split())
+        readability = 1.0 if sentences == 0 else min(1.0, words / (sentences * 15))
+        article.importance_score = 0.4 * freshness + 0.3 * content_quality + 0.2 * abs(article.sentiment_score) + 0.1 * readability
+
+    clusters = {}
+    for article in (a for a in articles if a.relevancy_score >= threshold):
+        clusters.setdefault(article.cluster_id, []).append(article)
+    return {cid: sorted(group, key=lambda x: x.importance_score, reverse=True)[:2] for cid, group in clusters.items()}
+
+def batch_path(articles, threshold):
+    batch = ArticleBatch.from_articles(articles)
+    scored = time.perf_counter()
+    batch.score_importance()
+    batch.top_k_per_cluster(2, batch.relevancy >= threshold)
+    return scored
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--threshold", type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"{'articles':>10}{'loop (s)':>12}{'batch build (s)':>18}{'batch score+rank (s)':>22}")
+    for n in args.sizes:
+        articles = synthetic_articles(n, args.clusters)
+
+        start = time.perf_counter()
+        loop_path(articles, args.threshold)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scored = batch_path(articles, args.threshold)
+        end = time.perf_counter()
+
+        print(f"{n:>10}{loop_time:>12.3f}{scored - start:>18.3f}{end - scored:>22.4f}")
+
+if __name__ == "__main__":
+    main()
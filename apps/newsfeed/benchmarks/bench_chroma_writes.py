@@ -0,0 +1,88 @@
+"""
+ChromaDB write benchmark: per-segment synchronous adds vs the buffered SegmentWriter.
+
+Run from apps/newsfeed against a running Chroma server:
+    CHROMA_HOST=http://localhost:8000 python benchmarks/bench_chroma_writes.py [--segments 100] [--personas 10]
+
+"inline" is the old path: one get_or_create_collection + add round trip per segment, on the
+event loop. "buffered" queues the same records with SegmentWriter.add and flushes them
+in bulk adds from the thread pool. Reports segments/s and event-loop lag for each. Writes go to
+a scratch collection that is deleted afterwards, and persona comments and FTS rows go to a
+temporary database instead of news_cache.db.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import store
+from src.core.offload import LoopLagMonitor, shutdown_pools
+from src.data.database import NewsDatabase
+
+SCRATCH_COLLECTION = "bench_news_segments"
+
+def records(segments: int, personas: int, dim: int):
+    rng = random.Random(0)
+    for s in range(segments):
+        yield dict(title=f"Segment {s}", summary=f"Summary of segment {s}",
+                   comments={f"persona_{p}": f"Comment {p} on segment {s}" for p in range(personas)},
+                   vector=[rng.random() for _ in range(dim)])
+
+async def ticker(stop: asyncio.Event):
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+
+async def run(mode: str, args):
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    stop = asyncio.Event()
+    background = asyncio.create_task(ticker(stop))
+
+    start = time.perf_counter()
+    count = 0
+    if mode == "inline":
+        for record in records(args.segments, args.personas, args.dim):
+            store.get_client().get_or_create_collection(name=SCRATCH_COLLECTION)
+            store.store_segment(**record)
+            count += 1
+            await asyncio.sleep(0) # The old loop yielded between segments too
+    else:
+        writer = store.SegmentWriter()
+        for record in records(args.segments, args.personas, args.dim):
+            writer.add(**record)
+            count += 1
+            await asyncio.sleep(0)
+        await writer.close()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await background
+    monitor.stop()
+    lag = monitor.stats()
+    print(f"{mode:<10} {count / elapsed:9.1f} segments/s   lag mean {lag['mean'] * 1000:7.1f} ms   p99 {lag['p99'] * 1000:7.1f} ms   max {lag['max'] * 1000:7.1f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, default=100)
+    parser.add_argument("--personas", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=768, help="Embedding size (nomic-embed-text is 768).")
+    args = parser.parse_args()
+
+    store.COLLECTION = SCRATCH_COLLECTION
+    with tempfile.TemporaryDirectory() as directory:
+        store._db = NewsDatabase(str(Path(directory) / "bench.db"))
+        try:
+            await run("inline", args)
+            await run("buffered", args)
+        finally:
+            store.get_client().delete_collection(SCRATCH_COLLECTION)
+            store._db = None
+            shutdown_pools()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Embedding backend benchmark: SentenceTransformer (fp32) vs exported int8 ONNX.
+
+Run from apps/newsfeed:
+    python benchmarks/bench_embedding.py [--headlines headlines.txt] [--n 2000] [--clusters 5]
+
+Reports throughput per backend, mean cosine similarity between the two sets of vectors
+and cluster agreement (adjusted Rand index) of MiniBatchKMeans fitted on each.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.nlp.embedding import create_embedding_backend
+
+SUBJECTS = ["Senate", "Central bank", "Tech giant", "City council", "Researchers", "Striking workers", "Wildfire", "Storm", "Court", "Startup"]
+VERBS = ["approves", "rejects", "delays", "announces", "investigates", "warns about", "celebrates", "cuts", "expands", "questions"]
+OBJECTS = ["new budget", "interest rates", "AI regulation", "housing plan", "climate deal", "merger", "vaccine rollout", "trade tariffs", "election results", "water rights"]
+
+def synthetic_headlines(n: int):
+    rng = random.Random(0)
+    return [f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}" for _ in range(n)]
+
+def run_backend(name: str, headlines):
+    backend = create_embedding_backend(backend=name)
+    start = time.perf_counter()
+    backend.warm_up()
+    warm_up = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = backend.encode(headlines)
+    elapsed = time.perf_counter() - start
+    print(f"{backend.version:<40} warm-up {warm_up:7.2f}s   {len(headlines) / elapsed:9.1f} headlines/s")
+    return vectors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--headlines", type=str, help="Text file with one headline per line (default: synthetic).")
+    parser.add_argument("--n", type=int, default=2000, help="Number of synthetic headlines.")
+    parser.add_argument("--clusters", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.headlines:
+        headlines = [line.strip() for line in open(args.headlines, encoding="utf-8") if line.strip()]
+    else:
+        headlines = synthetic_headlines(args.n)
+
+    reference = run_backend("st-fp32", headlines)
+    quantized = run_backend("onnx-int8", headlines)
+
+    cosine = np.sum(reference * quantized, axis=1)
+    print(f"cosine(fp32, int8): mean {cosine.mean():.4f}  min {cosine.min():.4f}")
+
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.metrics import adjusted_rand_score
+
+    labels = [
+        MiniBatchKMeans(n_clusters=args.clusters, random_state=0, batch_size=256, n_init='auto').fit_predict(vectors)
+        for vectors in (reference, quantized)
+    ]
+    print(f"cluster agreement (ARI): {adjusted_rand_score(*labels):.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Event-loop lag benchmark for the CPU-bound NLP stages.
+
+Run from apps/newsfeed:
+    python benchmarks/bench_loop_lag.py [--articles 500]
+
+Runs the clustering, sentiment and text-statistics stages on synthetic articles twice while a
+LoopLagMonitor ticks every 10 ms: once inline on the event loop (the old behaviour) and
+once dispatched to the thread / process pools. Reports mean, p99 and max lag for each.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.offload import LoopLagMonitor, run_in_process, run_in_thread, shutdown_pools
+from src.nlp import scoring
+from src.nlp.clustering import StreamClusterer
+
+WORDS = "the government said on tuesday that markets would rally after the storm while officials warned of delays".split()
+
+def synthetic_articles(n: int):
+    rng = random.Random(0)
+    headlines = [" ".join(rng.choices(WORDS, k=8)).capitalize() for _ in range(n)]
+    bodies = [". ".join(" ".join(rng.choices(WORDS, k=15)) for _ in range(40)) + "." for _ in range(n)]
+    return headlines, bodies
+
+async def ticker(stop: asyncio.Event):
+    """Stands in for in-flight LLM / TTS coroutines that need the loop to make progress."""
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+
+async def run(mode: str, clusterer: StreamClusterer, headlines, bodies):
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    stop = asyncio.Event()
+    background = asyncio.create_task(ticker(stop))
+    await asyncio.sleep(0.1)
+
+    start = time.perf_counter()
+    if mode == "inline":
+        clusterer.embed_and_cluster(headlines)
+        scoring.sentiment_scores(bodies)
+        scoring.text_stats(bodies)
+    else:
+        await run_in_thread(clusterer.embed_and_cluster, headlines)
+        await run_in_process(scoring.sentiment_scores, bodies)
+        await run_in_process(scoring.text_stats, bodies)
+    elapsed = time.perf_counter() - start
+
+    await asyncio.sleep(0.1)
+    stop.set()
+    await background
+    monitor.stop()
+    lag = monitor.stats()
+    print(f"{mode:<10} wall {elapsed:6.2f}s   lag mean {lag['mean'] * 1000:7.1f} ms   p99 {lag['p99'] * 1000:7.1f} ms   max {lag['max'] * 1000:7.1f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=500)
+    args = parser.parse_args()
+
+    headlines, bodies = synthetic_articles(args.articles)
+    clusterer = StreamClusterer()
+    clusterer.warm_up()
+    # Spawn and warm the scoring workers before measuring
+    await run_in_process(scoring.sentiment_scores, ["Warm-up."])
+
+    await run("inline", clusterer, headlines, bodies)
+    await run("offloaded", clusterer, headlines, bodies)
+    shutdown_pools()
+
+if __name__ == "__main__":
+    asyncio.run(main())
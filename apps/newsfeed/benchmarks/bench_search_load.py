@@ -0,0 +1,69 @@
+"""
+Load test for GET /search.
+
+Run from apps/newsfeed against a running API (uvicorn api:app):
+    python benchmarks/bench_search_load.py [--url http://localhost:8000] [--requests 2000] [--concurrency 50]
+
+Queries are drawn from a Zipf-like distribution over a fixed vocabulary of topics, so popular
+queries repeat the way real traffic does (and exercise the query-vector and result caches).
+Reports throughput and client-side p50 / p95 / p99 latency; the server-side histogram is at
+/metrics under operation="search".
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import aiohttp
+
+TOPICS = [
+    "interest rates", "climate summit", "election results", "semiconductor exports", "ceasefire talks",
+    "heat wave", "central bank", "oil prices", "vaccine trial", "space launch", "housing market",
+    "trade tariffs", "wildfire", "earthquake", "artificial intelligence regulation", "strike",
+    "football final", "inflation", "merger", "cyber attack",
+]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--persona", help="Also filter by this persona ID.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) for rank in range(len(TOPICS))]
+    queries = rng.choices(TOPICS, weights=weights, k=args.requests)
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(session: aiohttp.ClientSession, query: str):
+        nonlocal errors
+        params = {"query": query, "limit": 5}
+        if args.persona:
+            params["persona"] = args.persona
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with session.get(f"{args.url}/search", params=params) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(one(session, q) for q in queries))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}: {args.requests / elapsed:.1f} req/s, {errors} errors")
+    print(f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms   p95 {percentile(latencies, 0.95) * 1000:.1f} ms   p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Soak benchmark: resident memory of the in-process history over thousands of cycles.
+
+Run from apps/newsfeed:
+    python benchmarks/bench_soak_memory.py [--cycles 5000] [--unbounded]
+
+Each simulated cycle records what a real cycle records: one batch of cluster results,
+one clustering-quality entry and a handful of operation timings. With the bounded
+history RSS should level off after the buffers fill; --unbounded uses plain lists
+(the old behaviour) for comparison.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.performance_monitor import PerformanceMonitor
+from src.nlp.clustering import CSAIHistory
+
+def rss_mb() -> float:
+    """Current RSS from /proc when available, otherwise the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def fake_cluster_results(rng: random.Random) -> dict:
+    return {
+        label: {
+            'summary': "summary " * rng.randint(50, 100),
+            'topic': f"topic {label}",
+            'headlines': [f"headline {rng.random()}" for _ in range(rng.randint(5, 20))]
+        }
+        for label in range(5)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cycles", type=int, default=5000)
+    parser.add_argument("--report-every", type=int, default=500)
+    parser.add_argument("--unbounded", action="store_true", help="Use plain lists, as before bounded history.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    if args.unbounded:
+        cluster_history, csai_history, timings = [], [], []
+    else:
+        from src.core.config import CONFIG
+        from src.core.history import RingBuffer
+        cluster_history = RingBuffer(CONFIG["history"]["cluster_capacity"])
+        csai_history = CSAIHistory()
+        timings = PerformanceMonitor()
+
+    print(f"{'cycle':>8}{'rss (MB)':>12}")
+    for cycle in range(1, args.cycles + 1):
+        cluster_history.append(fake_cluster_results(rng))
+        csai_history.append({'silhouette': rng.random(), 'embedding_version': "bench"})
+        for _ in range(10):
+            if args.unbounded:
+                timings.append(rng.random())
+            else:
+                timings.track_operation("bench", rng.random())
+
+        if cycle % args.report_every == 0:
+            print(f"{cycle:>8}{rss_mb():>12.1f}")
+
+if __name__ == "__main__":
+    main()
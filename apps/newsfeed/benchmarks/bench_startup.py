@@ -0,0 +1,76 @@
+"""
+Startup-time benchmark: import cost per module and initialization cost per component.
+
+Run from apps/newsfeed:
+    python benchmarks/bench_startup.py [--runs 3]
+
+Each import is timed in a fresh interpreter so module caches don't hide the cost.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = [
+    "numpy",
+    "aiohttp",
+    "nltk",
+    "sklearn.cluster",
+    "sklearn.manifold",
+    "scipy.stats",
+    "sentence_transformers",
+    "chromadb",
+    "src.nlp.clustering",
+    "src.nlp.sentiment",
+    "src.core.generator",
+    "api",
+]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+def time_import(module: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return float("nan")
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+def time_init():
+    sys.path.insert(0, str(ROOT))
+    from src.core.generator import NewsGenerator
+
+    start = time.perf_counter()
+    generator = NewsGenerator()
+    construct = time.perf_counter() - start
+
+    timings = generator.warm_up()
+    return construct, timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per import measurement.")
+    args = parser.parse_args()
+
+    print(f"{'module':<28}{'import (s)':>12}")
+    for module in MODULES:
+        print(f"{module:<28}{time_import(module, args.runs):>12.3f}")
+
+    construct, timings = time_init()
+    print()
+    print(f"{'component':<28}{'init (s)':>12}")
+    print(f"{'NewsGenerator()':<28}{construct:>12.3f}")
+    for name, seconds in timings.items():
+        print(f"{'warm_up:' + name:<28}{seconds:>12.3f}")
+    print(f"{'total warm-up':<28}{sum(timings.values()):>12.3f}")
+
+if __name__ == "__main__":
+    main()
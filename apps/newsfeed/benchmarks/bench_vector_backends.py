@@ -0,0 +1,82 @@
+"""
+Vector backend benchmark: the Chroma HTTP server vs the embedded LocalCollection.
+
+Run from apps/newsfeed (the Chroma half needs a running server and is skipped if unreachable):
+    CHROMA_HOST=http://localhost:8000 python benchmarks/bench_vector_backends.py [--records 20000] [--queries 500]
+
+Both backends get the same random records in bulk adds of --batch, a tenth of them flagged for
+one persona, then answer the same nearest-neighbour queries unfiltered and filtered to that
+persona. Reports insert records/s and, per query kind, queries/s and p50 / p95 / p99 latency.
+Chroma writes go to a scratch collection that is deleted afterwards; the embedded index is built
+in a temporary directory.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import store
+from src.data.vector_index import LocalCollection, hnswlib_available
+
+SCRATCH_COLLECTION = "bench_vector_backends"
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def run(name: str, collection, vectors: np.ndarray, queries: np.ndarray, batch: int):
+    ids = [f"segment-{i}" for i in range(len(vectors))]
+    metadatas = [{"title": f"Segment {i}", **({"persona_bench": True} if i % 10 == 0 else {})} for i in range(len(vectors))]
+    start = time.perf_counter()
+    for i in range(0, len(vectors), batch):
+        collection.add(ids=ids[i:i+batch], embeddings=vectors[i:i+batch].tolist(),
+                       documents=ids[i:i+batch], metadatas=metadatas[i:i+batch])
+    elapsed = time.perf_counter() - start
+    print(f"{name:<8} insert   {len(vectors) / elapsed:9.1f} records/s")
+
+    for kind, where in (("query", None), ("filtered", {"persona_bench": True})):
+        latencies = []
+        start = time.perf_counter()
+        for q in queries:
+            t = time.perf_counter()
+            collection.query(query_embeddings=[q.tolist()], n_results=10, where=where, include=["metadatas"])
+            latencies.append(time.perf_counter() - t)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} {kind:<8} {len(queries) / elapsed:9.1f} queries/s   p50 {percentile(latencies, 0.5) * 1000:6.2f} ms"
+              f"   p95 {percentile(latencies, 0.95) * 1000:6.2f} ms   p99 {percentile(latencies, 0.99) * 1000:6.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=64, help="Records per add (SegmentWriter's default).")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding size (nomic-embed-text is 768).")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.records, args.dim)).astype(np.float32)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        local = LocalCollection(directory, SCRATCH_COLLECTION)
+        run("local" if hnswlib_available else "exact", local, vectors, queries, args.batch)
+        local.close()
+
+    try:
+        client = store.get_client()
+        client.heartbeat()
+    except Exception as e:
+        print(f"chroma   skipped: server unreachable ({e})")
+        return
+    try:
+        run("chroma", client.get_or_create_collection(name=SCRATCH_COLLECTION), vectors, queries, args.batch)
+    finally:
+        client.delete_collection(SCRATCH_COLLECTION)
+
+if __name__ == "__main__":
+    main()
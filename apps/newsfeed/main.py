@@ -3,9 +3,25 @@ import queue
 import threading
 import logging
 import argparse
+import signal
 
+from src.core.config import CONFIG
 from src.core.generator import NewsGenerator
 from src.audio.player import play_audio_from_queue
+from src.core.offload import shutdown_pools
+from store import close_collection
+
+async def run(generator: NewsGenerator, args):
+    profile_task = None # Held so the task isn't garbage-collected while it runs
+    if args.profile_seconds:
+        profile_task = asyncio.create_task(
+            generator.profiler.profile_for(args.profile_seconds, args.profile_allocations, label="cli")
+        )
+    try:
+        await generator.run_continuous(fetch_interval_minutes=args.fetch_interval)
+    finally:
+        await generator.segment_writer.close()
+        await asyncio.to_thread(close_collection)
 
 def main():
     parser = argparse.ArgumentParser(description="Generate a continuous news broadcast stream.")
@@ -13,6 +29,10 @@ def main():
     parser.add_argument("--guidance", type=str, help="Optional guidance for refining the news script.")
     parser.add_argument("--fetch_interval", type=int, default=15, help="Minutes to wait between fetching new feeds.")
     parser.add_argument("--persona", type=str, default="persona.yaml", help="Path to the persona YAML file.")
+    parser.add_argument("--skip-warm-up", action="store_true", help="Load models lazily on first use instead of before the first cycle.")
+    parser.add_argument("--profile-seconds", type=float, help="Sample stacks for the first N seconds of the run (output in profiles/).")
+    parser.add_argument("--profile-cycle", action="store_true", help="Profile the first pipeline cycle. SIGUSR1 profiles the next one at any time.")
+    parser.add_argument("--profile-allocations", action="store_true", help="Also capture tracemalloc allocation stacks when profiling.")
 
     args = parser.parse_args()
 
@@ -22,7 +42,8 @@ def main():
         handlers=[logging.FileHandler('news.log'), logging.StreamHandler()]
     )
     
-    audio_queue = queue.Queue()
+    # Bounded, so TTS waits for the player instead of queueing unplayed audio without limit
+    audio_queue = queue.Queue(maxsize=CONFIG["audio"]["queue_segments"])
 
     player_thread = threading.Thread(target=play_audio_from_queue, args=(audio_queue,), daemon=True)
     player_thread.start()
@@ -34,11 +55,22 @@ def main():
         persona_file=args.persona # Pass the persona file to the generator
     )
 
+    if not args.skip_warm_up:
+        generator.warm_up()
+
+    if args.profile_cycle:
+        generator.profiler.request_next_cycle(args.profile_allocations)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: generator.profiler.request_next_cycle(args.profile_allocations))
+
     logging.info("Starting the news generator. Press Ctrl+C to stop.")
     try:
-        asyncio.run(generator.run_continuous(fetch_interval_minutes=args.fetch_interval))
+        asyncio.run(run(generator, args))
     except KeyboardInterrupt:
         logging.info("Shutting down the news generator.")
+    finally:
+        generator.flush_history()
+        shutdown_pools()
 
 if __name__ == "__main__":
     main()
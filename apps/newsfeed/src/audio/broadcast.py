@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from src.audio.stream import AudioStream
+from src.core.config import CONFIG
+from src.core.performance_monitor import get_monitor
+
+class BroadcastHub:
+    """
+    Live MP3 broadcast for HTTP listeners. A pump thread takes segment streams from `queue`
+    (the generator's audio queue), cuts them into fixed-size chunks and publishes them into a
+    shared ring buffer at the audio bitrate, so the ring's head tracks what is on air. Each
+    listener is only a cursor into the ring: audio is produced once whatever the audience size.
+    Only the process producing audio is `on_air`; taking it off air ends every listener.
+    """
+    def __init__(self):
+        audio = CONFIG["audio"]
+        self.queue: queue.Queue = queue.Queue(maxsize=audio["queue_segments"])
+        self.chunk_bytes = audio["stream_chunk_bytes"]
+        self.bytes_per_second = audio["bitrate"] / 8
+        self.lead = audio["stream_lead_seconds"] # How far publishing runs ahead of real time
+        capacity = int(audio["stream_buffer_seconds"] * self.bytes_per_second / self.chunk_bytes) + 1
+        self.ring = deque(maxlen=capacity)
+        self.head = 0 # Sequence number of the next chunk to be published
+        self.listeners = 0
+        self.on_air = True
+        self.monitor = get_monitor()
+        self.logger = logging.getLogger(__name__)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._new_data: Optional[asyncio.Event] = None
+        self._stopped = threading.Event()
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._new_data = asyncio.Event()
+        threading.Thread(target=self._pump, name="broadcast-pump", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def set_on_air(self, on_air: bool):
+        """Start or stop serving listeners; used as the scheduler's leadership callback."""
+        self.on_air = on_air
+        if not on_air and self._new_data is not None:
+            event, self._new_data = self._new_data, asyncio.Event()
+            event.set() # Wake listeners so they end
+
+    def _pump(self):
+        deadline = time.monotonic() # When everything published so far will have finished playing
+        while not self._stopped.is_set():
+            item = self.queue.get()
+            if item is None:
+                break
+            self.monitor.set_gauge("audio_queue_depth", self.queue.qsize())
+            stream = item if isinstance(item, AudioStream) else AudioStream.from_bytes(item)
+            pending = bytearray()
+            try:
+                for data in stream:
+                    pending.extend(data)
+                    while len(pending) >= self.chunk_bytes:
+                        deadline = self._emit(bytes(pending[:self.chunk_bytes]), deadline)
+                        del pending[:self.chunk_bytes]
+                        stream.mark_first_sound()
+                if pending:
+                    deadline = self._emit(bytes(pending), deadline)
+                    stream.mark_first_sound()
+                stream.report()
+            except Exception as e:
+                self.logger.error(f"Broadcast pump error: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _emit(self, chunk: bytes, deadline: float) -> float:
+        """Publish a chunk no more than `lead` seconds ahead of real time."""
+        now = time.monotonic()
+        deadline = max(deadline, now) # After an idle gap, resume from now
+        wait = deadline - self.lead - now
+        if wait > 0:
+            time.sleep(wait)
+        self._loop.call_soon_threadsafe(self._publish, chunk)
+        return deadline + len(chunk) / self.bytes_per_second
+
+    def _publish(self, chunk: bytes):
+        # Runs on the event loop, so the ring and cursors need no locking
+        self.ring.append(chunk)
+        self.head += 1
+        event, self._new_data = self._new_data, asyncio.Event()
+        event.set()
+
+    async def listen(self) -> AsyncIterator[bytes]:
+        """MP3 bytes for one listener, starting at what is on air now."""
+        on_air = int(self.lead * self.bytes_per_second / self.chunk_bytes)
+        cursor = max(self.head - len(self.ring), self.head - on_air)
+        self.listeners += 1
+        self.monitor.set_gauge("stream_listeners", self.listeners)
+        try:
+            while self.on_air:
+                if cursor == self.head:
+                    await self._new_data.wait()
+                    continue
+                tail = self.head - len(self.ring)
+                if cursor < tail: # Listener fell further behind than the ring holds
+                    self.monitor.increment("stream_skipped_chunks_total", tail - cursor)
+                    cursor = tail
+                head = self.head
+                yield b"".join(self.ring[seq - tail] for seq in range(cursor, head))
+                cursor = head
+        finally:
+            self.listeners -= 1
+            self.monitor.set_gauge("stream_listeners", self.listeners)
@@ -2,20 +2,206 @@ import queue
 import threading
 import io
 import logging
+import importlib.util
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
 from pydub import AudioSegment
 from pydub.playback import play
 
-def play_audio_from_queue(audio_queue: queue.Queue):
+from src.audio.stream import AudioStream
+from src.core.config import CONFIG
+from src.core.performance_monitor import get_monitor
+
+FFMPEG = shutil.which("ffmpeg")
+FFPLAY = shutil.which("ffplay")
+pyaudio_available = importlib.util.find_spec("pyaudio") is not None
+
+PCM_BLOCK = 4096 # Bytes of 16-bit PCM read from the decoder per device write
+MAX_OUTPUT_FAILURES = 3 # Consecutive output device failures before falling back to pydub playback
+
+class AudioPlayer:
     """
-    Continuously fetches audio data from a queue and plays it.
-    Runs in a separate thread.
+    Gapless playback of queued MP3 streams. One persistent ffmpeg process decodes everything
+    written to its stdin as a single continuous MP3 stream; a reader thread writes the PCM to
+    the output device as it is decoded, so segments play back to back without restarting anything.
     """
-    while True:
+    def __init__(self, audio_queue: queue.Queue):
+        self.audio_queue = audio_queue
+        self.monitor = get_monitor()
+        self.logger = logging.getLogger(__name__)
+        audio = CONFIG["audio"]
+        self.sample_rate = audio["sample_rate"]
+        # Constant-bitrate MP3 in, 16-bit mono PCM out: maps decoder output back to segment positions
+        self.pcm_per_mp3_byte = self.sample_rate * 2 / (audio["bitrate"] / 8)
+        self.decoder: Optional[subprocess.Popen] = None
+        self.mp3_fed = 0
+        self.markers = deque() # [mp3 start offset, mp3 end offset or None, stream], in play order
+        self._markers_lock = threading.Lock()
+        self._cpu_seconds = 0.0
+        self.output_failures = 0
+        self._ffplay_legacy = False # ffplay older than 5.1 takes -ac instead of -ch_layout
+        self._pyaudio = None # One PyAudio instance per player, created on first use
+        self._output = None # The open output: a PyAudio stream or an ffplay process
+
+    def run(self):
+        """Feed queued streams into the decoder forever. Runs in the player thread."""
+        if FFMPEG is None:
+            self.logger.warning("ffmpeg not found; decoding each segment with pydub instead of streaming.")
+        try:
+            while True:
+                item = self.audio_queue.get()
+                self.monitor.set_gauge("audio_queue_depth", self.audio_queue.qsize())
+                try:
+                    stream = item if isinstance(item, AudioStream) else AudioStream.from_bytes(item)
+                    if FFMPEG is None or self.output_failures >= MAX_OUTPUT_FAILURES:
+                        self.play_buffered(stream)
+                    else:
+                        self.feed(stream)
+                except Exception as e:
+                    self.logger.error(f"Audio playback error: {e}")
+                finally:
+                    self.audio_queue.task_done()
+        finally:
+            self.close()
+
+    def play_buffered(self, stream: AudioStream):
+        audio_data = b"".join(stream)
+        stream.mark_first_sound()
+        play(AudioSegment.from_file(io.BytesIO(audio_data), format="mp3"))
+        stream.report()
+
+    def feed(self, stream: AudioStream):
+        if self.decoder is None or self.decoder.poll() is not None:
+            self.start_decoder()
+        marker = [self.mp3_fed, None, stream]
+        with self._markers_lock:
+            self.markers.append(marker)
+        try:
+            for chunk in stream:
+                self.decoder.stdin.write(chunk)
+                self.decoder.stdin.flush()
+                self.mp3_fed += len(chunk)
+        except (BrokenPipeError, OSError) as e:
+            self.logger.error(f"Audio decoder exited unexpectedly: {e}")
+            self.decoder = None
+        marker[1] = self.mp3_fed
+
+    def start_decoder(self):
+        self.mp3_fed = 0
+        self._cpu_seconds = 0.0
+        with self._markers_lock:
+            self.markers.clear()
+        self.decoder = subprocess.Popen(
+            [FFMPEG, "-loglevel", "error", "-probesize", "2048", "-analyzeduration", "0", "-fflags", "nobuffer",
+             "-f", "mp3", "-i", "pipe:0",
+             "-f", "s16le", "-ac", "1", "-ar", str(self.sample_rate), "-flush_packets", "1", "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0
+        )
+        threading.Thread(target=self.play_decoded, args=(self.decoder,), name="audio-output", daemon=True).start()
+
+    def open_output(self) -> Tuple[Callable[[bytes], None], object]:
+        """
+        A blocking PCM writer for the output device, and the output it writes to: a PyAudio stream
+        if PyAudio is installed, else a persistent ffplay process.
+        """
+        if pyaudio_available:
+            import pyaudio
+            if self._pyaudio is None:
+                self._pyaudio = pyaudio.PyAudio()
+            self._output = self._pyaudio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate, output=True)
+            return self._output.write, self._output
+        channels = ["-ac", "1"] if self._ffplay_legacy else ["-ch_layout", "mono"]
+        self._output = subprocess.Popen(
+            [FFPLAY or "ffplay", "-nodisp", "-loglevel", "error",
+             "-f", "s16le", "-ar", str(self.sample_rate), *channels, "-i", "pipe:0"],
+            stdin=subprocess.PIPE
+        )
+        return self._output.stdin.write, self._output
+
+    def close_output(self, output):
+        """Release an output opened by open_output; ffplay finishes what it has buffered and exits."""
+        if output is self._output:
+            self._output = None
         try:
-            audio_data = audio_queue.get()
-            audio_segment = AudioSegment.from_file(io.BytesIO(audio_data), format="mp3")
-            play(audio_segment)
-            audio_queue.task_done()
+            if isinstance(output, subprocess.Popen):
+                output.stdin.close()
+            else:
+                output.stop_stream()
+                output.close()
         except Exception as e:
-            logging.error(f"Audio playback error: {e}")
-            continue
+            self.logger.warning(f"Closing audio output failed: {e}")
+
+    def close(self):
+        """Stop the decoder and release the output device."""
+        if self.decoder is not None and self.decoder.poll() is None:
+            self.decoder.kill()
+        if self._output is not None:
+            self.close_output(self._output)
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+
+    def play_decoded(self, decoder: subprocess.Popen):
+        """
+        Write decoder output to the device as it arrives, marking segment start and end on the way.
+        If the device fails, the decoder is killed so the feeding side gets a broken pipe and starts
+        a fresh decoder and output (ffplay's legacy channel option next) instead of blocking on a full pipe.
+        """
+        pcm_played = 0
+        last_cpu_check = time.monotonic()
+        output = None
+        try:
+            write, output = self.open_output()
+            while True:
+                pcm = decoder.stdout.read(PCM_BLOCK)
+                if not pcm:
+                    break
+                write(pcm)
+                pcm_played += len(pcm)
+                if self.output_failures and pcm_played >= self.sample_rate * 2 * 5: # 5 s played: the device works
+                    self.output_failures = 0
+                self.update_markers(pcm_played / self.pcm_per_mp3_byte)
+                if time.monotonic() - last_cpu_check >= 1:
+                    self.record_decode_cpu(decoder.pid)
+                    last_cpu_check = time.monotonic()
+        except Exception as e:
+            self.output_failures += 1
+            if not pyaudio_available:
+                self._ffplay_legacy = not self._ffplay_legacy
+            self.logger.error(f"Audio output failed ({self.output_failures} in a row): {e}")
+            if self.output_failures >= MAX_OUTPUT_FAILURES:
+                self.logger.warning("Falling back to buffered pydub playback.")
+            decoder.kill()
+        finally:
+            if output is not None:
+                self.close_output(output)
+
+    def update_markers(self, mp3_played: float):
+        with self._markers_lock:
+            for marker in self.markers:
+                if marker[0] <= mp3_played:
+                    marker[2].mark_first_sound()
+            while self.markers and self.markers[0][1] is not None and self.markers[0][1] <= mp3_played:
+                self.markers.popleft()[2].report()
+
+    def record_decode_cpu(self, pid: int):
+        """Decoder user + system CPU time, read from /proc (Linux only)."""
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, IndexError, ValueError):
+            return
+        self.monitor.increment("audio_decode_cpu_seconds_total", max(0.0, cpu_seconds - self._cpu_seconds))
+        self._cpu_seconds = cpu_seconds
+
+def play_audio_from_queue(audio_queue: queue.Queue):
+    """
+    Continuously fetches audio streams (or complete MP3 bytes) from a queue and plays them.
+    Runs in a separate thread.
+    """
+    AudioPlayer(audio_queue).run()
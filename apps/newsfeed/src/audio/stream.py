@@ -0,0 +1,88 @@
+import logging
+import queue
+import threading
+import time
+from typing import Iterator, Optional
+
+from src.core.config import CONFIG
+from src.core.performance_monitor import get_monitor
+
+logger = logging.getLogger(__name__)
+
+def jitter_bytes() -> int:
+    """Bytes of MP3 to buffer before playback starts, from the configured jitter window and bitrate."""
+    audio = CONFIG["audio"]
+    return int(audio["bitrate"] / 8 * audio["jitter_ms"] / 1000)
+
+class AudioStream:
+    """
+    One segment's MP3 audio, handed to the player chunk by chunk while TTS is still running.
+    The generator writes chunks and closes the stream; the player thread iterates over it.
+    """
+    def __init__(self, label: str = "", prebuffer: Optional[int] = None):
+        self.label = label
+        self.prebuffer = jitter_bytes() if prebuffer is None else prebuffer
+        self._chunks: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.created = time.perf_counter()
+        self.first_sound: Optional[float] = None
+        self.buffered = 0 # Bytes written but not yet taken by the player
+        self.peak_buffered = 0
+        self.total_bytes = 0
+
+    @classmethod
+    def from_bytes(cls, data: bytes, label: str = "") -> "AudioStream":
+        stream = cls(label, prebuffer=0)
+        stream.write(data)
+        stream.close()
+        return stream
+
+    def write(self, data: bytes):
+        with self._lock:
+            self.buffered += len(data)
+            self.total_bytes += len(data)
+            self.peak_buffered = max(self.peak_buffered, self.buffered)
+        self._chunks.put(data)
+
+    def close(self):
+        self._chunks.put(None)
+
+    def _take(self, chunk: bytes) -> bytes:
+        with self._lock:
+            self.buffered -= len(chunk)
+        return chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Chunks in order; nothing is yielded until `prebuffer` bytes have arrived or the stream is closed."""
+        pending, size, ended = [], 0, False
+        while size < self.prebuffer:
+            chunk = self._chunks.get()
+            if chunk is None:
+                ended = True
+                break
+            pending.append(chunk)
+            size += len(chunk)
+        for chunk in pending:
+            yield self._take(chunk)
+        while not ended:
+            chunk = self._chunks.get()
+            if chunk is None:
+                break
+            yield self._take(chunk)
+
+    def mark_first_sound(self):
+        """Called by the player when the first audio of this stream reaches the output."""
+        if self.first_sound is None:
+            self.first_sound = time.perf_counter()
+
+    def report(self):
+        """Record time-to-first-sound and peak buffered audio for this segment."""
+        monitor = get_monitor()
+        if self.first_sound is not None:
+            monitor.track_operation("time_to_first_sound", self.first_sound - self.created)
+        monitor.set_gauge("audio_buffer_peak_bytes", self.peak_buffered)
+        ttfs = f"{self.first_sound - self.created:.2f}s" if self.first_sound is not None else "n/a"
+        logger.info(
+            f"Audio segment '{self.label}': time to first sound {ttfs}, "
+            f"peak buffered {self.peak_buffered / 1024:.0f} KiB of {self.total_bytes / 1024:.0f} KiB"
+        )
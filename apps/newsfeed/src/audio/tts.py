@@ -0,0 +1,180 @@
+import asyncio
+import importlib.util
+import logging
+import re
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from src.audio.stream import AudioStream
+from src.audio.tts_cache import TTSCache, normalize_text
+from src.core.config import CONFIG
+from src.core.performance_monitor import get_monitor
+
+edge_tts_available = importlib.util.find_spec("edge_tts") is not None
+if edge_tts_available:
+    import edge_tts
+
+def split_sentences(text: str) -> List[str]:
+    """Sentence-sized TTS units; identical sentences in later scripts reuse cached audio."""
+    return [s for s in re.split(r"(?<=[.!?])\s+", normalize_text(text)) if s]
+
+class TTSEngine:
+    """
+    edge-tts synthesis through the content-addressed audio cache. Scripts are cached whole and
+    stock sentences individually; uncached text is synthesized in sentence runs concurrently (at
+    most `workers` requests at once), each with its own timeout and retries, and streamed to the
+    output in script order as their audio arrives.
+    """
+    def __init__(self, voice: Optional[str] = None, cache: Optional[TTSCache] = None):
+        audio = CONFIG["audio"]
+        self.voice = voice or audio["voice"]
+        self.cache = cache or TTSCache(CONFIG["cache"]["tts_dir"], CONFIG["cache"]["tts_max_bytes"])
+        self.workers = audio["tts_workers"]
+        self.timeout = audio["tts_timeout"]
+        self.retries = audio["tts_retries"]
+        self.run_chars = audio["tts_run_chars"]
+        self.monitor = get_monitor()
+        self.logger = logging.getLogger(__name__)
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def _slots(self) -> asyncio.Semaphore:
+        # warm_up runs its own event loop, so the semaphore is created per loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def synthesize(self, text: str, on_chunk: Optional[Callable[[bytes], None]] = None) -> bytes:
+        """
+        MP3 for `text`, from the cache when possible. Uncached audio is also passed to `on_chunk`
+        as it arrives; once some has been passed on, a failed request is no longer retried.
+        """
+        data = await asyncio.to_thread(self.cache.get, self.voice, text)
+        if data is not None:
+            self.monitor.record_cache("tts", hits=1)
+            return data
+        self.monitor.record_cache("tts", misses=1)
+
+        emitted = False
+
+        def emit(chunk: bytes):
+            nonlocal emitted
+            emitted = True
+            on_chunk(chunk)
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._slots():
+                    data = await asyncio.wait_for(self._synthesize_uncached(text, emit if on_chunk else None), self.timeout)
+                break
+            except Exception as e:
+                self.monitor.increment("tts_failures_total", reason=type(e).__name__)
+                if attempt == self.retries or emitted: # A retry would repeat audio already played
+                    raise
+                self.logger.warning(f"TTS attempt {attempt + 1} failed ({type(e).__name__}: {e}); retrying.")
+                await asyncio.sleep(2 ** attempt)
+        await asyncio.to_thread(self.cache.put, self.voice, text, data)
+        return data
+
+    async def _synthesize_uncached(self, text: str, on_chunk: Optional[Callable[[bytes], None]] = None) -> bytes:
+        with self.monitor.track("tts", characters=len(text)) as span:
+            communicate = edge_tts.Communicate(text, self.voice)
+            chunks = []
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    chunks.append(chunk["data"])
+                    if on_chunk is not None:
+                        on_chunk(chunk["data"])
+            data = b"".join(chunks)
+            span.set(audio_bytes=len(data))
+        return data
+
+    def plan(self, sentences: List[str], cached: List[Optional[bytes]]) -> List[Tuple[str, Optional[bytes]]]:
+        """Cached sentences stay separate; contiguous uncached ones are joined into runs of up to `run_chars`."""
+        units, run = [], []
+
+        def flush():
+            if run:
+                units.append((" ".join(run), None))
+                run.clear()
+
+        for sentence, data in zip(sentences, cached):
+            if data is not None:
+                flush()
+                units.append((sentence, data))
+                continue
+            if run and len(" ".join(run)) + 1 + len(sentence) > self.run_chars:
+                flush()
+            run.append(sentence)
+        flush()
+        return units
+
+    async def _stream_unit(self, text: str, chunks: asyncio.Queue) -> bytes:
+        """Synthesize one unit, queueing its audio chunks as they arrive and None when done."""
+        try:
+            return await self.synthesize(text, chunks.put_nowait)
+        finally:
+            chunks.put_nowait(None)
+
+    async def synthesize_to(self, script: str, stream: AudioStream):
+        """
+        Synthesize a script into `stream`, closing it when done. A script aired before is served
+        from its whole-script cache entry. Otherwise cached sentences are reused and each run of
+        contiguous uncached sentences costs one edge-tts request; all requests are submitted at
+        once. The unit being played streams its audio straight through as edge-tts delivers it,
+        while later units buffer until everything before them has been written. A unit that still
+        fails after its retries is cut short or skipped rather than holding up the rest.
+        """
+        text = normalize_text(script)
+        jobs = []
+        try:
+            whole = await asyncio.to_thread(self.cache.get, self.voice, text)
+            if whole is not None:
+                self.monitor.record_cache("tts", hits=1)
+                stream.write(whole)
+                return
+
+            sentences = split_sentences(text)
+            cached = await asyncio.to_thread(lambda: [self.cache.get(self.voice, sentence) for sentence in sentences])
+            units = self.plan(sentences, cached)
+            self.monitor.record_cache("tts", hits=sum(data is not None for _, data in units))
+            queues = [asyncio.Queue() if data is None else None for _, data in units]
+            jobs = [asyncio.create_task(self._stream_unit(unit, chunks)) if chunks is not None else None
+                    for (unit, _), chunks in zip(units, queues)]
+
+            parts = []
+            for (unit, data), job, chunks in zip(units, jobs, queues):
+                if job is not None:
+                    while True:
+                        chunk = await chunks.get()
+                        if chunk is None:
+                            break
+                        stream.write(chunk)
+                    try:
+                        data = await job
+                    except Exception as e:
+                        self.logger.error(f"Dropping {len(unit)} characters from '{stream.label}' after failed synthesis: {e}")
+                        parts = None
+                        continue
+                else:
+                    stream.write(data)
+                if parts is not None:
+                    parts.append(data)
+            if parts is not None and len(units) > 1: # A single run is already cached under the script
+                await asyncio.to_thread(self.cache.put, self.voice, text, b"".join(parts))
+        finally:
+            for job in jobs:
+                if job is not None:
+                    job.cancel()
+            stream.close()
+
+    async def prerender(self, phrases: Iterable[str]) -> int:
+        """Make sure stock phrases are cached. Returns how many had to be synthesized."""
+        rendered = 0
+        for phrase in phrases:
+            for sentence in split_sentences(phrase):
+                if await asyncio.to_thread(self.cache.get, self.voice, sentence) is None:
+                    await self.synthesize(sentence)
+                    rendered += 1
+        return rendered
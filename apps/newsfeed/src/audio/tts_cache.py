@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of a TTS input, so reflowed copies of a script share audio."""
+    return re.sub(r"\s+", " ", text).strip()
+
+def cache_key(voice: str, text: str) -> str:
+    return hashlib.sha256(f"{voice}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """
+    Content-addressed MP3 cache on disk (`<dir>/<key[:2]>/<key>.mp3`) with LRU eviction by total size.
+    Recency survives restarts through file mtimes, which are bumped on every hit.
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict() # key -> size, least recently used first
+        self.total_bytes = 0
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def _load_index(self):
+        if not self.directory.exists():
+            return
+        files = []
+        for path in self.directory.glob("*/*.mp3"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+
+    def get(self, voice: str, text: str) -> Optional[bytes]:
+        key = cache_key(voice, text)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except OSError:
+            with self._lock:
+                self.total_bytes -= self._entries.pop(key, 0)
+            return None
+
+    def put(self, voice: str, text: str, data: bytes):
+        if not data or len(data) > self.max_bytes:
+            return
+        key = cache_key(voice, text)
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path) # Atomic: concurrent readers never see a partial file
+        except OSError as e:
+            logger.error(f"Failed to cache TTS audio: {e}")
+            return
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            evicted = []
+            while self.total_bytes > self.max_bytes and self._entries:
+                old_key, size = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._path(old_key).unlink(missing_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,124 @@
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.core.models import Article
+from src.nlp.scoring import text_stats as compute_text_stats
+
+class ArticleView:
+    """Text fields of one article in an ArticleBatch; the numeric fields live in the batch's arrays."""
+    __slots__ = ("title", "content", "url", "source", "summary", "content_hash")
+
+    def __init__(self, title: str, content: str, url: str, source: str, summary: str, content_hash: str):
+        self.title = title
+        self.content = content
+        self.url = url
+        self.source = source
+        self.summary = summary
+        self.content_hash = content_hash
+
+class ArticleBatch:
+    """
+    Columnar view of one cycle's articles. Numeric fields are NumPy arrays so scoring,
+    filtering and ranking run as vectorised expressions instead of per-article Python loops.
+    """
+    def __init__(self, views: List[ArticleView], published: np.ndarray, length: np.ndarray, sentences: np.ndarray,
+                 words: np.ndarray, sentiment: np.ndarray, relevancy: np.ndarray, cluster: np.ndarray):
+        self.views = views
+        self.published = published # POSIX seconds
+        self.length = length
+        self.sentences = sentences
+        self.words = words
+        self.sentiment = sentiment
+        self.relevancy = relevancy
+        self.cluster = cluster
+        self.importance = np.zeros(len(views), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.views)
+
+    @classmethod
+    def from_articles(cls, articles: Sequence[Article], text_stats: Optional[Sequence[Sequence[int]]] = None) -> "ArticleBatch":
+        """
+        Build a batch from Article objects. `text_stats` is (lengths, sentence counts, word counts)
+        as returned by scoring.text_stats; it is computed here if not given.
+        """
+        if text_stats is None:
+            text_stats = compute_text_stats([a.content for a in articles])
+        lengths, sentences, words = text_stats
+
+        batch = cls(
+            views=[ArticleView(a.title, a.content, a.url, a.source, a.summary, a.content_hash) for a in articles],
+            published=np.fromiter((a.published.timestamp() for a in articles), dtype=np.float64, count=len(articles)),
+            length=np.asarray(lengths, dtype=np.int32),
+            sentences=np.asarray(sentences, dtype=np.int32),
+            words=np.asarray(words, dtype=np.int32),
+            sentiment=np.fromiter((a.sentiment_score for a in articles), dtype=np.float32, count=len(articles)),
+            relevancy=np.fromiter((a.relevancy_score for a in articles), dtype=np.float32, count=len(articles)),
+            cluster=np.fromiter((a.cluster_id for a in articles), dtype=np.int32, count=len(articles)),
+        )
+        batch.importance = np.fromiter((a.importance_score for a in articles), dtype=np.float32, count=len(articles))
+        return batch
+
+    def article(self, i: int) -> Article:
+        """Materialise one row as an Article (only done for the articles that make it into segments)."""
+        view = self.views[i]
+        return Article(
+            title=view.title,
+            content=view.content,
+            url=view.url,
+            published=datetime.fromtimestamp(self.published[i]),
+            source=view.source,
+            summary=view.summary,
+            sentiment_score=float(self.sentiment[i]),
+            importance_score=float(self.importance[i]),
+            relevancy_score=float(self.relevancy[i]),
+            cluster_id=int(self.cluster[i]),
+            content_hash=view.content_hash,
+        )
+
+    def score_importance(self, now: Optional[float] = None) -> np.ndarray:
+        """Freshness, content quality, sentiment impact and readability in one vectorised pass."""
+        now = datetime.now().timestamp() if now is None else now
+        hours_old = (now - self.published) / 3600
+
+        freshness = np.maximum(0.0, 1 - hours_old / 48)
+        content_quality = np.minimum(1.0, self.length / 800)
+        readability = np.where(
+            self.sentences == 0,
+            1.0,
+            np.minimum(1.0, self.words / np.maximum(self.sentences * 15, 1))
+        )
+        sentiment_impact = np.abs(self.sentiment)
+
+        self.importance = (
+            0.4 * freshness +
+            0.3 * content_quality +
+            0.2 * sentiment_impact +
+            0.1 * readability
+        ).astype(np.float32)
+        return self.importance
+
+    def top_k_per_cluster(self, k: int, mask: Optional[np.ndarray] = None) -> dict:
+        """
+        Indices of the k most important articles in each cluster, best first.
+        `mask` restricts the candidates (e.g. to articles above the relevancy threshold).
+        """
+        candidates = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if candidates.size == 0:
+            return {}
+
+        # Group candidates by cluster with one stable sort instead of a dict of lists
+        order = candidates[np.argsort(self.cluster[candidates], kind="stable")]
+        labels, starts = np.unique(self.cluster[order], return_index=True)
+        groups = np.split(order, starts[1:])
+
+        selected = {}
+        for label, members in zip(labels, groups):
+            scores = self.importance[members]
+            if members.size > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                members, scores = members[top], scores[top]
+            selected[int(label)] = members[np.argsort(-scores, kind="stable")]
+        return selected
@@ -1,5 +1,7 @@
+import os
+
 CONFIG = {
-    "ollama_api": {"base_url": "http://localhost:11434"},
+    "ollama_api": {"base_url": os.getenv("OLLAMA_HOST", "http://localhost:11434")}, # Every Ollama call (generate, chat, embeddings) uses this
     "models": {
         "summary_model": "mistral-small:24b-instruct-2501-q8_0",
         "broadcast_model": "mistral-small:24b-instruct-2501-q8_0",
@@ -15,5 +17,113 @@ CONFIG = {
     "relevancy": {
         "threshold": 3 # Lowered default relevancy threshold
     },
+    "embedding": {
+        "backend": os.getenv("EMBEDDING_BACKEND", "st-fp32"), # "st-fp32" (SentenceTransformer) or "onnx-int8"
+        "model": "sentence-transformers/all-MiniLM-L6-v2",
+        "onnx_dir": os.getenv("ONNX_MODEL_DIR", "models/onnx"), # Exported + quantized models
+        "batch_size": None, # None = auto-tune (onnx-int8) / 32 (st-fp32)
+        "threads": None # None = auto-tune
+    },
+    "sentiment": {
+        "lead_paragraphs": 3, # Score only the lead paragraphs of long articles (None = full text)
+        "lead_chars": 2000, # Hard cap on the text handed to VADER
+        "batch_size": 64 # Articles per process-pool task
+    },
+    "offload": {
+        "thread_workers": 2, # Model inference (encode, k-means) off the event loop
+        "process_workers": max(1, (os.cpu_count() or 2) // 2) # Pure-Python scoring (VADER, regex)
+    },
+    "history": {
+        "cluster_capacity": 50, # Batches of cluster results kept in memory
+        "csai_capacity": 1000, # Clustering quality entries kept in memory
+        "spill_dir": os.getenv("HISTORY_SPILL_DIR") # Older entries go here as .jsonl.gz (unset = dropped)
+    },
+    "broadcasts": {
+        "db_path": os.getenv("BROADCAST_DB", "data/broadcasts.db"),
+        "retention_days": float(os.getenv("BROADCAST_RETENTION_DAYS", "90")), # 0 keeps everything in the database
+        "archive_dir": os.getenv("BROADCAST_ARCHIVE_DIR", "data/broadcasts/archive"), # Expired broadcasts, .jsonl.gz per month
+        "retention_interval": 3600, # Seconds between retention passes
+        "compression_level": 6
+    },
+    "cache": {
+        "models_dir": os.getenv("MODEL_CACHE_DIR", "models"), # Local cache for SentenceTransformer weights
+        "nltk_data": os.getenv("NLTK_DATA_DIR", "models/nltk_data"), # Local cache for the VADER lexicon
+        "offline": os.getenv("NEWSFEED_OFFLINE", "0") == "1", # Never hit the network for model downloads
+        "tts_dir": os.getenv("TTS_CACHE_DIR", "models/tts_cache"), # Synthesized sentences, keyed by voice + text
+        "tts_max_bytes": 512 * 2**20
+    },
+    "audio": {
+        "voice": "en-US-EricNeural",
+        "bitrate": 48000, # edge-tts default output: 24 kHz mono MP3 at 48 kbit/s
+        "jitter_ms": 500, # Audio buffered before a segment starts playing
+        "sample_rate": 24000, # Decoded PCM rate sent to the output device
+        "queue_segments": 3, # Segments waiting for the player before the generator blocks
+        "tts_workers": 4, # Concurrent edge-tts syntheses
+        "tts_timeout": 30, # Seconds per request before it is retried
+        "tts_retries": 2,
+        "tts_run_chars": 1500, # Longest run of uncached sentences sent in one edge-tts request
+        "live_stream": os.getenv("LIVE_STREAM", "0") == "1", # API: synthesize audio and serve it at /stream/live.mp3 (refresh jobs then wait for queue space)
+        "stream_chunk_bytes": 4096, # ~0.7 s at 48 kbit/s
+        "stream_lead_seconds": 2, # Published ahead of real time to absorb jitter
+        "stream_buffer_seconds": 30 # Ring buffer length shared by all listeners
+    },
+    "store": {
+        "backend": os.getenv("STORE_BACKEND", "chroma"), # "chroma" (HTTP server) or "local" (embedded index)
+        "chroma_host": os.getenv("CHROMA_HOST", "http://chroma:8000"),
+        "local_dir": os.getenv("VECTOR_STORE_DIR", "vector_store"), # Embedded backend files
+        "hnsw_m": 16,
+        "hnsw_ef_construction": 200,
+        "hnsw_ef": 64, # Candidate list size at query time (raised to n_results when larger)
+        "index_save_every": 1000, # Writes between HNSW index saves; later ones are replayed on open
+        "exact_filter_below": 2000, # Filtered queries matching fewer records scan them exactly
+        "write_batch": 64, # Records per bulk add
+        "write_delay": 2.0, # Seconds a record may wait in the buffer
+        "write_retries": 3,
+        "max_pending": 10000 # Records kept for retry while the store is unreachable
+    },
+    "search": {
+        "query_cache_size": 1024, # Query embeddings kept (LRU)
+        "result_cache_size": 1024,
+        "result_ttl": 30, # Seconds a (query, persona, limit, keyword) result is reused
+        "candidates": 100, # Nearest neighbours and BM25 hits ranked per unfiltered query
+        "filtered_candidates": 2000, # Keyword matches ranked exactly per filtered query
+        "hybrid_alpha": 0.7 # Weight of vector similarity vs BM25 in the hybrid score
+    },
+    "projection": {
+        "path": os.getenv("PROJECTION_PATH", "models/projection.npz"), # Saved layout, reloaded on startup
+        "reference_size": 2000, # Segments laid out by t-SNE; the rest are placed against them
+        "neighbours": 10, # Reference points averaged per out-of-sample placement
+        "refit_interval": 6 * 3600, # Seconds between background refits
+        "refit_growth": 2.0, # Also refit once the archive has grown this much since the last fit
+        "page_size": 1000, # Embeddings read from the store per request during a fit
+        "sync_interval": 30 # Seconds between saves of new placements (leader) / reloads of the saved layout (other workers)
+    },
+    "jobs": {
+        "max_concurrent": int(os.getenv("REFRESH_CONCURRENCY", "1")), # Pipeline runs sharing the LLM server at once
+        "max_queued": 20, # Further distinct refresh requests are rejected with 429
+        "history": 100, # Finished jobs kept for polling
+        "poll_interval": 1.0, # Seconds between job state reads while following /jobs/{id}/events
+        "write_retries": 3 # Retries of a job table write while the database is locked
+    },
+    "scheduler": {
+        "db_path": os.getenv("SCHEDULER_DB", "data/scheduler.db"), # Leader lease and job queue, shared by the API workers
+        "lease_ttl": 30, # Seconds without renewal before another worker takes over
+        "heartbeat": 10, # Seconds between lease renewals
+        "refresh_interval": int(os.getenv("REFRESH_INTERVAL", "3600")), # Seconds between scheduled refreshes
+        "job_poll_interval": 2 # Seconds between the leader's checks for jobs queued by other workers
+    },
+    "tracing": {
+        "enabled": os.getenv("TRACING", "1") != "0",
+        "dir": os.getenv("TRACE_DIR", "traces"), # Chrome Trace Event JSON, one file per cycle
+        "max_spans": 20000, # Per trace; further spans are counted as dropped
+        "keep_files": 200
+    },
+    "profiling": {
+        "admin_token": os.getenv("ADMIN_TOKEN"), # Required in X-Admin-Token for /admin/*; unset disables them
+        "dir": os.getenv("PROFILE_DIR", "profiles"), # .cpu.folded / .alloc.folded output
+        "interval": 0.005, # Seconds between stack samples
+        "max_seconds": 300, # Cap on timed profiles
+        "max_cycle_seconds": 3600 # Cap on cycle profiles; sampling past it stops and the profile is marked truncated
+    },
     "output": {"max_broadcast_length": 900000000}
 }
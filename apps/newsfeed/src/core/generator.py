@@ -5,111 +5,186 @@ import re
 import numpy as np
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
-import importlib.util
+from typing import Callable, List, Dict, Optional
 import queue
-import io
 import os
+import time
 
 from ollama import Ollama # Import Ollama
-from store import store_segment # Import store_segment
+from store import get_segment_writer
 
 from src.core.config import CONFIG
 from src.core.models import Article, BroadcastSegment
+from src.core.batch import ArticleBatch
+from src.audio.stream import AudioStream
+from src.audio.tts import TTSEngine, edge_tts_available
 from src.core.circuit_breaker import CircuitBreaker
-from src.core.performance_monitor import PerformanceMonitor
+from src.core.performance_monitor import get_monitor
+from src.core.tracing import get_tracer
+from src.core.profiling import get_profiler
+from src.data.broadcast_store import get_broadcast_store
 from src.data.database import NewsDatabase
 from src.feeds.fetcher import FeedFetcher
-from src.nlp.sentiment import SentimentAnalyzer
+from src.nlp.sentiment import SentimentStage
 from src.nlp.clustering import StreamClusterer
+from src.nlp import scoring
+from src.core.offload import LoopLagMonitor, run_in_process, run_in_thread
 from src.utils import load_persona # Import load_persona
 from src.prompts import create_summary_prompt, create_segment_script_prompt, create_transition_phrase_prompt, create_commentary_prompt # Import prompt functions
 
-edge_tts_available = importlib.util.find_spec("edge_tts") is not None
-if edge_tts_available:
-    import edge_tts
+# Fixed phrases spoken every cycle; pre-rendered into the TTS cache at warm-up
+INTRO_PHRASE = "Welcome to your live news briefing."
+FALLBACK_TRANSITION = "Next, in the news."
 
 class NewsGenerator:
-    def __init__(self, audio_queue: queue.Queue, feeds_file: str = "feeds.yaml", topic: Optional[str] = None, guidance: Optional[str] = None):
+    def __init__(self, audio_queue: Optional[queue.Queue] = None, feeds_file: str = "feeds.yaml", topic: Optional[str] = None, guidance: Optional[str] = None, persona_file: str = "persona.yaml"):
         self.audio_queue = audio_queue
         self.feeds_file = feeds_file
+        self.persona_file = persona_file
         self.circuit_breaker = CircuitBreaker()
-        self.performance_monitor = PerformanceMonitor()
+        self.performance_monitor = get_monitor()
         self.topic = topic
         self.guidance = guidance
         self.relevancy_threshold = CONFIG["relevancy"]["threshold"]
         self.logger = logging.getLogger(__name__)
 
+        # Heavy components (models, lexicon, personas) load lazily; call warm_up() to load them up front.
         self.db = NewsDatabase()
         self.feed_fetcher = FeedFetcher(feeds_file=self.feeds_file)
-        self.sentiment_analyzer = SentimentAnalyzer()
+        self.sentiment_stage = SentimentStage(self.db)
         self.article_clusterer = StreamClusterer()
-        
-        # Load all personas from the personas directory
-        self.personas = {}
-        personas_dir = Path("personas")
-        for persona_file in personas_dir.glob("*.yaml"):
-            persona = load_persona(str(persona_file))
-            self.personas[persona_file.stem] = persona
-        self.default_persona = self.personas.get("objective", load_persona("persona.yaml"))
-        
-        self.ollama_client = Ollama(host=os.getenv("OLLAMA_HOST", "http://ollama:11434"))
-    async def process_articles_smart(self, articles: List[Article]) -> List[Article]:
-        """Streamlined processing with circuit breaker"""
-        if not articles:
-            return []
+        self._personas = None
+        self._persona = None
+        self.ready = False
+        self.failed_components: Dict[str, str] = {} # Warm-up failures, by component
+        self.previous_topic = None
+        self.broadcast_store = get_broadcast_store()
+        self.tracer = get_tracer()
+        self.profiler = get_profiler()
+        self.tts = TTSEngine()
+        self.segment_writer = get_segment_writer()
+
+        self.ollama_client = Ollama(host=CONFIG["ollama_api"]["base_url"])
+
+    @property
+    def personas(self) -> Dict[str, Dict]:
+        """All personas from the personas directory, loaded on first use."""
+        if self._personas is None:
+            personas = {}
+            personas_dir = Path("personas")
+            for persona_file in personas_dir.glob("*.yaml"):
+                persona = load_persona(str(persona_file))
+                personas[persona_file.stem] = persona
+            self._personas = personas
+        return self._personas
+
+    @property
+    def persona(self) -> Dict:
+        """The narrating persona used for summaries, scripts and transitions."""
+        if self._persona is None:
+            self._persona = load_persona(self.persona_file)
+        return self._persona
+
+    @property
+    def default_persona(self) -> Dict:
+        return self.personas.get("objective", self.persona)
+
+    def warm_up(self) -> Dict[str, float]:
+        """Load every heavy component now; the generator is ready only if all of them loaded. Returns load time per component."""
+        timings, failed = {}, {}
+        components = [
+            ("personas", lambda: (self.personas, self.persona)),
+            ("embedder", self.article_clusterer.warm_up),
+            ("sentiment", self.sentiment_stage.warm_up),
+        ]
+        if self.audio_queue is not None and edge_tts_available:
+            components.append(("tts", lambda: asyncio.run(self.tts.prerender([INTRO_PHRASE, FALLBACK_TRANSITION]))))
+        for name, load in components:
+            start = time.perf_counter()
+            try:
+                load()
+            except Exception as e:
+                self.logger.error(f"Warm-up failed for {name}: {e}")
+                failed[name] = str(e)
+            timings[name] = time.perf_counter() - start
 
-        start_time = datetime.now()
+        self.failed_components = failed
+        self.ready = not failed
+        self.logger.info("Warm-up complete: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+        return timings
 
-        async with aiohttp.ClientSession() as session:
-            self.article_clusterer.session = session # Pass the session to the clusterer
-            self.article_clusterer.circuit_breaker = self.circuit_breaker # Pass the circuit breaker to the clusterer
+    def flush_history(self):
+        """Persist in-memory history that has not been spilled yet (call on shutdown)."""
+        self.article_clusterer.flush_history()
 
-            # Generate summaries
-            summary_tasks = [self.generate_summary_safe(session, article) for article in articles]
-            summaries = await asyncio.gather(*summary_tasks, return_exceptions=True)
+    async def process_articles_smart(self, articles: List[Article]) -> ArticleBatch:
+        """Streamlined processing with circuit breaker"""
+        if not articles:
+            return ArticleBatch.from_articles([])
 
-            for i, result in enumerate(summaries):
-                if isinstance(result, Exception):
-                    self.logger.error(f"Summary failed for {articles[i].title}: {result}")
-                    articles[i].summary = articles[i].content[:150] + "..."
-                else:
-                    articles[i].summary = result
+        with self.performance_monitor.track("process_articles", articles=len(articles)):
+            # Sentiment runs in the process pool while the LLM calls below are in flight
+            sentiment_task = asyncio.create_task(self.sentiment_stage.score(articles))
 
-            # Calculate relevancy scores if a topic is provided
-            if self.topic:
-                relevancy_tasks = [self.calculate_relevancy_score(session, article) for article in articles]
-                relevancy_scores = await asyncio.gather(*relevancy_tasks, return_exceptions=True)
+            async with aiohttp.ClientSession() as session:
+                self.article_clusterer.session = session # Pass the session to the clusterer
+                self.article_clusterer.circuit_breaker = self.circuit_breaker # Pass the circuit breaker to the clusterer
+
+                # Generate summaries
+                with self.tracer.span("summaries", articles=len(articles)):
+                    summary_tasks = [self.generate_summary_safe(session, article) for article in articles]
+                    summaries = await asyncio.gather(*summary_tasks, return_exceptions=True)
 
-                for i, result in enumerate(relevancy_scores):
+                for i, result in enumerate(summaries):
                     if isinstance(result, Exception):
-                        self.logger.error(f"Relevancy scoring failed for {articles[i].title}: {result}")
-                        articles[i].relevancy_score = 0.0
+                        self.logger.error(f"Summary failed for {articles[i].title}: {result}")
+                        articles[i].summary = articles[i].content[:150] + "..."
                     else:
-                        articles[i].relevancy_score = result
-
-        # Cluster articles using StreamClusterer
-        headlines = [article.title for article in articles]
-        timestamp_source_info = [(article.published, article.source) for article in articles]
-        
-        cluster_results = await self.article_clusterer.process_batch(headlines, timestamp_source_info)
-
-        # Assign cluster_id back to articles
-        for cluster_id, cluster_data in cluster_results.items():
-            for headline in cluster_data['headlines']:
-                # Find the original article object and assign the cluster_id
-                for article in articles:
-                    if article.title == headline:
-                        article.cluster_id = cluster_id
-                        break
-
-        # Calculate importance scores
-        self.calculate_importance_scores(articles)
-
-        duration = (datetime.now() - start_time).total_seconds()
-        self.performance_monitor.track_operation("process_articles", duration)
+                        articles[i].summary = result
+
+                # Calculate relevancy scores if a topic is provided
+                if self.topic:
+                    with self.tracer.span("relevancy_scores", articles=len(articles), topic=self.topic):
+                        relevancy_tasks = [self.calculate_relevancy_score(session, article) for article in articles]
+                        relevancy_scores = await asyncio.gather(*relevancy_tasks, return_exceptions=True)
+
+                    for i, result in enumerate(relevancy_scores):
+                        if isinstance(result, Exception):
+                            self.logger.error(f"Relevancy scoring failed for {articles[i].title}: {result}")
+                            articles[i].relevancy_score = 0.0
+                        else:
+                            articles[i].relevancy_score = result
+
+                # Cluster articles using StreamClusterer
+                headlines = [article.title for article in articles]
+                timestamp_source_info = [(article.published, article.source) for article in articles]
+
+                with self.tracer.span("clustering", headlines=len(headlines)) as span:
+                    cluster_results = await self.article_clusterer.process_batch(headlines, timestamp_source_info)
+                    span.set(clusters=len(cluster_results))
+
+            # Assign cluster_id back to articles (first unassigned article with that headline)
+            by_title = {}
+            for article in articles:
+                by_title.setdefault(article.title, []).append(article)
+            for cluster_id, cluster_data in cluster_results.items():
+                for headline in cluster_data['headlines']:
+                    for article in by_title.get(headline, []):
+                        if article.cluster_id == -1:
+                            article.cluster_id = cluster_id
+                            break
+
+            # Calculate importance scores
+            with self.tracer.span("sentiment_wait"):
+                try:
+                    await sentiment_task
+                except Exception as e:
+                    self.logger.error(f"Sentiment scoring failed: {e}")
+            with self.tracer.span("importance", articles=len(articles)):
+                batch = await self.build_article_batch(articles)
+                self.calculate_importance_scores(batch)
 
-        return articles
+        return batch
 
     async def generate_summary_safe(self, session: aiohttp.ClientSession, article: Article) -> str:
         """Safe summary generation with circuit breaker using aiohttp"""
@@ -119,20 +194,22 @@ class NewsGenerator:
         prompt = create_summary_prompt(article.title, article.content, self.persona)
 
         try:
-            async with session.post(
-                f"{CONFIG['ollama_api']['base_url']}/api/generate",
-                json={
-                    'model': CONFIG["models"]["summary_model"],
-                    'prompt': prompt,
-                    'stream': False,
-                    'options': {'temperature': 0.3, 'max_tokens': 10000}
-                },
-                timeout=aiohttp.ClientTimeout(total=60)
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                self.circuit_breaker.record_success()
-                return data['response'].strip()
+            with self.performance_monitor.track("summary"):
+                async with session.post(
+                    f"{CONFIG['ollama_api']['base_url']}/api/generate",
+                    json={
+                        'model': CONFIG["models"]["summary_model"],
+                        'prompt': prompt,
+                        'stream': False,
+                        'options': {'temperature': 0.3, 'max_tokens': 10000}
+                    },
+                    timeout=aiohttp.ClientTimeout(total=60)
+                ) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                    self.performance_monitor.record_llm_tokens(CONFIG["models"]["summary_model"], data)
+                    self.circuit_breaker.record_success()
+                    return data['response'].strip()
 
         except aiohttp.ClientResponseError as e:
             error_detail = await e.response.text() if e.response else "No response body"
@@ -163,26 +240,28 @@ class NewsGenerator:
         """
 
         try:
-            async with session.post(
-                f"{CONFIG['ollama_api']['base_url']}/api/generate",
-                json={
-                    'model': CONFIG["models"]["summary_model"],
-                    'prompt': prompt,
-                    'stream': False,
-                    'options': {'temperature': 0.1, 'max_tokens': 5}
-                },
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                self.circuit_breaker.record_success()
-                score_str = data['response'].strip()
-                try:
-                    score = float(score_str)
-                    return max(0.0, min(10.0, score))
-                except ValueError:
-                    self.logger.warning(f"LLM returned non-numeric relevancy score: '{score_str}'")
-                    return 0.0
+            with self.performance_monitor.track("relevancy"):
+                async with session.post(
+                    f"{CONFIG['ollama_api']['base_url']}/api/generate",
+                    json={
+                        'model': CONFIG["models"]["summary_model"],
+                        'prompt': prompt,
+                        'stream': False,
+                        'options': {'temperature': 0.1, 'max_tokens': 5}
+                    },
+                    timeout=aiohttp.ClientTimeout(total=30)
+                ) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                    self.performance_monitor.record_llm_tokens(CONFIG["models"]["summary_model"], data)
+                    self.circuit_breaker.record_success()
+                    score_str = data['response'].strip()
+                    try:
+                        score = float(score_str)
+                        return max(0.0, min(10.0, score))
+                    except ValueError:
+                        self.logger.warning(f"LLM returned non-numeric relevancy score: '{score_str}'")
+                        return 0.0
 
         except aiohttp.ClientResponseError as e:
             error_detail = await e.response.text() if e.response else "No response body"
@@ -198,57 +277,36 @@ class NewsGenerator:
             self.circuit_breaker.record_failure()
             return 0.0
 
-    def calculate_importance_scores(self, articles: List[Article]):
-        """Enhanced importance scoring"""
-        for article in articles:
-            hours_old = (datetime.now() - article.published).total_seconds() / 3600
-            freshness = max(0, 1 - (hours_old / 48))
-
-            content_quality = min(1.0, len(article.content) / 800)
+    async def build_article_batch(self, articles: List[Article]) -> ArticleBatch:
+        """Columnar batch of the cycle's articles; the per-article text counting runs in the process pool."""
+        stats = await run_in_process(scoring.text_stats, [article.content for article in articles])
+        return ArticleBatch.from_articles(articles, stats)
 
-            sentences = len(re.split(r'[.!?]+', article.content))
-            words = len(article.content.split())
-            readability = 1.0 if sentences == 0 else min(1.0, words / (sentences * 15))
+    def calculate_importance_scores(self, batch: ArticleBatch):
+        """Enhanced importance scoring, vectorised over the whole batch"""
+        batch.score_importance()
 
-            sentiment_impact = abs(self.sentiment_analyzer.get_sentiment_score(article.content))
-
-            article.importance_score = (
-                0.4 * freshness +
-                0.3 * content_quality +
-                0.2 * sentiment_impact +
-                0.1 * readability
-            )
-
-    def create_broadcast_segments(self, articles: List[Article]) -> List[BroadcastSegment]:
+    def create_broadcast_segments(self, batch: ArticleBatch) -> List[BroadcastSegment]:
         """Create segments from clustered articles"""
         segments = []
-        clusters = {}
+        mask = None
 
         if self.topic:
-            articles = [a for a in articles if a.relevancy_score >= self.relevancy_threshold]
-            self.logger.info(f"Filtered to {len(articles)} articles above relevancy threshold ({self.relevancy_threshold}) for topic '{self.topic}'")
-            if not articles:
+            mask = batch.relevancy >= self.relevancy_threshold
+            kept = int(mask.sum())
+            self.logger.info(f"Filtered to {kept} articles above relevancy threshold ({self.relevancy_threshold}) for topic '{self.topic}'")
+            if not kept:
                 self.logger.warning("No articles met the relevancy threshold for the given topic.")
                 return []
 
-        for article in articles:
-            cluster_id = article.cluster_id
-            if cluster_id not in clusters:
-                clusters[cluster_id] = []
-            clusters[cluster_id].append(article)
-
-        for cluster_id, cluster_articles in clusters.items():
-            if not cluster_articles:
-                continue
-
-            cluster_articles.sort(key=lambda x: x.importance_score, reverse=True)
-            topic = self.extract_topic(cluster_articles[:2])
-            selected_articles = cluster_articles[:2]
-            avg_importance = np.mean([a.importance_score for a in selected_articles])
+        for cluster_id, indices in batch.top_k_per_cluster(2, mask).items():
+            selected_articles = [batch.article(i) for i in indices]
+            topic = self.extract_topic(selected_articles)
+            avg_importance = float(batch.importance[indices].mean())
 
             segment = BroadcastSegment(
                 topic=topic,
-                content="",
+                content="", # The generated script, filled in when the segment is written
                 articles=selected_articles,
                 importance=avg_importance
             )
@@ -278,27 +336,25 @@ class NewsGenerator:
 
         return articles[0].title.split()[:2]
 
-    async def generate_and_queue_audio(self, script: str):
-        """Generates audio from a script and puts it into the queue."""
+    async def generate_and_queue_audio(self, script: str, label: str = "") -> Optional[asyncio.Task]:
+        """
+        Queues the segment's audio stream (so segments play in broadcast order) and starts synthesizing
+        into it in the background. Returns the synthesis task; the caller awaits it before the cycle ends.
+        """
         if not edge_tts_available:
             self.logger.error("Cannot generate audio: edge_tts library not found.")
-            return
-
-        try:
-            self.logger.info("Generating audio for a new segment...")
-            communicate = edge_tts.Communicate(script, "en-US-EricNeural")
-
-            audio_buffer = io.BytesIO()
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_buffer.write(chunk["data"])
-
-            audio_buffer.seek(0)
-            self.audio_queue.put(audio_buffer.read())
-            self.logger.info("Audio segment added to the playback queue.")
-
-        except Exception as e:
-            self.logger.error(f"Failed to generate or queue audio: {e}")
+            return None
+        if self.audio_queue is None:
+            return None
+
+        # Queued before synthesis starts, so playback begins once the jitter buffer fills.
+        # The queue is bounded: when the player is behind, this waits (off the loop) instead of piling up audio.
+        stream = AudioStream(label)
+        with self.performance_monitor.track("audio_queue_wait"):
+            await asyncio.to_thread(self.audio_queue.put, stream)
+        self.performance_monitor.set_gauge("audio_queue_depth", self.audio_queue.qsize())
+        self.logger.info(f"Generating audio for segment '{label}'...")
+        return asyncio.create_task(self.tts.synthesize_to(script, stream))
 
     async def generate_segment_script(self, segment: BroadcastSegment) -> str:
         """Generate segment script for a given topic and context."""
@@ -306,20 +362,22 @@ class NewsGenerator:
         prompt = create_segment_script_prompt(segment.topic, context, self.guidance, self.persona)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{CONFIG['ollama_api']['base_url']}/api/generate",
-                    json={
-                        'model': CONFIG["models"]["broadcast_model"],
-                        'prompt': prompt,
-                        'stream': False,
-                        'options': {'temperature': 0.4, 'max_tokens': 30000}
-                    },
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    response.raise_for_status()
-                    data = await response.json()
-                    return data['response'].strip()
+            with self.performance_monitor.track("script"):
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(
+                        f"{CONFIG['ollama_api']['base_url']}/api/generate",
+                        json={
+                            'model': CONFIG["models"]["broadcast_model"],
+                            'prompt': prompt,
+                            'stream': False,
+                            'options': {'temperature': 0.4, 'max_tokens': 30000}
+                        },
+                        timeout=aiohttp.ClientTimeout(total=60)
+                    ) as response:
+                        response.raise_for_status()
+                        data = await response.json()
+                        self.performance_monitor.record_llm_tokens(CONFIG["models"]["broadcast_model"], data)
+                        return data['response'].strip()
 
         except aiohttp.ClientResponseError as e:
             error_detail = await e.response.text() if e.response else "No response body"
@@ -338,11 +396,13 @@ class NewsGenerator:
         for persona_id, persona in self.personas.items():
             try:
                 prompt = create_commentary_prompt(segment.topic, context, persona)
-                res = await self.ollama_client.chat(
-                    model=CONFIG["models"]["commentary_model"],
-                    messages=[{'role': 'user', 'content': prompt}],
-                    options={'temperature': 0.7}
-                )
+                with self.performance_monitor.track("commentary", persona=persona_id):
+                    res = await self.ollama_client.chat(
+                        model=CONFIG["models"]["commentary_model"],
+                        messages=[{'role': 'user', 'content': prompt}],
+                        options={'temperature': 0.7}
+                    )
+                self.performance_monitor.record_llm_tokens(CONFIG["models"]["commentary_model"], res)
                 persona_comments[persona_id] = res['message']['content'].strip()
             except Exception as e:
                 self.logger.error(f"Failed to generate LLM commentary for persona {persona_id}: {e}")
@@ -353,10 +413,12 @@ class NewsGenerator:
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a given text."""
         try:
-            res = await self.ollama_client.embeddings(
-                model=CONFIG["models"]["embedding_model"],
-                prompt=text
-            )
+            with self.performance_monitor.track("embedding"):
+                res = await self.ollama_client.embeddings(
+                    model=CONFIG["models"]["embedding_model"],
+                    prompt=text
+                )
+            self.performance_monitor.record_api_call(CONFIG["models"]["embedding_model"])
             return res['embedding']
         except Exception as e:
             self.logger.error(f"Failed to generate embedding: {e}")
@@ -367,23 +429,25 @@ class NewsGenerator:
         prompt = create_transition_phrase_prompt(previous_topic, current_topic, self.persona)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{CONFIG['ollama_api']['base_url']}/api/generate",
-                    json={
-                        'model': CONFIG["models"]["broadcast_model"],
-                        'prompt': prompt,
-                        'stream': False,
-                        'options': {'temperature': 0.6, 'max_tokens': 50}
-                    },
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    response.raise_for_status()
-                    data = await response.json()
-                    return data['response'].strip()
+            with self.performance_monitor.track("transition"):
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(
+                        f"{CONFIG['ollama_api']['base_url']}/api/generate",
+                        json={
+                            'model': CONFIG["models"]["broadcast_model"],
+                            'prompt': prompt,
+                            'stream': False,
+                            'options': {'temperature': 0.6, 'max_tokens': 50}
+                        },
+                        timeout=aiohttp.ClientTimeout(total=30)
+                    ) as response:
+                        response.raise_for_status()
+                        data = await response.json()
+                        self.performance_monitor.record_llm_tokens(CONFIG["models"]["broadcast_model"], data)
+                        return data['response'].strip()
         except Exception as e:
             self.logger.error(f"Failed to generate transition phrase: {e}")
-            return "Next, in the news."
+            return FALLBACK_TRANSITION
 
     def clean_script_for_tts(self, script: str) -> str:
         """Clean script for better TTS playback"""
@@ -398,7 +462,7 @@ class NewsGenerator:
         output_dir.mkdir(parents=True, exist_ok=True)
         filepath = output_dir / filename
 
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with self.performance_monitor.track("file_save"), open(filepath, 'w', encoding='utf-8') as f:
             f.write(f"# News Broadcast Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             f.write("## Full Broadcast Script\n")
             f.write(script)
@@ -416,65 +480,132 @@ class NewsGenerator:
 
         self.logger.info(f"Broadcast log saved to {filepath}")
 
+    async def run_once(self, feeds: Optional[List[str]] = None,
+                       progress: Optional[Callable[..., None]] = None) -> Optional[str]:
+        """
+        One fetch → process → broadcast cycle, traced end to end. `feeds` overrides the feeds file;
+        `progress(stage, **details)` is called as the cycle moves through its stages.
+        Returns the broadcast ID (see load_broadcast), or None when there was nothing to broadcast.
+        """
+        async with self.profiler.cycle():
+            return await self._run_cycle(feeds, progress or (lambda stage, **details: None))
+
+    async def _run_cycle(self, feeds: Optional[List[str]], progress: Callable[..., None]) -> Optional[str]:
+        with self.tracer.span("cycle", root=True, topic=self.topic, feed_override=feeds is not None) as cycle:
+            self.logger.info("Fetching new batch of articles...")
+            progress("fetching")
+            with self.tracer.span("fetch_feeds") as span:
+                articles = await self.feed_fetcher.fetch_feeds_batch(feeds)
+                span.set(articles=len(articles))
+            self.performance_monitor.metrics['articles_processed'] += len(articles)
+            cycle.set(articles=len(articles))
+
+            if not articles:
+                self.logger.warning("No new articles found.")
+                return None
+
+            progress("processing", articles=len(articles))
+            batch = await self.process_articles_smart(articles)
+            segments = self.create_broadcast_segments(batch)
+            cycle.set(segments=len(segments))
+
+            if not segments:
+                self.logger.info("No newsworthy segments created from the latest articles.")
+                return None
+
+            self.logger.info(f"Generated {len(segments)} new broadcast segments.")
+            broadcast_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+            cycle.set(broadcast_id=broadcast_id)
+            broadcast = {
+                'broadcast_id': broadcast_id,
+                'created_at': datetime.now().isoformat(),
+                'topic': self.topic,
+                'segments': []
+            }
+
+            tts_jobs = []
+            for i, segment in enumerate(segments):
+                self.logger.info(f"Processing segment {i+1}/{len(segments)}: {segment.topic}")
+                progress("segment", index=i + 1, segments=len(segments), topic=segment.topic)
+                with self.tracer.span("segment", index=i, topic=segment.topic, articles=len(segment.articles)):
+                    if i == 0 or self.previous_topic is None:
+                        intro_phrase = f"{INTRO_PHRASE} First up, {segment.topic}."
+                    else:
+                        transition_phrase = await self.generate_transition_phrase(self.previous_topic, segment.topic)
+                        intro_phrase = f"{transition_phrase} Now, {segment.topic}."
+
+                    segment_script = await self.generate_segment_script(segment)
+                    segment.content = segment_script # Stored, embedded and indexed for search with the segment
+                    full_script = self.clean_script_for_tts(f"{intro_phrase} {segment_script}")
+
+                    # Generate multi-persona commentary and embedding
+                    persona_comments = await self.generate_llm_commentary(segment)
+                    embedding = await self.generate_embedding(segment.topic + " " + segment.content)
+
+                    # Store the segment once in ChromaDB, with all persona comments (buffered; written in bulk)
+                    segment_id = self.segment_writer.add(
+                        title=segment.topic,
+                        summary=segment.content,
+                        comments=persona_comments,
+                        vector=embedding
+                    )
+                    self.logger.info(f"Queued segment '{segment.topic}' for ChromaDB.")
+
+                    # Synthesis overlaps with the next segment's LLM work
+                    tts_job = await self.generate_and_queue_audio(full_script, label=segment.topic)
+                    if tts_job is not None:
+                        tts_jobs.append(tts_job)
+
+                    self.save_results(full_script, [segment], f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md")
+
+                    broadcast['segments'].append({
+                        'segment_id': segment_id,
+                        'title': segment.topic,
+                        'summary': segment.content,
+                        'comment': persona_comments.get("objective", next(iter(persona_comments.values()), "")),
+                        'persona_comments': persona_comments,
+                        'importance': segment.importance,
+                        'articles': [{'title': a.title, 'url': a.url} for a in segment.articles],
+                        'timestamp': datetime.now().isoformat()
+                    })
+                    self.previous_topic = segment.topic
+
+            progress("finishing", segments=len(segments))
+            with self.tracer.span("store_flush"):
+                await self.segment_writer.flush()
+
+            with self.tracer.span("tts_drain", jobs=len(tts_jobs)):
+                for result in await asyncio.gather(*tts_jobs, return_exceptions=True):
+                    if isinstance(result, Exception):
+                        self.logger.error(f"Audio synthesis failed: {result}")
+
+            with self.tracer.span("broadcast_save"):
+                await run_in_thread(self.broadcast_store.save, broadcast)
+            return broadcast_id
+
+    def load_broadcast(self, broadcast_id: str) -> Optional[Dict]:
+        """A stored broadcast by ID ("latest" for the newest), or None if unknown or archived."""
+        return self.broadcast_store.get(broadcast_id)
+
     async def run_continuous(self, fetch_interval_minutes: int = 15):
         """
         Main continuous loop to fetch, process, and generate news audio.
         """
         self.logger.info("Starting continuous news generation stream.")
 
-        previous_topic = None
+        loop_lag = LoopLagMonitor()
+        loop_lag.start()
 
         while True:
             try:
-                self.logger.info("Fetching new batch of articles...")
-                articles = await self.feed_fetcher.fetch_feeds_batch()
-                self.performance_monitor.metrics['articles_processed'] += len(articles)
-
-                if not articles:
-                    self.logger.warning(f"No new articles found. Waiting for {fetch_interval_minutes} minutes.")
-                    await asyncio.sleep(fetch_interval_minutes * 60)
-                    continue
-
-                processed_articles = await self.process_articles_smart(articles)
-                segments = self.create_broadcast_segments(processed_articles)
-
-                if not segments:
-                    self.logger.info("No newsworthy segments created from the latest articles.")
-                else:
-                    self.logger.info(f"Generated {len(segments)} new broadcast segments.")
-
-                    for i, segment in enumerate(segments):
-                        self.logger.info(f"Processing segment {i+1}/{len(segments)}: {segment.topic}")
-
-                        if i == 0:
-                            intro_phrase = f"Welcome to your live news briefing. First up, {segment.topic}."
-                        else:
-                            transition_phrase = await self.generate_transition_phrase(previous_topic, segment.topic)
-                            intro_phrase = f"{transition_phrase} Now, {segment.topic}."
-
-                        segment_script = await self.generate_segment_script(segment)
-                        full_script = self.clean_script_for_tts(f"{intro_phrase} {segment_script}")
-
-                        # Generate multi-persona commentary and embedding
-                        persona_comments = await self.generate_llm_commentary(segment)
-                        embedding = await self.generate_embedding(segment.topic + " " + segment.content)
-
-                        # Store segment in ChromaDB for each persona
-                        for persona_id, comment in persona_comments.items():
-                            store_segment(
-                                persona_id=persona_id,
-                                title=segment.topic,
-                                summary=segment.content,
-                                comment=comment,
-                                vector=embedding
-                            )
-                        self.logger.info(f"Stored segment '{segment.topic}' in ChromaDB.")
-
-                        await self.generate_and_queue_audio(full_script)
-
-                        self.save_results(full_script, [segment], f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md")
-
-                        previous_topic = segment.topic
+                await self.run_once()
+                await run_in_thread(self.broadcast_store.maybe_apply_retention)
+
+                lag = loop_lag.stats()
+                self.performance_monitor.set_gauge("event_loop_lag_seconds", lag['p99'], quantile="0.99")
+                self.performance_monitor.set_gauge("event_loop_lag_seconds", lag['max'], quantile="1")
+                self.logger.info(f"Event loop lag this cycle: mean {lag['mean'] * 1000:.1f} ms, p99 {lag['p99'] * 1000:.1f} ms, max {lag['max'] * 1000:.1f} ms")
+                loop_lag.reset()
 
                 self.logger.info(f"Finished processing current batch. Waiting for {fetch_interval_minutes} minutes before next fetch.")
                 await asyncio.sleep(fetch_interval_minutes * 60)
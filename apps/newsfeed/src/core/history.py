@@ -0,0 +1,101 @@
+import gzip
+import json
+import math
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def _jsonable(obj: Any) -> Any:
+    """Make cluster results and metrics JSON-safe (NumPy scalars, non-str dict keys)."""
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if hasattr(obj, "item") and callable(obj.item):
+        return obj.item()
+    return obj
+
+class RingBuffer:
+    """
+    Fixed-capacity history. When full, the oldest entry is dropped, or spilled to a
+    gzipped JSON-lines file if `spill_path` is set (written in blocks of `spill_batch`).
+    """
+    def __init__(self, capacity: int, spill_path: Optional[str] = None, spill_batch: int = 100):
+        self.capacity = capacity
+        self.items = deque(maxlen=capacity)
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.spill_batch = spill_batch
+        self._pending: List[Any] = []
+
+    def append(self, item: Any):
+        if self.spill_path is not None and len(self.items) == self.capacity:
+            self._pending.append(self.items[0])
+            if len(self._pending) >= self.spill_batch:
+                self.flush()
+        self.items.append(item)
+
+    def flush(self):
+        """Write pending evicted entries to the spill file."""
+        if not self._pending or self.spill_path is None:
+            return
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            # Each flush appends one gzip member; gzip readers see a single stream
+            with gzip.open(self.spill_path, "at", encoding="utf-8") as f:
+                for entry in self._pending:
+                    f.write(json.dumps(_jsonable(entry), separators=(",", ":"), default=str) + "\n")
+        except Exception as e:
+            logger.error(f"Failed to spill history to {self.spill_path}: {e}")
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.items)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.items[index]
+
+    def to_list(self) -> List[Any]:
+        return list(self.items)
+
+class StreamingStats:
+    """Count, mean, variance, min, max and total of a stream in O(1) memory (Welford's algorithm)."""
+    __slots__ = ("count", "mean", "_m2", "min", "max", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.total += value
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def as_dict(self) -> dict:
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'stddev': self.stddev,
+            'min': self.min,
+            'max': self.max,
+            'total': self.total
+        }
@@ -0,0 +1,356 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.core.config import CONFIG
+from src.core.performance_monitor import get_monitor
+
+TERMINAL = ("succeeded", "failed")
+
+@dataclass
+class Job:
+    id: str
+    feeds: Optional[Tuple[str, ...]] # None: the feeds file
+    status: str = "queued" # queued -> running -> succeeded | failed
+    stage: Optional[str] = None
+    progress: Dict = field(default_factory=dict)
+    requests: int = 1 # Refresh requests merged into this run
+    broadcast_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    version: int = 0 # Bumped on every change; watchers compare it
+    owner: Optional[str] = None # Lease holder running the job
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "feeds": list(self.feeds) if self.feeds is not None else None,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "requests": self.requests,
+            "broadcast_id": self.broadcast_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+COLUMNS = "id, feeds, status, stage, progress, requests, broadcast_id, error, created_at, started_at, finished_at, version, owner"
+
+def feeds_key(feeds: Optional[Tuple[str, ...]]) -> str:
+    return json.dumps(list(feeds)) if feeds is not None else ""
+
+def job_from_row(row) -> Job:
+    (job_id, feeds, status, stage, progress, requests, broadcast_id, error,
+     created_at, started_at, finished_at, version, owner) = row
+    return Job(
+        id=job_id, feeds=tuple(json.loads(feeds)) if feeds else None, status=status, stage=stage,
+        progress=json.loads(progress) if progress else {}, requests=requests, broadcast_id=broadcast_id,
+        error=error, created_at=created_at, started_at=started_at, finished_at=finished_at,
+        version=version, owner=owner
+    )
+
+class JobManager:
+    """
+    Background refresh runs, kept in an SQLite table shared by the API workers. `submit` returns
+    at once with a job to poll or subscribe to; a request for the same feeds as a queued or
+    running job joins that job instead of starting another pipeline. Any worker can queue and
+    report jobs, but only the one set as executor (the scheduler's leader) runs them: it claims
+    queued jobs in `pump`, at most `max_concurrent` at a time. At most `max_queued` jobs wait, and
+    the last `history` finished ones are kept for polling.
+    """
+    def __init__(self, runner: Callable[..., Awaitable[Optional[str]]], db_path: Optional[str] = None,
+                 owner: Optional[str] = None, max_concurrent: Optional[int] = None,
+                 max_queued: Optional[int] = None, history: Optional[int] = None):
+        settings = CONFIG["jobs"]
+        self.runner = runner # async (feeds, progress) -> broadcast_id
+        self.db_path = db_path or CONFIG["scheduler"]["db_path"]
+        self.owner = owner or uuid.uuid4().hex
+        self.max_concurrent = max_concurrent or settings["max_concurrent"]
+        self.max_queued = max_queued or settings["max_queued"]
+        self.history = history or settings["history"]
+        self.poll_interval = settings["poll_interval"]
+        self.write_retries = settings["write_retries"]
+        self.executing = False
+        self._running: Dict[str, asyncio.Task] = {} # Jobs this process runs, until their final state is saved
+        self._savers: Dict[str, asyncio.Task] = {}
+        self._dirty = set() # Jobs with state not yet written
+        self._background = set()
+        self._pump_lock: Optional[asyncio.Lock] = None
+        self.monitor = get_monitor()
+        self.logger = logging.getLogger(__name__)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.setup_database()
+
+    def setup_database(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                feeds TEXT,
+                feeds_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT,
+                progress TEXT,
+                requests INTEGER NOT NULL DEFAULT 1,
+                broadcast_id TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                version INTEGER NOT NULL DEFAULT 0,
+                owner TEXT
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    def _retrying(self, operation, *args):
+        """Run a blocking database operation, retrying while the database is locked. Call off the loop."""
+        for attempt in range(self.write_retries + 1):
+            try:
+                return operation(*args)
+            except sqlite3.OperationalError as e:
+                if attempt == self.write_retries:
+                    raise
+                self.logger.warning(f"Job table busy ({e}); retrying.")
+                time.sleep(0.5 * 2 ** attempt)
+
+    async def _db(self, operation, *args):
+        return await asyncio.to_thread(self._retrying, operation, *args)
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def submit(self, feeds: Optional[List[str]] = None) -> Tuple[Job, bool]:
+        """Queue a refresh. Returns (job, merged): merged is True if an in-flight job was joined."""
+        key = tuple(sorted(set(feeds))) if feeds else None
+        job, merged = await self._db(self._insert_or_join, key)
+        if merged:
+            self.monitor.increment("refresh_requests_merged_total")
+        elif self.executing:
+            await self.pump()
+        return job, merged
+
+    def _insert_or_join(self, key: Optional[Tuple[str, ...]]) -> Tuple[Job, bool]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE") # Single-flight across workers
+            row = conn.execute(
+                f"SELECT {COLUMNS} FROM jobs WHERE feeds_key = ? AND status IN ('queued', 'running')",
+                (feeds_key(key),)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET requests = requests + 1, version = version + 1 WHERE id = ?", (row[0],))
+                conn.execute("COMMIT")
+                job = job_from_row(row)
+                job.requests += 1
+                return job, True
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                conn.execute("ROLLBACK")
+                raise OverflowError("too many refresh jobs queued")
+            job = Job(id=uuid.uuid4().hex, feeds=key)
+            conn.execute(
+                "INSERT INTO jobs (id, feeds, feeds_key, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job.id, json.dumps(list(key)) if key else None, feeds_key(key), job.created_at)
+            )
+            conn.execute("COMMIT")
+            return job, False
+        finally:
+            conn.close()
+
+    def set_executor(self, executing: bool):
+        """Start or stop running jobs in this process; used as the scheduler's leadership callback."""
+        self.executing = executing
+        if executing:
+            self._spawn(self.pump())
+        else:
+            for task in self._running.values():
+                task.cancel()
+
+    async def pump(self):
+        """Claim queued jobs, oldest first, while slots are free. Only the executor runs jobs."""
+        if not self.executing:
+            return
+        if self._pump_lock is None:
+            self._pump_lock = asyncio.Lock()
+        async with self._pump_lock:
+            free = self.max_concurrent - len(self._running)
+            try:
+                orphans, claimed = await self._db(self._claim, free, list(self._running))
+            except sqlite3.Error as e:
+                self.logger.warning(f"Could not claim refresh jobs: {e}")
+                return
+            if orphans:
+                self.logger.warning(f"Marked {orphans} refresh jobs that no worker is running as failed.")
+            for job in claimed:
+                self._running[job.id] = asyncio.create_task(self._run(job))
+
+    def _claim(self, free: int, running_ids: List[str]) -> Tuple[int, List[Job]]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Only the executor runs jobs, so a running job that is not running here was left behind
+            # by a previous leader, or by this process when its final state could not be saved
+            orphans = conn.execute(
+                f"UPDATE jobs SET status = 'failed', error = 'worker lost', finished_at = ?, version = version + 1 "
+                f"WHERE status = 'running' AND NOT (owner IS ? AND id IN ({', '.join('?' * len(running_ids))}))",
+                [time.time(), self.owner, *running_ids]
+            ).rowcount
+            rows = conn.execute(
+                f"SELECT {COLUMNS} FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT ?", (max(0, free),)
+            ).fetchall()
+            claimed = []
+            for row in rows:
+                job = job_from_row(row)
+                job.status, job.started_at, job.owner = "running", time.time(), self.owner
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, owner = ?, version = version + 1 WHERE id = ?",
+                    (job.started_at, job.owner, job.id)
+                )
+                claimed.append(job)
+            conn.execute("COMMIT")
+            return orphans, claimed
+        finally:
+            conn.close()
+
+    def _save(self, job_id: str, state: tuple):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, progress = ?, broadcast_id = ?, error = ?, "
+                "finished_at = ?, version = version + 1 WHERE id = ? AND owner = ?",
+                (*state, job_id, self.owner)
+            )
+        finally:
+            conn.close()
+
+    def _persist(self, job: Job) -> asyncio.Task:
+        """Queue a write of the job's state. Writes run off the loop, one at a time per job, and are retried."""
+        self._dirty.add(job.id)
+        saver = self._savers.get(job.id)
+        if saver is None:
+            saver = self._savers[job.id] = asyncio.create_task(self._flush(job))
+        return saver
+
+    async def _flush(self, job: Job):
+        delay = 1.0
+        try:
+            while job.id in self._dirty:
+                self._dirty.discard(job.id)
+                state = (job.status, job.stage, json.dumps(job.progress), job.broadcast_id, job.error, job.finished_at)
+                try:
+                    await asyncio.to_thread(self._save, job.id, state)
+                    delay = 1.0
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Could not save refresh job {job.id} ({e}); retrying in {delay:.0f}s.")
+                    self._dirty.add(job.id)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+        finally:
+            self._savers.pop(job.id, None)
+
+    async def _run(self, job: Job):
+        try:
+            def progress(stage: str, **details):
+                job.stage, job.progress = stage, details
+                self._persist(job) # Never blocks or raises into the pipeline
+
+            job.broadcast_id = await self.runner(list(job.feeds) if job.feeds else None, progress)
+            job.status = "succeeded"
+        except Exception as e:
+            self.logger.error(f"Refresh job {job.id} failed: {e}", exc_info=True)
+            job.status, job.error = "failed", str(e)
+        finally:
+            if job.status not in TERMINAL: # Cancelled at shutdown or on losing leadership
+                job.status, job.error = "failed", "cancelled"
+            job.finished_at = time.time()
+            self.monitor.increment("refresh_jobs_total", status=job.status)
+            try:
+                # Stays in _running until saved, so pump never mistakes it for an orphan
+                await asyncio.shield(self._persist(job))
+            finally:
+                self._running.pop(job.id, None)
+            if self.executing:
+                self._spawn(self._prune_and_pump())
+
+    async def _prune_and_pump(self):
+        try:
+            await self._db(self._prune)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not prune finished refresh jobs: {e}")
+        await self.pump()
+
+    def _prune(self):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND id NOT IN "
+                "(SELECT id FROM jobs WHERE status IN ('succeeded', 'failed') ORDER BY finished_at DESC LIMIT ?)",
+                (self.history,)
+            )
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        conn = self._connect()
+        try:
+            row = conn.execute(f"SELECT {COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return job_from_row(row) if row else None
+
+    def recent(self) -> List[Job]:
+        """Queued, running and kept finished jobs, oldest first."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(f"SELECT {COLUMNS} FROM jobs ORDER BY created_at").fetchall()
+        finally:
+            conn.close()
+        return [job_from_row(row) for row in rows]
+
+    async def watch(self, job: Job, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """Job snapshots as it changes, ending with the terminal one; None every `keepalive` idle seconds."""
+        seen, idle = -1, 0.0
+        while True:
+            if job.version != seen:
+                seen, idle = job.version, 0.0
+                yield job.to_dict()
+                if job.status in TERMINAL:
+                    return
+            elif idle >= keepalive:
+                idle = 0.0
+                yield None
+            await asyncio.sleep(self.poll_interval) # The job may be run by another worker
+            idle += self.poll_interval
+            try:
+                job = await asyncio.to_thread(self.get, job.id) or job
+            except sqlite3.Error: # Busy: report the last known state
+                pass
+
+    async def close(self, timeout: float = 10.0):
+        """Cancel jobs running here and wait (up to `timeout`) for their final state to be saved; call on shutdown."""
+        self.executing = False
+        for task in self._background:
+            task.cancel()
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
@@ -14,6 +14,7 @@ class Article:
     importance_score: float = 0.0
     relevancy_score: float = 0.0
     cluster_id: int = -1
+    content_hash: str = ""
 
 @dataclass
 class BroadcastSegment:
@@ -0,0 +1,131 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Pool for CPU work that releases the GIL (model inference) or needs in-process state."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=CONFIG["offload"]["thread_workers"], thread_name_prefix="nlp")
+    return _thread_pool
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Pool for pure-Python CPU work (VADER, regex scoring) that would otherwise hold the GIL."""
+    global _process_pool
+    if _process_pool is None:
+        # spawn, not fork: the parent may already hold torch / onnxruntime threads
+        _process_pool = ProcessPoolExecutor(
+            max_workers=CONFIG["offload"]["process_workers"],
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+async def run_in_thread(func: Callable, *args, **kwargs):
+    """Run func in the thread pool with the caller's context, so trace spans opened there nest correctly."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(context.run, func, *args, **kwargs))
+
+async def run_in_process(func: Callable, *args, **kwargs):
+    """Run a module-level function in the process pool. Arguments are pickled; use SharedArray for large arrays."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), functools.partial(func, *args, **kwargs))
+
+def shutdown_pools():
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+SharedArrayHandle = Tuple[str, tuple, str] # (shared memory name, shape, dtype)
+
+class SharedArray:
+    """
+    A NumPy array copied once into shared memory. Pass `handle` to process-pool workers
+    and open it there with attach_array(); the owner unlinks the block on exit.
+    """
+    def __init__(self, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)
+        view[:] = array
+        del view
+        self.handle: SharedArrayHandle = (self.shm.name, array.shape, array.dtype.str)
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc):
+        self.shm.close()
+        self.shm.unlink()
+
+def attach_array(handle: SharedArrayHandle) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Open a SharedArray in a worker. Delete the array before calling close() on the block."""
+    name, shape, dtype = handle
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # The owner unlinks the block; keep the worker's resource tracker from doing it too
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+class LoopLagMonitor:
+    """Measures event-loop lag: how late a periodic timer fires compared to when it was due."""
+    def __init__(self, interval: float = 0.1, window: int = 3000):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> dict:
+        if not self.samples:
+            return {'samples': 0, 'mean': 0.0, 'p99': 0.0, 'max': 0.0}
+        lags = np.fromiter(self.samples, dtype=float)
+        return {
+            'samples': len(lags),
+            'mean': float(lags.mean()),
+            'p99': float(np.percentile(lags, 99)),
+            'max': self.max_lag
+        }
+
+    def reset(self):
+        self.samples.clear()
+        self.max_lag = 0.0
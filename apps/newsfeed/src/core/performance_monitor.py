@@ -1,29 +1,187 @@
-import numpy as np
-from typing import Dict
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from src.core.tracing import current_span, get_tracer
+
+# Upper bounds (seconds) of the latency buckets; covers sub-ms DB lookups up to multi-minute LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, str]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus semantics): O(1) memory however many samples."""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.bounds[-1]
 
 class PerformanceMonitor:
-    """Track system performance metrics"""
-    def __init__(self):
+    """
+    Track system performance metrics: labelled latency histograms per operation, counters
+    (errors, LLM tokens, cache hits) and gauges, exportable in Prometheus text format.
+    """
+    def __init__(self, namespace: str = "newsfeed"):
+        self.namespace = namespace
         self.metrics = {
             'articles_processed': 0,
-            'processing_times': [],
             'api_calls': 0,
             'errors': 0
         }
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, LabelSet], float] = {}
+        self.gauges: Dict[Tuple[str, LabelSet], float] = {}
+        self._lock = threading.Lock() # Stages record from the event loop and from worker threads
 
     def track_operation(self, operation: str, duration: float, success: bool = True):
-        self.metrics['processing_times'].append(duration)
+        with self._lock:
+            histogram = self.histograms.get(operation)
+            if histogram is None:
+                histogram = self.histograms[operation] = Histogram()
+            histogram.observe(duration)
+            if not success:
+                self.metrics['errors'] += 1
         if not success:
-            self.metrics['errors'] += 1
+            self.increment("operation_errors_total", operation=operation)
 
-    def get_stats(self) -> Dict:
-        if not self.metrics['processing_times']:
-            return self.metrics
+    @contextmanager
+    def track(self, operation: str, **attributes):
+        """
+        Time a block (sync or async body) and record it under `operation`; exceptions count as errors.
+        Inside a trace the block is also recorded as a span, which is yielded for extra attributes.
+        """
+        start = time.perf_counter()
+        success = True
+        with get_tracer().span(operation, **attributes) as span:
+            try:
+                yield span
+            except BaseException:
+                success = False
+                raise
+            finally:
+                self.track_operation(operation, time.perf_counter() - start, success)
 
-        times = self.metrics['processing_times']
+    def increment(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def record_api_call(self, model: str):
+        """Count one completed LLM server request (generate, chat or embeddings)."""
+        with self._lock:
+            self.metrics['api_calls'] += 1
+        self.increment("llm_requests_total", model=model)
+
+    def record_llm_tokens(self, model: str, response: Dict):
+        """Count the request and its prompt / completion tokens from an Ollama generate or chat response."""
+        self.record_api_call(model)
+        span = current_span()
+        span.set(model=model)
+        for field, kind in (('prompt_eval_count', 'prompt'), ('eval_count', 'completion')):
+            if response.get(field):
+                self.increment("llm_tokens_total", response[field], model=model, kind=kind)
+                span.set(**{f"{kind}_tokens": response[field]})
+
+    def record_cache(self, cache: str, hits: int = 0, misses: int = 0):
+        current_span().set(**{f"{cache}_cache_hits": hits, f"{cache}_cache_misses": misses})
+        if hits:
+            self.increment("cache_requests_total", hits, cache=cache, result="hit")
+        if misses:
+            self.increment("cache_requests_total", misses, cache=cache, result="miss")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            operations = {
+                operation: {
+                    'count': h.count,
+                    'mean': h.sum / h.count if h.count else 0.0,
+                    'p50': h.quantile(0.5),
+                    'p95': h.quantile(0.95),
+                    'p99': h.quantile(0.99),
+                    'total_time': h.sum
+                }
+                for operation, h in self.histograms.items()
+            }
+        total_count = sum(op['count'] for op in operations.values())
         return {
             **self.metrics,
-            'avg_processing_time': np.mean(times),
-            'total_time': sum(times),
-            'success_rate': 1 - (self.metrics['errors'] / len(times)) if times else 1
+            'operations': operations,
+            'success_rate': 1 - (self.metrics['errors'] / total_count) if total_count else 1
         }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            for name, value in self.metrics.items():
+                lines.append(f"# TYPE {ns}_{name}_total counter")
+                lines.append(f"{ns}_{name}_total {value}")
+
+            lines.append(f"# TYPE {ns}_operation_duration_seconds histogram")
+            for operation, h in sorted(self.histograms.items()):
+                labels = (("operation", operation),)
+                cumulative = 0
+                for bound, bucket_count in zip(list(h.bounds) + ["+Inf"], h.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{ns}_operation_duration_seconds_bucket{_format_labels(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{ns}_operation_duration_seconds_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{ns}_operation_duration_seconds_count{_format_labels(labels)} {h.count}")
+
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(series.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {ns}_{name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{ns}_{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+_monitor: Optional[PerformanceMonitor] = None
+
+def get_monitor() -> PerformanceMonitor:
+    """Process-wide monitor shared by the generator, fetcher, clusterer and store."""
+    global _monitor
+    if _monitor is None:
+        _monitor = PerformanceMonitor()
+    return _monitor
@@ -0,0 +1,207 @@
+"""
+On-demand profiling: a sampling CPU profiler and tracemalloc allocation snapshots.
+
+Nothing runs until a profile is requested. Output is in the collapsed ("folded") stack format,
+one `frame;frame;frame count` line per stack, which flamegraph.pl, speedscope and Perfetto read.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+class ProfileResult:
+    def __init__(self, label: str, started_at: datetime, duration: float, samples: Counter, allocations: Optional[Counter],
+                 sampled_seconds: Optional[float] = None):
+        self.label = label
+        self.started_at = started_at
+        self.duration = duration
+        self.sampled_seconds = duration if sampled_seconds is None else sampled_seconds # Less than duration if truncated
+        self.samples = samples # Collapsed stack -> sample count
+        self.allocations = allocations # Collapsed allocation stack -> bytes still allocated
+
+    @staticmethod
+    def _folded(stacks: Counter) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    @property
+    def truncated(self) -> bool:
+        return self.sampled_seconds < self.duration
+
+    def cpu_folded(self) -> str:
+        return self._folded(self.samples)
+
+    def alloc_folded(self) -> str:
+        return self._folded(self.allocations) if self.allocations else ""
+
+    def summary(self) -> Dict:
+        return {
+            'label': self.label,
+            'started_at': self.started_at.isoformat(),
+            'duration': self.duration,
+            'sampled_seconds': self.sampled_seconds,
+            'truncated': self.truncated,
+            'samples': sum(self.samples.values()),
+            'allocated_bytes': sum(self.allocations.values()) if self.allocations else None
+        }
+
+    def save(self, directory: Path) -> Dict[str, str]:
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.started_at.strftime('%Y%m%d_%H%M%S')}_{self.label}{'_truncated' if self.truncated else ''}"
+        paths = {'cpu': directory / f"{stem}.cpu.folded"}
+        paths['cpu'].write_text(self.cpu_folded())
+        if self.allocations:
+            paths['alloc'] = directory / f"{stem}.alloc.folded"
+            paths['alloc'].write_text(self.alloc_folded())
+        return {kind: str(path) for kind, path in paths.items()}
+
+class Profiler:
+    """
+    One profile at a time. The sampler is a daemon thread that reads every other thread's
+    stack via sys._current_frames() each `interval` seconds; it exists only while profiling.
+    """
+    def __init__(self, interval: float, directory: str, max_seconds: float, max_cycle_seconds: Optional[float] = None,
+                 alloc_frames: int = 25):
+        self.interval = interval
+        self.directory = Path(directory)
+        self.max_seconds = max_seconds
+        self.max_cycle_seconds = max_cycle_seconds or max_seconds
+        self.alloc_frames = alloc_frames
+        self.latest: Optional[ProfileResult] = None
+        self.next_cycle: Optional[Dict] = None # Options for profiling the next pipeline cycle
+        self._lock = threading.Lock()
+        self._active = False
+        self._stop = threading.Event()
+        self._samples: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def start(self, allocations: bool = False, max_seconds: Optional[float] = None):
+        """Start sampling; sampling stops by itself after `max_seconds` (default max_seconds)."""
+        with self._lock:
+            if self._active:
+                raise RuntimeError("A profile is already running")
+            self._active = True
+        self._allocations = allocations
+        self._started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._samples = Counter()
+        self._deadline = self._start + (max_seconds or self.max_seconds)
+        self._sampled_until: Optional[float] = None
+        self._stop.clear()
+        self._owns_tracemalloc = allocations and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start(self.alloc_frames)
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self, label: str = "profile") -> ProfileResult:
+        """Stop sampling and build the result. Summarising a large allocation snapshot is slow; call off the event loop."""
+        if not self._active:
+            raise RuntimeError("No profile is running")
+        self._stop.set()
+        self._thread.join()
+        duration = time.perf_counter() - self._start
+        sampled = self._sampled_until - self._start if self._sampled_until is not None else duration
+        allocations = None
+        if self._allocations:
+            allocations = self._allocation_stacks(tracemalloc.take_snapshot())
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+        result = ProfileResult(label, self._started_at, duration, self._samples, allocations, sampled)
+        if result.truncated:
+            logger.warning(f"Profile '{label}' covers only the first {sampled:.0f}s of {duration:.0f}s.")
+        self.latest = result
+        with self._lock:
+            self._active = False
+        try:
+            paths = result.save(self.directory)
+            logger.info(f"Profile '{label}' saved: {paths}")
+        except Exception as e:
+            logger.error(f"Failed to save profile '{label}': {e}")
+        return result
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if time.perf_counter() >= self._deadline:
+                self._sampled_until = self._deadline
+                return
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._samples[";".join(reversed(stack))] += 1
+
+    def _allocation_stacks(self, snapshot) -> Counter:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        stacks = Counter()
+        for stat in snapshot.statistics("traceback"):
+            frames = [f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in stat.traceback] # oldest first
+            stacks[";".join(frames)] += stat.size
+        return stacks
+
+    async def profile_for(self, seconds: float, allocations: bool = False, label: str = "timed") -> ProfileResult:
+        """Profile the whole process for `seconds` (capped at max_seconds) without blocking the loop."""
+        self.start(allocations)
+        try:
+            await asyncio.sleep(min(seconds, self.max_seconds))
+        finally:
+            result = await asyncio.to_thread(self.stop, label)
+        return result
+
+    def request_next_cycle(self, allocations: bool = False):
+        """Arm the profiler; the next pipeline cycle (NewsGenerator.run_once) is profiled."""
+        self.next_cycle = {'allocations': allocations}
+
+    @asynccontextmanager
+    async def cycle(self):
+        """Wraps a pipeline cycle: profiles it if armed, otherwise costs one attribute check."""
+        options = self.next_cycle
+        if options is None or self._active: # A running timed profile keeps the request armed
+            yield
+            return
+        self.next_cycle = None
+        self.start(options['allocations'], self.max_cycle_seconds)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(self.stop, "cycle")
+
+_profiler: Optional[Profiler] = None
+
+def get_profiler() -> Profiler:
+    global _profiler
+    if _profiler is None:
+        settings = CONFIG["profiling"]
+        _profiler = Profiler(settings["interval"], settings["dir"], settings["max_seconds"], settings["max_cycle_seconds"])
+    return _profiler
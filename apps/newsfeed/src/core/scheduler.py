@@ -0,0 +1,187 @@
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+class LeaderLease:
+    """
+    Named lease in an SQLite file shared by the API workers: at most one process holds it at a
+    time. The holder renews it every heartbeat; if it stops (crash, hang, shutdown), another
+    process takes it over once `ttl` seconds have passed since the last renewal.
+    """
+    def __init__(self, name: str, db_path: Optional[str] = None, ttl: Optional[float] = None):
+        settings = CONFIG["scheduler"]
+        self.name = name
+        self.db_path = db_path or settings["db_path"]
+        self.ttl = ttl or settings["lease_ttl"]
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def try_acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if we hold it. Returns whether we hold it."""
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE") # Serialises contenders across processes
+            row = conn.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+            now = time.time()
+            held = row is None or row[0] == self.holder or row[1] < now
+            if held:
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                    (self.name, self.holder, now + self.ttl)
+                )
+            conn.execute("COMMIT")
+            return held
+        finally:
+            conn.close()
+
+    def release(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def current_holder(self) -> Optional[str]:
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            row = conn.execute(
+                "SELECT holder FROM leases WHERE name = ? AND expires_at >= ?", (self.name, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+class ScheduledJob:
+    def __init__(self, name: str, interval: float, func: Callable, leader_only: bool, run_at_start: bool):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.leader_only = leader_only
+        self.run_at_start = run_at_start
+        self.runs = 0
+        self.last_run: Optional[float] = None
+
+class Scheduler:
+    """
+    Periodic jobs as tasks on the server's own event loop. With a lease, `leader_only` jobs run
+    only in the process holding it, so several API workers can serve reads while exactly one of
+    them generates. Leadership is re-checked every `heartbeat` seconds and is treated as lost if
+    the lease could not be renewed within its ttl.
+    """
+    def __init__(self, lease: Optional[LeaderLease] = None, heartbeat: Optional[float] = None):
+        self.lease = lease
+        self.heartbeat = heartbeat or CONFIG["scheduler"]["heartbeat"]
+        self.jobs: List[ScheduledJob] = []
+        self._leadership_callbacks: List[Callable[[bool], None]] = []
+        self._held_until = 0.0 # Monotonic time our last renewal is good until
+        self._was_leader = False
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lease is None or time.monotonic() < self._held_until
+
+    def every(self, seconds: float, func: Callable, name: Optional[str] = None,
+              leader_only: bool = True, run_at_start: bool = False) -> ScheduledJob:
+        """Run `func` (sync or async) every `seconds`. Missed runs are skipped, not queued up."""
+        job = ScheduledJob(name or func.__name__, seconds, func, leader_only, run_at_start)
+        self.jobs.append(job)
+        return job
+
+    def on_leadership(self, callback: Callable[[bool], None]):
+        """Call `callback(is_leader)` whenever this process gains or loses the lease."""
+        self._leadership_callbacks.append(callback)
+
+    async def start(self):
+        if self.lease is not None:
+            await self._renew()
+            self._tasks.append(asyncio.create_task(self._heartbeat()))
+        else:
+            self._set_leader(True)
+        self._tasks += [asyncio.create_task(self._loop(job)) for job in self.jobs]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.lease is not None and self.is_leader:
+            await asyncio.to_thread(self.lease.release)
+            self._held_until = 0.0
+            self._set_leader(False)
+
+    async def _renew(self):
+        started = time.monotonic()
+        remaining = self._held_until - started
+        try:
+            renewal = asyncio.to_thread(self.lease.try_acquire)
+            # A renewal stuck on a locked database must not outlive the lease it is renewing
+            held = await (asyncio.wait_for(renewal, remaining) if self._was_leader and remaining > 0 else renewal)
+        except (sqlite3.Error, asyncio.TimeoutError) as e:
+            # The last successful renewal still holds until it expires; only then is leadership lost
+            logger.warning(f"Could not renew the '{self.lease.name}' lease: {str(e) or 'timed out'}")
+            self._set_leader(self.is_leader)
+            return
+        self._held_until = started + self.lease.ttl if held else 0.0
+        self._set_leader(held)
+
+    async def _heartbeat(self):
+        while True:
+            delay = self.heartbeat
+            if self._was_leader: # Wake no later than the lease expiry, to step down on time
+                delay = min(delay, max(0.0, self._held_until - time.monotonic()))
+            await asyncio.sleep(delay)
+            await self._renew()
+
+    def _set_leader(self, leader: bool):
+        if leader == self._was_leader:
+            return
+        self._was_leader = leader
+        holder = self.lease.holder if self.lease else "this process"
+        logger.info(f"{holder} {'is now' if leader else 'is no longer'} the leader.")
+        for callback in self._leadership_callbacks:
+            try:
+                callback(leader)
+            except Exception as e:
+                logger.error(f"Leadership callback failed: {e}")
+
+    async def _loop(self, job: ScheduledJob):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time() + (0 if job.run_at_start else job.interval)
+        while True:
+            await asyncio.sleep(max(0.0, next_run - loop.time()))
+            next_run += job.interval
+            while next_run <= loop.time(): # A run overran its interval: skip, don't pile up
+                next_run += job.interval
+            if job.leader_only and not self.is_leader:
+                continue
+            try:
+                result = job.func()
+                if inspect.isawaitable(result):
+                    await result
+                job.runs += 1
+                job.last_run = time.time()
+            except Exception as e:
+                logger.error(f"Scheduled job '{job.name}' failed: {e}", exc_info=True)
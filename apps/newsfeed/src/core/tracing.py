@@ -0,0 +1,176 @@
+"""
+Lightweight always-on tracing.
+
+A trace starts at a root span (`tracer.span("cycle", root=True)`); every span opened inside it,
+including in tasks and thread-pool work started from it, is recorded as a child. When the root
+span ends the trace is written to `CONFIG["tracing"]["dir"]` in the Chrome Trace Event format,
+which opens in Perfetto (ui.perfetto.dev), chrome://tracing and speedscope.
+
+Spans opened outside a trace are no-ops, so instrumented code costs almost nothing off the hot path.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src.core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# perf_counter_ns is monotonic; this offset turns it into wall-clock microseconds for the viewers
+_WALL_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "end", "attributes", "track")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[int], attributes: Dict):
+        self.trace = trace
+        self.name = name
+        self.span_id = trace.next_span_id()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.track = trace.current_track()
+        self.start = time.perf_counter_ns()
+        self.end = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+class _NoopSpan:
+    """Returned outside a trace so callers can always call span.set()."""
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+class Trace:
+    def __init__(self, name: str, max_spans: int):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = datetime.now()
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.tracks: Dict[int, str] = {}
+        self._span_ids = 0
+        self._lock = threading.Lock()
+
+    def next_span_id(self) -> int:
+        with self._lock:
+            self._span_ids += 1
+            return self._span_ids
+
+    def current_track(self) -> int:
+        """One viewer track per asyncio task / thread, so concurrent spans don't overlap on one row."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = id(task) if task is not None else threading.get_ident()
+        with self._lock:
+            if key not in self.tracks:
+                label = task.get_name() if task is not None else threading.current_thread().name
+                self.tracks[key] = f"{len(self.tracks)}: {label}"
+        return key
+
+    def add(self, span: Span):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    def to_chrome_trace(self) -> Dict:
+        pid = os.getpid()
+        track_ids = {key: i for i, key in enumerate(self.tracks)}
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"newsfeed {self.name}"}}]
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": track_ids[key], "args": {"name": label}}
+            for key, label in self.tracks.items()
+        ]
+        for span in self.spans:
+            events.append({
+                "name": span.name,
+                "cat": "newsfeed",
+                "ph": "X",
+                "ts": (span.start + _WALL_OFFSET_NS) / 1000,
+                "dur": (span.end - span.start) / 1000,
+                "pid": pid,
+                "tid": track_ids[span.track],
+                "args": {**span.attributes, "span_id": span.span_id, "parent_id": span.parent_id}
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "name": self.name, "dropped_spans": self.dropped}
+        }
+
+class Tracer:
+    def __init__(self, enabled: bool, directory: str, max_spans: int = 20000, keep_files: int = 200):
+        self.enabled = enabled
+        self.directory = Path(directory)
+        self.max_spans = max_spans
+        self.keep_files = keep_files
+
+    @contextmanager
+    def span(self, name: str, root: bool = False, **attributes) -> Iterator:
+        """Record a span. With root=True a new trace starts here (unless one is already active)."""
+        parent = _current_span.get()
+        if not self.enabled or (parent is None and not root):
+            yield NOOP_SPAN
+            return
+
+        trace = parent.trace if parent is not None else Trace(name, self.max_spans)
+        span = Span(trace, name, parent.span_id if parent is not None else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = repr(e)
+            raise
+        finally:
+            span.end = time.perf_counter_ns()
+            _current_span.reset(token)
+            trace.add(span)
+            if parent is None:
+                self.export(trace)
+
+    def export(self, trace: Trace) -> Optional[Path]:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"trace_{trace.started_at.strftime('%Y%m%d_%H%M%S')}_{trace.name}_{trace.trace_id[:8]}.json"
+            path.write_text(json.dumps(trace.to_chrome_trace(), separators=(",", ":"), default=str))
+            self.prune()
+            return path
+        except Exception as e:
+            logger.error(f"Failed to export trace {trace.trace_id}: {e}")
+            return None
+
+    def prune(self):
+        """Keep only the newest `keep_files` trace files."""
+        files = sorted(self.directory.glob("trace_*.json"))
+        for old in files[:-self.keep_files]:
+            old.unlink(missing_ok=True)
+
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        settings = CONFIG["tracing"]
+        _tracer = Tracer(settings["enabled"], settings["dir"], settings["max_spans"], settings["keep_files"])
+    return _tracer
@@ -0,0 +1,259 @@
+import gzip
+import importlib.util
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src.core.config import CONFIG
+
+orjson_available = importlib.util.find_spec("orjson") is not None
+if orjson_available:
+    import orjson
+
+def dumps(obj) -> bytes:
+    """Compact JSON bytes (orjson when installed)."""
+    if orjson_available:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def loads(data: bytes):
+    return orjson.loads(data) if orjson_available else json.loads(data)
+
+def epoch(timestamp: Optional[str]) -> float:
+    """Epoch seconds of a broadcast's ISO `created_at` (now if missing or unparseable)."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+class BroadcastStore:
+    """
+    Broadcast archive in SQLite: one row per broadcast, keyed by ID and indexed by creation time,
+    with the body stored as zlib-compressed compact JSON. The newest broadcast is tracked in a
+    `latest` pointer, so neither lookups by ID nor "latest" depend on the archive size. Broadcasts
+    older than `retention_days` are moved out to monthly .jsonl.gz files under `archive_dir`.
+    """
+    def __init__(self, db_path: Optional[str] = None, retention_days: Optional[float] = None,
+                 archive_dir: Optional[str] = None):
+        settings = CONFIG["broadcasts"]
+        self.db_path = db_path or settings["db_path"]
+        self.retention_days = retention_days if retention_days is not None else settings["retention_days"]
+        self.archive_dir = Path(archive_dir or settings["archive_dir"])
+        self.retention_interval = settings["retention_interval"]
+        self.logger = logging.getLogger(__name__)
+        self._retention_lock = threading.Lock()
+        self._last_retention: Optional[float] = None
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.setup_database()
+
+    def setup_database(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS broadcasts (
+                broadcast_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                topic TEXT,
+                segments INTEGER NOT NULL,
+                body BLOB NOT NULL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_broadcasts_created ON broadcasts (created_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS pointers (name TEXT PRIMARY KEY, broadcast_id TEXT NOT NULL)")
+        conn.commit()
+        conn.close()
+
+    def save(self, broadcast: Dict):
+        """Insert or replace a broadcast and, if it is the newest, point `latest` at it."""
+        created_at = epoch(broadcast.get("created_at"))
+        body = zlib.compress(dumps(broadcast), CONFIG["broadcasts"]["compression_level"])
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO broadcasts (broadcast_id, created_at, topic, segments, body) VALUES (?, ?, ?, ?, ?)",
+                    (broadcast["broadcast_id"], created_at, broadcast.get("topic"), len(broadcast.get("segments", [])), body)
+                )
+                conn.execute('''
+                    INSERT INTO pointers (name, broadcast_id) VALUES ('latest', ?)
+                    ON CONFLICT (name) DO UPDATE SET broadcast_id = excluded.broadcast_id
+                    WHERE ? >= COALESCE((SELECT created_at FROM broadcasts WHERE broadcast_id = pointers.broadcast_id), 0)
+                ''', (broadcast["broadcast_id"], created_at))
+        finally:
+            conn.close()
+
+    def get(self, broadcast_id: str) -> Optional[Dict]:
+        """A broadcast by ID ("latest" for the newest), or None."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if broadcast_id == "latest":
+                row = conn.execute(
+                    "SELECT body FROM broadcasts WHERE broadcast_id = (SELECT broadcast_id FROM pointers WHERE name = 'latest')"
+                ).fetchone()
+            else:
+                row = conn.execute("SELECT body FROM broadcasts WHERE broadcast_id = ?", (broadcast_id,)).fetchone()
+        finally:
+            conn.close()
+        return loads(zlib.decompress(row[0])) if row else None
+
+    def list_range(self, start: Optional[float] = None, end: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Summaries (no bodies) of broadcasts created in [start, end), newest first."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT broadcast_id, created_at, topic, segments FROM broadcasts "
+                "WHERE created_at >= ? AND created_at < ? ORDER BY created_at DESC LIMIT ?",
+                (start or 0, end or float("inf"), limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"broadcast_id": broadcast_id, "created_at": datetime.fromtimestamp(created_at).isoformat(),
+             "topic": topic, "segments": segments}
+            for broadcast_id, created_at, topic, segments in rows
+        ]
+
+    def iter_range(self, start: Optional[float] = None, end: Optional[float] = None, batch: int = 50) -> Iterator[Dict]:
+        """Full broadcasts created in [start, end), oldest first, read `batch` rows at a time."""
+        position = (start or 0, "") # Keyset over (created_at, broadcast_id)
+        while True:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                rows = conn.execute(
+                    "SELECT broadcast_id, created_at, body FROM broadcasts "
+                    "WHERE (created_at, broadcast_id) > (?, ?) AND created_at < ? "
+                    "ORDER BY created_at, broadcast_id LIMIT ?",
+                    (*position, end or float("inf"), batch)
+                ).fetchall()
+            finally:
+                conn.close()
+            for _, _, body in rows:
+                yield loads(zlib.decompress(body))
+            if len(rows) < batch:
+                return
+            position = (rows[-1][1], rows[-1][0])
+
+    def maybe_apply_retention(self):
+        if self.retention_days and (self._last_retention is None or time.monotonic() - self._last_retention >= self.retention_interval):
+            self.apply_retention()
+
+    def apply_retention(self, batch: int = 50) -> int:
+        """
+        Move broadcasts older than `retention_days` to the .jsonl.gz archive, `batch` at a time: each
+        batch is appended to its monthly files and then deleted. Broadcasts a file already holds (left
+        by an interrupted pass) are not appended again, and the `latest` broadcast is never moved.
+        Returns how many moved.
+        """
+        if not self.retention_days:
+            return 0
+        with self._retention_lock:
+            self._last_retention = time.monotonic()
+            cutoff = time.time() - self.retention_days * 86400
+            conn = sqlite3.connect(self.db_path)
+            try:
+                row = conn.execute("SELECT broadcast_id FROM pointers WHERE name = 'latest'").fetchone()
+            finally:
+                conn.close()
+            latest = row[0] if row else None
+            archived_ids: Dict[Path, set] = {}
+            moved, pending = 0, []
+            for broadcast in self.iter_range(end=cutoff, batch=batch):
+                if broadcast["broadcast_id"] == latest:
+                    continue
+                pending.append(broadcast)
+                if len(pending) == batch:
+                    moved += self._archive(pending, archived_ids)
+                    pending = []
+            if pending:
+                moved += self._archive(pending, archived_ids)
+            if moved:
+                self.logger.info(f"Archived {moved} broadcasts older than {self.retention_days} days.")
+            return moved
+
+    def _archive(self, broadcasts: List[Dict], archived_ids: Dict[Path, set]) -> int:
+        """Append broadcasts to their monthly files (skipping ones already there), then delete them."""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        by_month: Dict[Path, List[Dict]] = {}
+        for broadcast in broadcasts:
+            month = datetime.fromtimestamp(epoch(broadcast.get("created_at"))).strftime("%Y-%m")
+            by_month.setdefault(self.archive_dir / f"broadcasts-{month}.jsonl.gz", []).append(broadcast)
+        for path, group in by_month.items():
+            if path not in archived_ids:
+                archived_ids[path] = self._archived_ids(path)
+            new = [broadcast for broadcast in group if broadcast["broadcast_id"] not in archived_ids[path]]
+            if not new:
+                continue
+            with open(path, "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                    f.write(b"".join(dumps(broadcast) + b"\n" for broadcast in new))
+                raw.flush()
+                os.fsync(raw.fileno()) # On disk before the rows are deleted
+            archived_ids[path].update(broadcast["broadcast_id"] for broadcast in new)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany(
+                    "DELETE FROM broadcasts WHERE broadcast_id = ? AND broadcast_id NOT IN (SELECT broadcast_id FROM pointers)",
+                    [(broadcast["broadcast_id"],) for broadcast in broadcasts]
+                )
+        finally:
+            conn.close()
+        return len(broadcasts)
+
+    def _archived_ids(self, path: Path) -> set:
+        """IDs already in a monthly archive file; a damaged tail (a crash mid-append) ends the scan."""
+        ids = set()
+        if not path.exists():
+            return ids
+        try:
+            with gzip.open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        ids.add(loads(line)["broadcast_id"])
+        except (EOFError, OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Stopped reading {path} at a damaged entry: {e}")
+        return ids
+
+    def import_json_files(self, directory: str) -> int:
+        """Load broadcasts saved as JSON files by older versions."""
+        imported = 0
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                broadcast = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Skipping {path}: {e}")
+                continue
+            if broadcast and broadcast.get("broadcast_id"):
+                self.save(broadcast)
+                imported += 1
+        return imported
+
+_store: Optional[BroadcastStore] = None
+
+def get_broadcast_store() -> BroadcastStore:
+    global _store
+    if _store is None:
+        _store = BroadcastStore()
+    return _store
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Broadcast archive maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import-json", help="Import a directory of broadcast JSON files.")
+    import_parser.add_argument("directory", nargs="?", default="data/broadcasts")
+    commands.add_parser("retention", help="Archive broadcasts past the retention period now.")
+    args = parser.parse_args()
+
+    store = get_broadcast_store()
+    if args.command == "import-json":
+        print(f"Imported {store.import_json_files(args.directory)} broadcasts.")
+    elif args.command == "retention":
+        print(f"Archived {store.apply_retention()} broadcasts.")
@@ -1,5 +1,6 @@
 import sqlite3
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 import logging
 
 class NewsDatabase:
@@ -17,6 +18,43 @@ class NewsDatabase:
                 processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sentiment (
+                cache_key TEXT PRIMARY KEY,
+                score REAL NOT NULL,
+                scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS persona_comments (
+                segment_id TEXT NOT NULL,
+                persona_id TEXT NOT NULL,
+                comment TEXT NOT NULL,
+                PRIMARY KEY (segment_id, persona_id)
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_persona_comments_persona ON persona_comments (persona_id)")
+        # Full-text index over stored segments; segments maps each segment ID to its FTS rowid and
+        # keeps a float16 copy of its embedding, so filtered searches are scored without the vector store
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS segments (
+                rowid INTEGER PRIMARY KEY,
+                segment_id TEXT UNIQUE NOT NULL,
+                created_at REAL NOT NULL DEFAULT 0,
+                vector BLOB
+            )
+        ''')
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(segments)")]
+        if "created_at" not in columns:
+            conn.execute("ALTER TABLE segments ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        if "vector" not in columns:
+            conn.execute("ALTER TABLE segments ADD COLUMN vector BLOB")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_segments_created ON segments (created_at, rowid)")
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                title, summary, comments, tokenize = 'porter unicode61'
+            )
+        ''')
         conn.commit()
         conn.close()
 
@@ -42,3 +80,193 @@ class NewsDatabase:
             self.logger.error(f"Cache error: {e}")
         finally:
             conn.close()
+
+    def get_sentiments(self, cache_keys: List[str]) -> Dict[str, float]:
+        """Look up cached sentiment scores; missing keys are absent from the result."""
+        found = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for i in range(0, len(cache_keys), 500):
+                chunk = cache_keys[i:i+500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT cache_key, score FROM sentiment WHERE cache_key IN ({placeholders})",
+                    chunk
+                )
+                found.update(cursor.fetchall())
+        finally:
+            conn.close()
+        return found
+
+    def cache_sentiments(self, scores: Dict[str, float]):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment (cache_key, score) VALUES (?, ?)",
+                scores.items()
+            )
+            conn.commit()
+        except Exception as e:
+            self.logger.error(f"Sentiment cache error: {e}")
+        finally:
+            conn.close()
+
+    def save_persona_comments(self, comments: Dict[str, Dict[str, str]]):
+        """Store persona commentary: {segment_id: {persona_id: comment}}."""
+        rows = [
+            (segment_id, persona_id, comment)
+            for segment_id, by_persona in comments.items()
+            for persona_id, comment in by_persona.items()
+        ]
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO persona_comments (segment_id, persona_id, comment) VALUES (?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_persona_comments(self, segment_ids: List[str], persona_id: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+        """Commentary for the given segments as {segment_id: {persona_id: comment}}, optionally for one persona."""
+        found: Dict[str, Dict[str, str]] = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for i in range(0, len(segment_ids), 500):
+                chunk = segment_ids[i:i+500]
+                placeholders = ",".join("?" * len(chunk))
+                query = f"SELECT segment_id, persona_id, comment FROM persona_comments WHERE segment_id IN ({placeholders})"
+                params = list(chunk)
+                if persona_id is not None:
+                    query += " AND persona_id = ?"
+                    params.append(persona_id)
+                for segment_id, persona, comment in conn.execute(query, params):
+                    found.setdefault(segment_id, {})[persona] = comment
+        finally:
+            conn.close()
+        return found
+
+    def index_segments(self, segments: List[Dict]):
+        """
+        Add or refresh segments in the full-text index. Each dict has id, title, summary, comments,
+        created_at (epoch seconds; kept from the first time a segment is indexed) and optionally
+        vector (the encoded embedding).
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for segment in segments:
+                conn.execute(
+                    "INSERT OR IGNORE INTO segments (segment_id, created_at) VALUES (?, ?)",
+                    (segment["id"], segment.get("created_at") or 0)
+                )
+                rowid = conn.execute("SELECT rowid FROM segments WHERE segment_id = ?", (segment["id"],)).fetchone()[0]
+                if segment.get("vector") is not None:
+                    conn.execute("UPDATE segments SET vector = ? WHERE rowid = ?", (segment["vector"], rowid))
+                conn.execute(
+                    "INSERT OR REPLACE INTO segments_fts (rowid, title, summary, comments) VALUES (?, ?, ?, ?)",
+                    (rowid, segment["title"], segment["summary"], "\n".join(segment["comments"].values()))
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _segment_filters(persona_id: Optional[str], keyword_match: Optional[str]):
+        clauses, params = [], []
+        if keyword_match:
+            clauses.append("segments_fts.rowid IN (SELECT rowid FROM segments_fts WHERE segments_fts MATCH ?)")
+            params.append(keyword_match)
+        if persona_id:
+            clauses.append(
+                "segments.segment_id IN (SELECT segment_id FROM persona_comments WHERE persona_id = ?)"
+            )
+            params.append(persona_id)
+        return clauses, params
+
+    def segment_vectors(self, segment_ids: List[str]) -> Dict[str, bytes]:
+        """Stored embeddings of the given segments, as {segment_id: encoded vector}; segments without one are left out."""
+        found: Dict[str, bytes] = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for i in range(0, len(segment_ids), 500):
+                batch = segment_ids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT segment_id, vector FROM segments WHERE vector IS NOT NULL AND segment_id IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                found.update(rows)
+        finally:
+            conn.close()
+        return found
+
+    def sample_segments(self, n: int) -> Tuple[List[Tuple[str, str]], int]:
+        """Up to `n` random indexed segments with a summary, as (segment_id, summary), and the number without one."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                """SELECT segments.segment_id, segments_fts.summary
+                   FROM segments_fts JOIN segments ON segments.rowid = segments_fts.rowid
+                   WHERE segments_fts.summary != '' ORDER BY random() LIMIT ?""",
+                (n,)
+            ).fetchall()
+            empty = conn.execute("SELECT COUNT(*) FROM segments_fts WHERE summary = ''").fetchone()[0]
+        finally:
+            conn.close()
+        return rows, empty
+
+    def search_segments_fts(self, match: str, limit: int, persona_id: Optional[str] = None,
+                            keyword_match: Optional[str] = None) -> Dict[str, float]:
+        """
+        BM25 ranking of segments for an FTS5 MATCH expression, restricted to segments matching
+        `keyword_match` and commented on by `persona_id`. Returns {segment_id: bm25} (lower is better).
+        """
+        clauses, params = self._segment_filters(persona_id, keyword_match)
+        where = " AND ".join(["segments_fts MATCH ?"] + clauses)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                f"""SELECT segments.segment_id, bm25(segments_fts) AS score
+                    FROM segments_fts JOIN segments ON segments.rowid = segments_fts.rowid
+                    WHERE {where} ORDER BY score LIMIT ?""",
+                [match] + params + [limit]
+            ).fetchall()
+        except sqlite3.OperationalError as e: # Malformed MATCH expression
+            self.logger.warning(f"Full-text query failed: {e}")
+            rows = []
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def persona_timeline(self, persona_id: str, limit: int, after: Optional[Tuple[float, int]] = None,
+                         descending: bool = False) -> List[Dict]:
+        """
+        Segments a persona commented on, ordered by (created_at, rowid), starting after the
+        `after` position. Each row has segment_id, position, created_at, title, summary and comment.
+        """
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        where = "persona_comments.persona_id = ?"
+        params: list = [persona_id]
+        if after is not None:
+            where += f" AND (segments.created_at, segments.rowid) {op} (?, ?)"
+            params += list(after)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                f"""SELECT segments.segment_id, segments.created_at, segments.rowid,
+                           segments_fts.title, segments_fts.summary, persona_comments.comment
+                    FROM persona_comments
+                    JOIN segments ON segments.segment_id = persona_comments.segment_id
+                    JOIN segments_fts ON segments_fts.rowid = segments.rowid
+                    WHERE {where}
+                    ORDER BY segments.created_at {direction}, segments.rowid {direction}
+                    LIMIT ?""",
+                params + [limit]
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"segment_id": segment_id, "created_at": created_at, "position": (created_at, rowid),
+             "title": title, "summary": summary, "comment": comment}
+            for segment_id, created_at, rowid, title, summary, comment in rows
+        ]
@@ -0,0 +1,93 @@
+import importlib.util
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, List
+
+from src.data.broadcast_store import dumps
+
+pyarrow_available = importlib.util.find_spec("pyarrow") is not None
+if pyarrow_available:
+    import pyarrow as pa
+
+# One row per segment in columnar exports; nested fields are JSON strings
+SEGMENT_COLUMNS = [
+    ("broadcast_id", "string"), ("broadcast_created_at", "string"), ("broadcast_topic", "string"),
+    ("segment_id", "string"), ("title", "string"), ("summary", "string"), ("comment", "string"),
+    ("importance", "float64"), ("timestamp", "string"), ("persona_comments", "string"), ("articles", "string"),
+]
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally; only the compressor's window is held in memory."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31) # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def ndjson_stream(broadcasts: Iterable[Dict]) -> Iterator[bytes]:
+    """One broadcast per line."""
+    for broadcast in broadcasts:
+        yield dumps(broadcast) + b"\n"
+
+def markdown_stream(broadcast: Dict) -> Iterator[bytes]:
+    yield f"# Broadcast\nID: **{broadcast['broadcast_id']}**\n\n".encode()
+    for segment in broadcast.get("segments", []):
+        yield f"## {segment.get('title', '')}\n{segment.get('summary', '')}\n\n> {segment.get('comment', '')}\n\n".encode()
+
+def segment_rows(broadcast: Dict) -> Iterator[Dict]:
+    for segment in broadcast.get("segments", []):
+        yield {
+            "broadcast_id": broadcast["broadcast_id"],
+            "broadcast_created_at": broadcast.get("created_at"),
+            "broadcast_topic": broadcast.get("topic"),
+            "segment_id": segment.get("segment_id"),
+            "title": segment.get("title"),
+            "summary": segment.get("summary"),
+            "comment": segment.get("comment"),
+            "importance": segment.get("importance"),
+            "timestamp": segment.get("timestamp"),
+            "persona_comments": json.dumps(segment.get("persona_comments", {})),
+            "articles": json.dumps(segment.get("articles", [])),
+        }
+
+class _ChunkSink:
+    """File-like target for the Arrow writer whose output is drained after every batch."""
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+def arrow_stream(broadcasts: Iterable[Dict], batch_rows: int = 1000) -> Iterator[bytes]:
+    """Arrow IPC stream, one row per segment, written as record batches of up to `batch_rows`."""
+    schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in SEGMENT_COLUMNS])
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    rows: List[Dict] = []
+
+    def write_batch():
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+        rows.clear()
+        return sink.drain()
+
+    for broadcast in broadcasts:
+        rows.extend(segment_rows(broadcast))
+        if len(rows) >= batch_rows:
+            yield write_batch()
+    if rows:
+        yield write_batch()
+    writer.close()
+    yield sink.drain()
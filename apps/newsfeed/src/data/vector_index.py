@@ -0,0 +1,445 @@
+import importlib.util
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+hnswlib_available = importlib.util.find_spec("hnswlib") is not None
+if hnswlib_available:
+    import hnswlib
+
+logger = logging.getLogger(__name__)
+
+OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+def where_sql(where: Dict) -> Tuple[str, list]:
+    """SQL condition on the metadata JSON for a Chroma-style `where` filter."""
+    clauses, params = [], []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_sql(condition) for condition in value]
+            clauses.append("(" + f" {key[1:].upper()} ".join(sql for sql, _ in parts) + ")")
+            params += [param for _, part_params in parts for param in part_params]
+            continue
+        op, operand = next(iter(value.items())) if isinstance(value, dict) else ("$eq", value)
+        field = f'$."{key}"'
+        if op in ("$in", "$nin"):
+            placeholders = ",".join("?" * len(operand))
+            clauses.append(f"json_extract(metadata, ?) {'NOT ' if op == '$nin' else ''}IN ({placeholders})")
+            params += [field, *operand]
+        elif op in OPERATORS:
+            clauses.append(f"json_extract(metadata, ?) {OPERATORS[op]} ?")
+            params += [field, operand]
+        else:
+            raise ValueError(f"Unsupported where operator: {op}")
+    return " AND ".join(clauses) or "1", params
+
+class LocalCollection:
+    """
+    In-process vector collection implementing the part of the Chroma collection API the store
+    uses (add, upsert, get, query, delete, count). Vectors live in a memory-mapped float32 file,
+    one row per label; ids, documents and metadata live in SQLite beside it, which is also where
+    `where` filters run. Nearest-neighbour queries go through an HNSW index (hnswlib, cosine
+    space) that is saved every `save_every` writes and on close, and caught up from the vectors
+    file on open. Without hnswlib, and for filters matching at most `exact_below` records,
+    queries are exact scans.
+
+    Several processes (API workers) may open the same collection. Writes and deletes bump a
+    generation counter in SQLite, under a write lock that also serialises label allocation; every
+    call first catches up with changes committed elsewhere, remapping the vectors file if it has
+    grown and applying new records and deletions to this process's HNSW index.
+    """
+    def __init__(self, directory: str, name: str, m: int = 16, ef_construction: int = 200,
+                 ef_search: int = 64, save_every: int = 1000, exact_below: int = 2000):
+        self.name = name
+        self.directory = Path(directory) / name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.save_every = save_every
+        self.exact_below = exact_below
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.directory / "meta.db", check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                label INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                document TEXT,
+                metadata TEXT NOT NULL,
+                indexed INTEGER NOT NULL DEFAULT 0,
+                written INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS tombstones (label INTEGER PRIMARY KEY, generation INTEGER NOT NULL);
+        """)
+        self._migrate()
+        settings = dict(self._conn.execute("SELECT key, value FROM settings"))
+        self.dim: Optional[int] = settings.get("dim")
+        self._next_label = settings.get("next_label", 0)
+        self._generation = settings.get("generation", 0) # Last write or delete this process has caught up with
+        self._vectors: Optional[np.memmap] = None
+        self._index = None
+        self._live: Optional[np.ndarray] = None # Cached labels of all records
+        self._unsaved = 0
+        if self.dim:
+            self._open()
+
+    def _migrate(self):
+        """Collections written before generations existed: rows not yet in the saved index become generation 1."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(records)")]
+            if "written" not in columns:
+                self._conn.execute("ALTER TABLE records ADD COLUMN written INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE records SET written = 1 WHERE indexed = 0")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    [("generation", 1), ("index_generation", 0)]
+                )
+            self._conn.commit()
+        finally:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+
+    def _setting(self, key: str, default: int = 0) -> int:
+        row = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _open(self):
+        self._reserve(self._next_label)
+        if hnswlib_available:
+            self._load_index()
+
+    def _sync(self):
+        """Catch up with writes and deletes committed by other processes since this one last looked."""
+        generation = self._setting("generation")
+        if generation <= self._generation:
+            return
+        self._next_label = self._setting("next_label")
+        if self.dim is None:
+            self.dim = self._setting("dim")
+            self._open()
+        else:
+            if self._vectors.shape[0] < self._next_label: # Grown by another process: remap it
+                self._vectors = None
+                self._reserve(self._next_label)
+            if self._index is not None:
+                changed = np.array([label for (label,) in self._conn.execute(
+                    "SELECT label FROM records WHERE written > ?", (self._generation,)
+                )], dtype=np.int64)
+                if len(changed):
+                    self._index.add_items(self._vectors[changed], changed)
+                    self._unsaved += len(changed)
+                for (label,) in self._conn.execute("SELECT label FROM tombstones WHERE generation > ?", (self._generation,)):
+                    try:
+                        self._index.mark_deleted(label)
+                    except RuntimeError: # Already deleted, or never indexed here
+                        pass
+        self._live = None
+        self._generation = generation
+
+    def _reserve(self, rows: int):
+        """Grow the vectors file (and the HNSW index) to hold at least `rows` rows."""
+        path = self.directory / "vectors.f32"
+        if self._vectors is not None:
+            capacity = self._vectors.shape[0]
+            if rows <= capacity:
+                return
+            self._vectors.flush()
+        else:
+            capacity = path.stat().st_size // (4 * self.dim) if path.exists() else 0
+        if rows > capacity or not capacity:
+            capacity = max(rows, capacity * 2, 1024)
+            path.touch()
+            os.truncate(path, capacity * self.dim * 4)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        if self._index is not None and self._index.get_max_elements() < capacity:
+            self._index.resize_index(capacity)
+
+    def _load_index(self):
+        path = self.directory / "index.bin"
+        capacity = self._vectors.shape[0]
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        indexed_up_to = -1 # Generation the saved index includes
+        if path.exists():
+            try:
+                index.load_index(str(path), max_elements=capacity)
+                indexed_up_to = self._setting("index_generation")
+            except RuntimeError as e:
+                logger.warning(f"Rebuilding HNSW index for '{self.name}': {e}")
+        if indexed_up_to < 0:
+            index.init_index(max_elements=capacity, ef_construction=self.ef_construction, M=self.m)
+        index.set_ef(self.ef_search)
+        self._index = index
+
+        # Catch up with writes and deletes made after the index was last saved
+        stale = np.array([label for (label,) in self._conn.execute(
+            "SELECT label FROM records WHERE written > ?", (indexed_up_to,)
+        )], dtype=np.int64)
+        if len(stale):
+            index.add_items(self._vectors[stale], stale)
+            self._unsaved += len(stale)
+        live = set(self._live_labels().tolist())
+        for label in index.get_ids_list():
+            if label not in live:
+                try:
+                    index.mark_deleted(label)
+                except RuntimeError: # Already deleted
+                    pass
+        if len(stale):
+            logger.info(f"Added {len(stale)} records to the HNSW index for '{self.name}'.")
+            if not self._conn.in_transaction: # Opened mid-write: saved after it instead
+                self._save_index()
+
+    def _save_index(self):
+        """Save the index unless another process has already saved a more recent one."""
+        if self._index is None:
+            return
+        path = self.directory / "index.bin"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        generation = self._generation
+        self._index.save_index(str(tmp))
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if generation >= self._setting("index_generation"):
+                os.replace(tmp, path)
+                self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('index_generation', ?)", (generation,))
+                # Processes further behind than this miss these deletes and skip the labels at query time instead
+                self._conn.execute("DELETE FROM tombstones WHERE generation <= ?", (generation,))
+            self._conn.commit()
+        finally:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            tmp.unlink(missing_ok=True)
+        self._unsaved = 0
+
+    def _live_labels(self) -> np.ndarray:
+        if self._live is None:
+            self._live = np.array([label for (label,) in self._conn.execute("SELECT label FROM records")], dtype=np.int64)
+        return self._live
+
+    def _labels_for(self, ids: Sequence[str]) -> Dict[str, int]:
+        found = {}
+        for i in range(0, len(ids), 500):
+            chunk = list(ids[i:i+500])
+            placeholders = ",".join("?" * len(chunk))
+            found.update(self._conn.execute(f"SELECT id, label FROM records WHERE id IN ({placeholders})", chunk))
+        return found
+
+    def add(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict]] = None):
+        """Add records; IDs that already exist are skipped (as Chroma does)."""
+        self._write(ids, embeddings, documents, metadatas, replace=False)
+
+    def upsert(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Dict]] = None):
+        self._write(ids, embeddings, documents, metadatas, replace=True)
+
+    def _write(self, ids, embeddings, documents, metadatas, replace: bool):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per id.")
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE") # Labels are allocated across processes
+            try:
+                self._sync()
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self._conn.execute("INSERT INTO settings (key, value) VALUES ('dim', ?)", (self.dim,))
+                    self._open()
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimensionality {self.dim}")
+
+                existing = self._labels_for(ids)
+                rows, labels, records = [], [], []
+                generation = self._generation + 1
+                for i, record_id in enumerate(ids):
+                    if record_id in existing and not replace:
+                        continue
+                    if record_id not in existing:
+                        existing[record_id] = self._next_label
+                        self._next_label += 1
+                    rows.append(i)
+                    labels.append(existing[record_id])
+                    records.append((existing[record_id], record_id, documents[i], json.dumps(metadatas[i]), generation))
+                if not rows:
+                    return
+                labels = np.array(labels, dtype=np.int64)
+                self._reserve(self._next_label)
+                # Vectors reach the file before SQLite refers to their rows
+                self._vectors[labels] = vectors[rows]
+                self._vectors.flush()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO records (label, id, document, metadata, written) VALUES (?, ?, ?, ?, ?)",
+                    records
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    [("next_label", self._next_label), ("generation", generation)]
+                )
+                self._conn.commit()
+            finally:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                    self._next_label = self._setting("next_label")
+            self._generation = generation
+            self._live = None
+            if self._index is not None:
+                self._index.add_items(vectors[rows], labels)
+                self._unsaved += len(rows)
+                if self._unsaved >= self.save_every:
+                    self._save_index()
+
+    def _select(self, ids: Optional[Sequence[str]], where: Optional[Dict], columns: str,
+                limit: Optional[int] = None, offset: Optional[int] = None) -> List[tuple]:
+        condition, params = where_sql(where) if where else ("1", [])
+        if ids is None:
+            # Paging happens in SQL, so reading one page never touches the other rows
+            return self._conn.execute(
+                f"SELECT {columns} FROM records WHERE {condition} ORDER BY label LIMIT ? OFFSET ?",
+                params + [-1 if limit is None else limit, offset or 0]
+            ).fetchall()
+        rows = []
+        for i in range(0, len(ids), 500):
+            chunk = list(ids[i:i+500])
+            placeholders = ",".join("?" * len(chunk))
+            rows += self._conn.execute(
+                f"SELECT {columns} FROM records WHERE id IN ({placeholders}) AND {condition} ORDER BY label",
+                chunk + params
+            ).fetchall()
+        if len(ids) > 500: # Chunks are each in label order; restore it across them
+            rows.sort(key=lambda row: row[0])
+        return rows[offset or 0:][:limit] if limit is not None else rows[offset or 0:]
+
+    def _results(self, rows: List[tuple], include: Sequence[str]) -> Dict:
+        labels = np.array([row[0] for row in rows], dtype=np.int64)
+        return {
+            "ids": [row[1] for row in rows],
+            "documents": [row[2] for row in rows] if "documents" in include else None,
+            "metadatas": [json.loads(row[3]) for row in rows] if "metadatas" in include else None,
+            "embeddings": list(np.array(self._vectors[labels])) if "embeddings" in include else None
+        }
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = ("documents", "metadatas")) -> Dict:
+        with self._lock:
+            self._sync()
+            return self._results(self._select(ids, where, "label, id, document, metadata", limit, offset), include)
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict] = None,
+              include: Sequence[str] = ("documents", "metadatas", "distances")) -> Dict:
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+        with self._lock:
+            self._sync()
+            allowed = None
+            if where:
+                allowed = np.array([label for (label,) in self._select(None, where, "label")], dtype=np.int64)
+            for q in queries:
+                if self.dim is None or (allowed is not None and not len(allowed)):
+                    labels, distances = np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+                elif self._index is None or (allowed is not None and len(allowed) <= self.exact_below):
+                    labels, distances = self._exact(q, allowed, n_results)
+                else:
+                    labels, distances = self._approximate(q, allowed, n_results)
+                found = self._by_label(labels)
+                hits = [(found[label], distance) for label, distance in zip(labels.tolist(), distances.tolist()) if label in found]
+                one = self._results([row for row, _ in hits], include)
+                results["ids"].append(one["ids"])
+                results["distances"].append([distance for _, distance in hits])
+                for key in ("documents", "metadatas", "embeddings"):
+                    results[key].append(one[key])
+        for key in ("documents", "metadatas", "distances", "embeddings"):
+            if key not in include:
+                results[key] = None
+        return results
+
+    def _by_label(self, labels: np.ndarray) -> Dict[int, tuple]:
+        if not len(labels):
+            return {}
+        placeholders = ",".join("?" * len(labels))
+        rows = self._conn.execute(
+            f"SELECT label, id, document, metadata FROM records WHERE label IN ({placeholders})", labels.tolist()
+        ).fetchall()
+        return {row[0]: row for row in rows}
+
+    def _exact(self, q: np.ndarray, allowed: Optional[np.ndarray], n: int) -> Tuple[np.ndarray, np.ndarray]:
+        labels = allowed if allowed is not None else self._live_labels()
+        if not len(labels):
+            return labels, np.array([], dtype=np.float32)
+        vectors = np.asarray(self._vectors[labels])
+        distances = 1 - vectors @ q / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(q) + 1e-12)
+        n = min(n, len(labels))
+        if n <= 0:
+            return labels[:0], distances[:0]
+        top = np.argpartition(distances, n - 1)[:n]
+        top = top[np.argsort(distances[top])]
+        return labels[top], distances[top]
+
+    def _approximate(self, q: np.ndarray, allowed: Optional[np.ndarray], n: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(n, len(allowed) if allowed is not None else len(self._live_labels()))
+        if not k:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        self._index.set_ef(max(self.ef_search, k))
+        try:
+            if allowed is None:
+                labels, distances = self._index.knn_query(q, k=k)
+            else:
+                allowed_set = set(allowed.tolist())
+                labels, distances = self._index.knn_query(q, k=k, num_threads=1, filter=lambda label: label in allowed_set)
+        except RuntimeError: # The graph walk found fewer than k neighbours
+            return self._exact(q, allowed, n)
+        return labels[0].astype(np.int64), distances[0]
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                labels = [row[0] for row in self._select(ids, where, "label")]
+                if not labels:
+                    return
+                generation = self._generation + 1
+                for i in range(0, len(labels), 500):
+                    chunk = labels[i:i+500]
+                    self._conn.execute(f"DELETE FROM records WHERE label IN ({','.join('?' * len(chunk))})", chunk)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO tombstones (label, generation) VALUES (?, ?)",
+                    [(label, generation) for label in labels]
+                )
+                self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('generation', ?)", (generation,))
+                self._conn.commit()
+            finally:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+            self._generation = generation
+            self._live = None
+            if self._index is not None:
+                for label in labels:
+                    try:
+                        self._index.mark_deleted(label)
+                    except RuntimeError: # Not in the index yet
+                        pass
+
+    def count(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        """Save the HNSW index and release the files."""
+        with self._lock:
+            self._sync()
+            if self._unsaved:
+                self._save_index()
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._conn.close()
@@ -10,20 +10,22 @@ from typing import List, Optional
 
 from src.core.config import CONFIG
 from src.core.models import Article
+from src.core.performance_monitor import get_monitor
 from src.data.database import NewsDatabase
 
 class FeedFetcher:
     def __init__(self, feeds_file: str = "feeds.yaml"):
         self.feeds_file = feeds_file
         self.db = NewsDatabase()
+        self.monitor = get_monitor()
         self.logger = logging.getLogger(__name__)
 
-    async def fetch_feeds_batch(self, batch_size: int = 5) -> List[Article]:
-        """Optimized batch processing of feeds"""
-        with open(self.feeds_file, 'r') as f:
-            feeds_config = yaml.safe_load(f)
-
-        feeds = feeds_config.get('feeds', [])
+    async def fetch_feeds_batch(self, feeds: Optional[List[str]] = None, batch_size: int = 5) -> List[Article]:
+        """Optimized batch processing of feeds. `feeds` overrides the feeds file for this call."""
+        if feeds is None:
+            with open(self.feeds_file, 'r') as f:
+                feeds_config = yaml.safe_load(f)
+            feeds = feeds_config.get('feeds', [])
         articles = []
 
         for i in range(0, len(feeds), batch_size):
@@ -45,11 +47,13 @@ class FeedFetcher:
         """Streamlined feed fetching"""
         self.logger.info(f"Attempting to fetch feed: {feed_url}")
         try:
-            async with session.get(feed_url, timeout=60) as response:
-                response.raise_for_status()
-                content = await response.text()
+            with self.monitor.track("fetch", feed=feed_url):
+                async with session.get(feed_url, timeout=60) as response:
+                    response.raise_for_status()
+                    content = await response.text()
 
-            feed = feedparser.parse(content)
+            with self.monitor.track("parse"):
+                feed = feedparser.parse(content)
             articles = []
 
             fetched_count = 0
@@ -63,7 +67,9 @@ class FeedFetcher:
                     continue
 
                 content_hash = hashlib.md5(content.encode()).hexdigest()
-                if self.db.is_duplicate(content_hash):
+                with self.monitor.track("dedup"):
+                    duplicate = self.db.is_duplicate(content_hash)
+                if duplicate:
                     self.logger.debug(f"Skipping duplicate article: {entry.get('title', 'No Title')}")
                     continue
 
@@ -73,6 +79,7 @@ class FeedFetcher:
                     url=entry.get('link', ''),
                     published=self.parse_date(entry),
                     source=feed.feed.get('title', feed_url),
+                    content_hash=content_hash,
                 )
 
                 articles.append(article)
@@ -1,51 +1,106 @@
+import os
 import numpy as np
-from sklearn.cluster import MiniBatchKMeans
-from sentence_transformers import SentenceTransformer
-from tqdm import tqdm
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 from datetime import datetime
 import aiohttp # Import aiohttp
-from sklearn.metrics import silhouette_score
 import time # Import time for sleep
 import traceback # Import traceback
 from src.core.config import CONFIG # Import CONFIG
 from src.core.circuit_breaker import CircuitBreaker # Import CircuitBreaker
+from src.core.history import RingBuffer, StreamingStats
+from src.core.performance_monitor import get_monitor
+from src.core.offload import SharedArray, run_in_thread, run_in_process
+from src.nlp.embedding import create_embedding_backend
+from src.nlp import scoring
 from src.prompts import create_summary_prompt, create_segment_script_prompt, create_transition_phrase_prompt # Import prompt functions
 
+def _spill_path(name):
+    spill_dir = CONFIG["history"]["spill_dir"]
+    return os.path.join(spill_dir, f"{name}.jsonl.gz") if spill_dir else None
+
 class CSAIHistory:
     def __init__(self):
-        self.history = []
+        self.history = RingBuffer(CONFIG["history"]["csai_capacity"], spill_path=_spill_path("csai_history"))
+        self.silhouette = StreamingStats() # Lifetime aggregate, independent of the buffer size
 
     def append(self, data):
         self.history.append(data)
+        if data.get('silhouette') is not None:
+            self.silhouette.add(data['silhouette'])
 
 class StreamClusterer:
-    def __init__(self, embedding_model='sentence-transformers/all-MiniLM-L6-v2', n_clusters=5):
-        self.embedder = SentenceTransformer(embedding_model)
-        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, batch_size=256, n_init='auto') # Increased n_init for more stable results
+    def __init__(self, embedding_model=None, n_clusters=5):
+        # The embedder, k-means model and geocoder are built on first use (or by warm_up())
+        # so that constructing the clusterer stays cheap.
+        self.embedding_model = embedding_model
+        self.n_clusters = n_clusters
+        self._embedder = None
+        self.embedding_version = None # Version tag of the backend the k-means model was fitted on
+        self._kmeans = None
+        self._geolocator = None
         self.csai_history = CSAIHistory()
-        self.cluster_history = [] # Store cluster summaries and metadata
-        self.geolocator = Nominatim(user_agent="news15", timeout=10) # Increased timeout
+        self.cluster_history = RingBuffer(CONFIG["history"]["cluster_capacity"], spill_path=_spill_path("cluster_history")) # Recent cluster summaries and metadata
         self.session: aiohttp.ClientSession = None # Will be set by NewsGenerator
         self.circuit_breaker: CircuitBreaker = None # Will be set by NewsGenerator
 
-    def add_batch(self, headlines):
-        if not headlines:
-            return {} # Return empty if no headlines
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = self.load_embedder()
+        return self._embedder
 
-        embeddings = self.embedder.encode(headlines, convert_to_tensor=True)
-        embeddings_np = embeddings.cpu().numpy()
+    def use_embedder(self, embedder):
+        """Switch embedding backends; the k-means model is refitted on the new backend's vectors."""
+        self._embedder = embedder
 
-        # Handle cases where n_clusters might be greater than n_samples
-        if len(headlines) < self.kmeans.n_clusters:
-            # Assign all to a single cluster if not enough samples for multiple clusters
-            cluster_labels = np.zeros(len(headlines), dtype=int)
-        else:
-            # Fit incrementally and then predict
-            self.kmeans.partial_fit(embeddings_np)
-            cluster_labels = self.kmeans.predict(embeddings_np)
+    @property
+    def kmeans(self):
+        if self._kmeans is None:
+            from sklearn.cluster import MiniBatchKMeans
+            self._kmeans = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=0, batch_size=256, n_init='auto') # Increased n_init for more stable results
+        return self._kmeans
+
+    @property
+    def geolocator(self):
+        if self._geolocator is None:
+            from geopy.geocoders import Nominatim
+            self._geolocator = Nominatim(user_agent="news15", timeout=10) # Increased timeout
+        return self._geolocator
+
+    def load_embedder(self):
+        """Build the configured embedding backend (SentenceTransformer or quantized ONNX)."""
+        return create_embedding_backend(self.embedding_model)
+
+    def warm_up(self):
+        """Load the embedding model and run one encode so the first batch doesn't pay for it."""
+        self.embedder.warm_up()
+        return self.kmeans
+
+    def embed_and_cluster(self, headlines):
+        """Encode headlines and assign k-means labels. CPU-bound; run it off the event loop."""
+        monitor = get_monitor()
+        with monitor.track("encode"):
+            version = self.embedder.version
+            embeddings_np = self.embedder.encode(headlines)
+
+        with monitor.track("cluster"):
+            if self.embedding_version != version:
+                # Vectors from different backends are never mixed in one k-means model
+                if self.embedding_version is not None:
+                    print(f"Embedding backend changed to {version}; resetting k-means.")
+                self._kmeans = None
+                self.embedding_version = version
+            # Handle cases where n_clusters might be greater than n_samples
+            if len(headlines) < self.kmeans.n_clusters:
+                # Assign all to a single cluster if not enough samples for multiple clusters
+                cluster_labels = np.zeros(len(headlines), dtype=int)
+            else:
+                # Fit incrementally and then predict
+                self.kmeans.partial_fit(embeddings_np)
+                cluster_labels = self.kmeans.predict(embeddings_np)
+        return embeddings_np, cluster_labels
 
+    @staticmethod
+    def group_by_label(headlines, cluster_labels):
         clustered_headlines = {}
         for i, label in enumerate(cluster_labels):
             if label not in clustered_headlines:
@@ -53,8 +108,16 @@ class StreamClusterer:
             clustered_headlines[label].append(headlines[i])
         return clustered_headlines
 
+    def add_batch(self, headlines):
+        if not headlines:
+            return {} # Return empty if no headlines
+
+        _, cluster_labels = self.embed_and_cluster(headlines)
+        return self.group_by_label(headlines, cluster_labels)
+
     async def postprocess_cluster(self, cluster_headlines, timestamp_source_info=None):
-        filtered_headlines = self.temporal_spatial_filter(cluster_headlines, timestamp_source_info)
+        # Geocoding blocks (network + rate-limit sleeps), so keep it off the event loop
+        filtered_headlines = await run_in_thread(self.temporal_spatial_filter, cluster_headlines, timestamp_source_info)
         cluster_summary = await self.summarize_cluster(filtered_headlines)
         cluster_topic = await self.label_cluster_topic(cluster_summary)
 
@@ -90,6 +153,7 @@ class StreamClusterer:
                 print(f"Error geocoding 'Austin, Texas': {e}. Skipping spatial filter.")
 
             if austin_coords:
+                from geopy.distance import geodesic
                 for i, headline in enumerate(headlines):
                     timestamp, source = timestamp_source_info[i]
                     try:
@@ -125,21 +189,24 @@ class StreamClusterer:
 
         prompt = create_summary_prompt("Cluster Summary", text, {}) # No persona for cluster summary
 
+        monitor = get_monitor()
         try:
-            async with self.session.post(
-                f"{CONFIG['ollama_api']['base_url']}/api/generate",
-                json={
-                    'model': CONFIG["models"]["summary_model"],
-                    'prompt': prompt,
-                    'stream': False,
-                    'options': {'temperature': 0.3, 'max_tokens': 500}
-                },
-                timeout=aiohttp.ClientTimeout(total=60)
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                self.circuit_breaker.record_success()
-                return data['response'].strip()
+            with monitor.track("cluster_summary", headlines=len(headlines)):
+                async with self.session.post(
+                    f"{CONFIG['ollama_api']['base_url']}/api/generate",
+                    json={
+                        'model': CONFIG["models"]["summary_model"],
+                        'prompt': prompt,
+                        'stream': False,
+                        'options': {'temperature': 0.3, 'max_tokens': 500}
+                    },
+                    timeout=aiohttp.ClientTimeout(total=60)
+                ) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                    monitor.record_llm_tokens(CONFIG["models"]["summary_model"], data)
+                    self.circuit_breaker.record_success()
+                    return data['response'].strip()
         except aiohttp.ClientResponseError as e:
             error_detail = await e.response.text() if e.response else "No response body"
             print(f"ERROR - Cluster summary LLM API error (status: {e.status}): {error_detail}")
@@ -161,21 +228,24 @@ class StreamClusterer:
 
         prompt = f"What is the main topic of the following text? {cluster_summary}\n\nTopic:"
         
+        monitor = get_monitor()
         try:
-            async with self.session.post(
-                f"{CONFIG['ollama_api']['base_url']}/api/generate",
-                json={
-                    'model': CONFIG["models"]["broadcast_model"], # Using broadcast model for topic extraction
-                    'prompt': prompt,
-                    'stream': False,
-                    'options': {'temperature': 0.6, 'max_tokens': 50}
-                },
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                self.circuit_breaker.record_success()
-                return data['response'].strip()
+            with monitor.track("cluster_topic"):
+                async with self.session.post(
+                    f"{CONFIG['ollama_api']['base_url']}/api/generate",
+                    json={
+                        'model': CONFIG["models"]["broadcast_model"], # Using broadcast model for topic extraction
+                        'prompt': prompt,
+                        'stream': False,
+                        'options': {'temperature': 0.6, 'max_tokens': 50}
+                    },
+                    timeout=aiohttp.ClientTimeout(total=30)
+                ) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                    monitor.record_llm_tokens(CONFIG["models"]["broadcast_model"], data)
+                    self.circuit_breaker.record_success()
+                    return data['response'].strip()
         except aiohttp.ClientResponseError as e:
             error_detail = await e.response.text() if e.response else "No response body"
             print(f"ERROR - Topic extraction LLM API error (status: {e.status}): {error_detail}")
@@ -190,27 +260,28 @@ class StreamClusterer:
             self.circuit_breaker.record_failure()
             return "Topic unavailable due to LLM error."
 
-    def validate_clustering(self, embeddings, labels):
+    async def validate_clustering(self, embeddings, labels):
         # Only calculate silhouette score if there are at least two unique labels
         # and more than one sample, otherwise it's undefined.
         if len(np.unique(labels)) > 1 and len(embeddings) > 1:
-            silhouette = silhouette_score(embeddings, labels)
-            self.csai_history.append({'silhouette': silhouette})
+            # The embeddings go to the worker through shared memory instead of being pickled
+            with SharedArray(embeddings) as shared:
+                silhouette = await run_in_process(scoring.silhouette, shared.handle, np.asarray(labels).tolist())
+            self.csai_history.append({'silhouette': silhouette, 'embedding_version': self.embedding_version})
             return silhouette
         else:
             # If silhouette score cannot be calculated, append a placeholder or skip
-            self.csai_history.append({'silhouette': None})
+            self.csai_history.append({'silhouette': None, 'embedding_version': self.embedding_version})
             return None
 
     async def process_batch(self, headlines, timestamp_source_info=None):
-        clustered_headlines = self.add_batch(headlines)
+        if not headlines:
+            return {}
+
+        # Encode once, in the thread pool, and reuse the vectors for clustering and validation
+        embeddings, labels = await run_in_thread(self.embed_and_cluster, headlines)
+        clustered_headlines = self.group_by_label(headlines, labels)
         cluster_results = {}
-        embeddings = self.embedder.encode(headlines, convert_to_tensor=True).cpu().numpy()
-        # Ensure labels are available, especially if clustering was skipped
-        if len(headlines) < self.kmeans.n_clusters:
-            labels = np.zeros(len(headlines), dtype=int)
-        else:
-            labels = self.kmeans.labels_
 
         for cluster_id, cluster_headlines_list in clustered_headlines.items():
             # Filter timestamp_source_info for the current cluster's headlines
@@ -224,9 +295,14 @@ class StreamClusterer:
                     pass
             cluster_results[cluster_id] = await self.postprocess_cluster(cluster_headlines_list, current_cluster_ts_info)
 
-        self.validate_clustering(embeddings, labels)
+        await self.validate_clustering(embeddings, labels)
         self.cluster_history.append(cluster_results)
         return cluster_results
 
     def get_cluster_history(self):
-        return self.cluster_history
+        return self.cluster_history.to_list()
+
+    def flush_history(self):
+        """Write any evicted-but-unspilled history to disk."""
+        self.cluster_history.flush()
+        self.csai_history.history.flush()
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from src.core.config import CONFIG
+
+BATCH_SIZE_CANDIDATES = [8, 16, 32, 64, 128]
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _tuning_sample(n: int = 256) -> List[str]:
+    """Headline-shaped strings for throughput tuning."""
+    words = "markets rally as central bank signals rate cut amid inflation fears and election uncertainty".split()
+    return [" ".join(words[i % len(words):] + words[:i % len(words)]) for i in range(n)]
+
+class SentenceTransformerBackend:
+    """Reference backend: the PyTorch SentenceTransformer model."""
+    name = "st-fp32"
+
+    def __init__(self, model_name: str, batch_size: Optional[int] = None):
+        self.model_name = model_name
+        self.version = f"{model_name.split('/')[-1]}:{self.name}"
+        self.batch_size = batch_size or 32
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.load()
+        return self._model
+
+    def load(self):
+        """Load the model from the local model cache, downloading it only when missing."""
+        from sentence_transformers import SentenceTransformer
+
+        cache_dir = CONFIG["cache"]["models_dir"]
+        try:
+            return SentenceTransformer(self.model_name, cache_folder=cache_dir, local_files_only=True)
+        except Exception:
+            if CONFIG["cache"]["offline"]:
+                raise
+            return SentenceTransformer(self.model_name, cache_folder=cache_dir)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True).astype(np.float32)
+
+    def warm_up(self):
+        self.encode(["warm-up"])
+
+class OnnxInt8Backend:
+    """
+    The same model exported to ONNX, dynamically quantized to int8 and run with onnxruntime on CPU.
+    Mean pooling + L2 normalisation matches the all-MiniLM SentenceTransformer pipeline (which ends
+    in a Normalize layer), so vectors stay comparable; they are still tagged with their own version
+    so the clusterer never mixes them.
+    """
+    name = "onnx-int8"
+
+    def __init__(self, model_name: str, export_dir: str, batch_size: Optional[int] = None, threads: Optional[int] = None, max_length: int = 128):
+        self.model_name = model_name
+        self.version = f"{model_name.split('/')[-1]}:{self.name}"
+        self.export_dir = Path(export_dir) / model_name.split('/')[-1]
+        self.batch_size = batch_size
+        self.threads = threads
+        self.max_length = max_length
+        self.logger = logging.getLogger(__name__)
+        self._session = None
+        self._tokenizer = None
+        self._input_names = ()
+
+    @property
+    def quantized_path(self) -> Path:
+        return self.export_dir / "model_int8.onnx"
+
+    @property
+    def tuning_path(self) -> Path:
+        return self.export_dir / "tuning.json"
+
+    def ensure_quantized_model(self) -> Path:
+        """Export and quantize the model once; later starts load the cached int8 file."""
+        if self.quantized_path.exists():
+            return self.quantized_path
+
+        fp32_path = self.export_dir / "model.onnx"
+        if not fp32_path.exists():
+            if CONFIG["cache"]["offline"]:
+                raise FileNotFoundError(f"No exported ONNX model at {fp32_path} and offline mode is on.")
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            from transformers import AutoTokenizer
+
+            self.logger.info(f"Exporting {self.model_name} to ONNX in {self.export_dir}")
+            model = ORTModelForFeatureExtraction.from_pretrained(self.model_name, export=True, cache_dir=CONFIG["cache"]["models_dir"])
+            model.save_pretrained(self.export_dir)
+            AutoTokenizer.from_pretrained(self.model_name, cache_dir=CONFIG["cache"]["models_dir"]).save_pretrained(self.export_dir)
+
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        self.logger.info(f"Quantizing {fp32_path} to int8")
+        quantize_dynamic(str(fp32_path), str(self.quantized_path), weight_type=QuantType.QInt8)
+        return self.quantized_path
+
+    def create_session(self, threads: int):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(str(self.ensure_quantized_model()), options, providers=["CPUExecutionProvider"])
+
+    def load(self):
+        from transformers import AutoTokenizer
+
+        self.ensure_quantized_model()
+        self._tokenizer = AutoTokenizer.from_pretrained(self.export_dir)
+        self.load_tuning()
+        self._session = self.create_session(self.threads or _cpu_count())
+        self._input_names = tuple(i.name for i in self._session.get_inputs())
+
+    def load_tuning(self):
+        if (self.batch_size and self.threads) or not self.tuning_path.exists():
+            return
+        tuned = json.loads(self.tuning_path.read_text())
+        self.batch_size = self.batch_size or tuned.get("batch_size")
+        self.threads = self.threads or tuned.get("threads")
+
+    def _encode_batch(self, session, texts: List[str]) -> np.ndarray:
+        tokens = self._tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        inputs = {name: tokens[name].astype(np.int64) for name in self._input_names if name in tokens}
+        token_embeddings = session.run(None, inputs)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self._session is None:
+            self.load()
+        batch_size = self.batch_size or 32
+        return np.vstack([self._encode_batch(self._session, texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+
+    def tune(self, sample: Optional[List[str]] = None) -> dict:
+        """Pick the fastest thread count and batch size on this machine and cache the choice."""
+        if self._tokenizer is None:
+            self.load()
+        sample = sample or _tuning_sample()
+        cpus = _cpu_count()
+        thread_candidates = [self.threads] if self.threads else sorted({1, max(1, cpus // 2), cpus})
+        batch_candidates = [self.batch_size] if self.batch_size else BATCH_SIZE_CANDIDATES
+
+        best = None
+        for threads in thread_candidates:
+            session = self.create_session(threads)
+            self._encode_batch(session, sample[:8])
+            for batch_size in batch_candidates:
+                start = time.perf_counter()
+                for i in range(0, len(sample), batch_size):
+                    self._encode_batch(session, sample[i:i + batch_size])
+                throughput = len(sample) / (time.perf_counter() - start)
+                if best is None or throughput > best["throughput"]:
+                    best = {"threads": threads, "batch_size": batch_size, "throughput": throughput}
+
+        self.threads, self.batch_size = best["threads"], best["batch_size"]
+        self._session = self.create_session(self.threads)
+        self.tuning_path.write_text(json.dumps(best))
+        self.logger.info(f"ONNX embedder tuned: {best['threads']} threads, batch size {best['batch_size']} ({best['throughput']:.0f} texts/s)")
+        return best
+
+    def warm_up(self):
+        self.load()
+        if not (self.batch_size and self.threads):
+            self.tune()
+        self.encode(["warm-up"])
+
+def create_embedding_backend(model_name: Optional[str] = None, backend: Optional[str] = None):
+    """Build the embedding backend selected in CONFIG['embedding'] (or by the arguments)."""
+    settings = CONFIG["embedding"]
+    model_name = model_name or settings["model"]
+    backend = backend or settings["backend"]
+
+    if backend == OnnxInt8Backend.name:
+        return OnnxInt8Backend(model_name, settings["onnx_dir"], batch_size=settings["batch_size"], threads=settings["threads"])
+    if backend in (SentenceTransformerBackend.name, "sentence-transformers"):
+        return SentenceTransformerBackend(model_name, batch_size=settings["batch_size"])
+    raise ValueError(f"Unknown embedding backend: '{backend}'")
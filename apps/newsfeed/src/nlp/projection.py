@@ -0,0 +1,306 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import CONFIG
+from src.core.performance_monitor import get_monitor
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+def place(vectors: np.ndarray, reference: np.ndarray, reference_coords: np.ndarray, k: int) -> np.ndarray:
+    """Out-of-sample 2D coordinates: similarity-weighted mean of the k most similar reference points."""
+    similarity = normalize_rows(vectors) @ reference.T
+    k = min(k, similarity.shape[1])
+    nearest = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    weights = np.maximum(np.take_along_axis(similarity, nearest, axis=1), 0) + 1e-6
+    return (weights[..., None] * reference_coords[nearest]).sum(axis=1) / weights.sum(axis=1, keepdims=True)
+
+class Projection:
+    """
+    2D layout of every stored segment for the global heatmap. A reference sample of up to
+    `reference_size` segments is laid out with t-SNE in the background; every other segment,
+    including new ones as they are written, is placed out-of-sample at the similarity-weighted
+    mean of its nearest reference points. Refits start from the previous layout, so the map
+    stays recognisable between them. Density grids are cached per `n_bins` until the next
+    placement or refit. With several API workers only the leader fits and places; it saves the
+    layout as it changes and the others reload the saved file.
+    """
+    def __init__(self, path: Optional[str] = None):
+        settings = CONFIG["projection"]
+        self.path = Path(path or settings["path"])
+        self.reference_size = settings["reference_size"]
+        self.neighbours = settings["neighbours"]
+        self.refit_interval = settings["refit_interval"]
+        self.refit_growth = settings["refit_growth"]
+        self.page_size = settings["page_size"]
+        self.sync_interval = settings["sync_interval"]
+        self.monitor = get_monitor()
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.fit_token: Optional[str] = None # Changes with every fit; part of the ETag
+        self.reference = np.empty((0, 0), dtype=np.float32) # Normalised reference embeddings
+        self.reference_coords = np.empty((0, 2), dtype=np.float32)
+        self.ids: List[str] = []
+        self.coords = np.empty((0, 2), dtype=np.float32)
+        self.fitted_count = 0
+        self._positions: Dict[str, int] = {}
+        self._densities: Dict[int, Tuple[str, bytes]] = {}
+        self._fitting = False
+        self._pending: List[Tuple[List[str], np.ndarray]] = [] # Written while a fit was running
+        self._dirty = False # Placements not yet saved
+        self._saved_mtime: Optional[int] = None # Of the file as last saved or loaded here
+        self._refit_wanted: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.fit_token is not None
+
+    def place(self, vectors: np.ndarray) -> np.ndarray:
+        return place(vectors, self.reference, self.reference_coords, self.neighbours)
+
+    def add(self, ids: List[str], vectors) -> int:
+        """Place new segments in the current layout. Returns how many were added."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self._fitting:
+                self._pending.append((list(ids), vectors))
+            if not self.ready:
+                # Nothing to place against yet: the first fit picks these up from the store
+                wanted, fresh = not self._fitting, []
+            else:
+                fresh = [i for i, segment_id in enumerate(ids) if segment_id not in self._positions]
+                if fresh:
+                    coords = self.place(vectors[fresh]).astype(np.float32)
+                    for i in fresh:
+                        self._positions[ids[i]] = len(self.ids)
+                        self.ids.append(ids[i])
+                    self.coords = np.vstack([self.coords, coords])
+                    self._densities.clear()
+                    self._dirty = True
+                wanted = len(self.ids) >= self.refit_growth * max(self.fitted_count, 1)
+        if wanted and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._refit_wanted.set)
+        return len(fresh)
+
+    def add_records(self, records: List[Dict]):
+        """SegmentWriter listener: place segments as soon as they are stored."""
+        self.add([r["id"] for r in records], [r["embedding"] for r in records])
+
+    def fit(self, collection) -> int:
+        """
+        Lay out a fresh reference sample with t-SNE and place every segment in the collection.
+        Blocking (seconds to minutes); runs in the background. Returns the number of segments placed.
+        """
+        from sklearn.manifold import TSNE
+
+        with self._lock:
+            self._fitting = True
+            self._pending = []
+        try:
+            with self.monitor.track("projection_fit") as span:
+                ids = collection.get(include=[])["ids"]
+                if len(ids) < 2:
+                    return 0
+                rng = np.random.default_rng()
+                sample = sorted(rng.choice(len(ids), size=min(self.reference_size, len(ids)), replace=False))
+                reference_ids = [ids[i] for i in sample]
+                reference = []
+                for i in range(0, len(reference_ids), self.page_size):
+                    page = collection.get(ids=reference_ids[i:i+self.page_size], include=["embeddings"])
+                    reference += list(zip(page["ids"], page["embeddings"]))
+                reference_ids = [segment_id for segment_id, _ in reference]
+                reference_vectors = normalize_rows(np.asarray([vector for _, vector in reference], dtype=np.float32))
+
+                # Start from where these segments were on the previous map, so the layout is stable
+                init = None
+                with self._lock:
+                    known = [self._positions.get(segment_id) for segment_id in reference_ids]
+                    if self.ready and any(p is not None for p in known):
+                        init = np.array([
+                            self.coords[p] if p is not None else self.place(vector[None])[0]
+                            for p, vector in zip(known, reference_vectors)
+                        ], dtype=np.float32)
+                        init = (init - init.mean(axis=0)) / (init[:, 0].std() + 1e-12) * 1e-4 # Scaled like sklearn's PCA init
+                tsne = TSNE(
+                    n_components=2,
+                    perplexity=min(30.0, max(1.0, (len(reference_ids) - 1) / 3)),
+                    init=init if init is not None else "pca",
+                    metric="cosine",
+                    random_state=42
+                )
+                reference_coords = tsne.fit_transform(reference_vectors).astype(np.float32)
+
+                # Place the whole archive against the new reference
+                positions = set(reference_ids)
+                placed_ids, placed = list(reference_ids), [reference_coords]
+                for i in range(0, len(ids), self.page_size):
+                    page = collection.get(ids=ids[i:i+self.page_size], include=["embeddings"])
+                    rest = [(segment_id, vector) for segment_id, vector in zip(page["ids"], page["embeddings"]) if segment_id not in positions]
+                    if rest:
+                        placed_ids += [segment_id for segment_id, _ in rest]
+                        vectors = np.asarray([vector for _, vector in rest], dtype=np.float32)
+                        placed.append(place(vectors, reference_vectors, reference_coords, self.neighbours))
+                span.set(segments=len(placed_ids), reference=len(reference_ids))
+
+            with self._lock:
+                self.reference, self.reference_coords = reference_vectors, reference_coords
+                self.ids = placed_ids
+                self.coords = np.vstack(placed).astype(np.float32)
+                self._positions = {segment_id: i for i, segment_id in enumerate(placed_ids)}
+                self.fitted_count = len(placed_ids)
+                self.fit_token = f"{time.time_ns():x}"
+                self._densities.clear()
+                pending, self._pending = self._pending, []
+        finally:
+            with self._lock:
+                self._fitting = False
+        for pending_ids, vectors in pending: # Written while the archive was being read
+            self.add(pending_ids, vectors)
+        self.save()
+        return len(self.ids)
+
+    def density(self, n_bins: int) -> Optional[Tuple[str, bytes]]:
+        """(ETag, JSON body) of the density grid, computed once per layout version and `n_bins`."""
+        with self._lock:
+            if not self.ready:
+                return None
+            cached = self._densities.get(n_bins)
+            if cached is not None:
+                return cached
+            etag = f'"{self.fit_token}-{len(self.ids)}-{n_bins}"'
+            coords = self.coords
+        grid = self._density_grid(coords, n_bins)
+        body = json.dumps({f"row_{i}": grid[i].tolist() for i in range(n_bins)}).encode()
+        with self._lock:
+            if etag == f'"{self.fit_token}-{len(self.ids)}-{n_bins}"': # Layout unchanged meanwhile
+                self._densities[n_bins] = (etag, body)
+        return etag, body
+
+    @staticmethod
+    def _density_grid(coords: np.ndarray, n_bins: int) -> np.ndarray:
+        """
+        Binned Gaussian KDE on an n_bins x n_bins grid spanning the points (rows are y), with
+        Scott's bandwidth as in scipy's gaussian_kde but linear in the number of points.
+        """
+        from scipy.ndimage import gaussian_filter
+
+        (x_min, y_min), (x_max, y_max) = coords.min(axis=0), coords.max(axis=0)
+        width = max(x_max - x_min, 1e-9) / (n_bins - 1)
+        height = max(y_max - y_min, 1e-9) / (n_bins - 1)
+        counts, _, _ = np.histogram2d(
+            coords[:, 1], coords[:, 0], bins=n_bins,
+            range=[[y_min - height / 2, y_max + height / 2], [x_min - width / 2, x_max + width / 2]]
+        )
+        factor = len(coords) ** (-1 / 6)
+        sigma = (factor * coords[:, 1].std() / height, factor * coords[:, 0].std() / width)
+        return gaussian_filter(counts, sigma=sigma, mode="constant") / (len(coords) * width * height)
+
+    def save(self):
+        """Persist the layout so restarts serve the same map straight away."""
+        with self._lock:
+            if not self.ready:
+                return
+            state = dict(ids=np.array(self.ids), coords=self.coords, reference=self.reference,
+                         reference_coords=self.reference_coords, fitted_count=self.fitted_count,
+                         fit_token=self.fit_token)
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp.npz")
+            np.savez(tmp, **state)
+            os.replace(tmp, self.path)
+            self._saved_mtime = self.path.stat().st_mtime_ns
+        except OSError as e:
+            self.logger.error(f"Failed to save projection: {e}")
+            self._dirty = True
+
+    def flush(self):
+        """Save if segments were placed since the last save."""
+        if self._dirty:
+            self.save()
+
+    def load(self) -> bool:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return False
+        try:
+            with np.load(self.path) as state:
+                with self._lock:
+                    self.ids = state["ids"].tolist()
+                    self.coords = state["coords"]
+                    self.reference = state["reference"]
+                    self.reference_coords = state["reference_coords"]
+                    self.fitted_count = int(state["fitted_count"])
+                    self._positions = {segment_id: i for i, segment_id in enumerate(self.ids)}
+                    self.fit_token = str(state["fit_token"])
+                    self._densities.clear()
+                    self._dirty = False
+            self._saved_mtime = mtime
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable projection {self.path}: {e}")
+            return False
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Load the saved layout if another process has saved it since we last saved or loaded it."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._saved_mtime or self._dirty:
+            return False
+        return self.load()
+
+    async def maintain(self, collection_factory, is_leader: Callable[[], bool] = lambda: True):
+        """
+        Background task: load the saved layout, then on the leader refit every `refit_interval`
+        seconds or once the archive has grown `refit_growth`-fold since the last fit, and save new
+        placements every `sync_interval` seconds. Other workers reload the layout the leader saves.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._refit_wanted = asyncio.Event()
+        if await asyncio.to_thread(self.load):
+            self.logger.info(f"Loaded projection of {len(self.ids)} segments.")
+        else:
+            self._refit_wanted.set() # The first leader fits one
+        last_fit = time.monotonic()
+        while True:
+            if is_leader():
+                try:
+                    await asyncio.wait_for(self._refit_wanted.wait(), self.sync_interval)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(self.sync_interval)
+            if await asyncio.to_thread(self.reload_if_changed):
+                self.logger.info(f"Reloaded projection of {len(self.ids)} segments.")
+            if not is_leader():
+                continue
+            if self._refit_wanted.is_set() or time.monotonic() - last_fit >= self.refit_interval:
+                self._refit_wanted.clear()
+                last_fit = time.monotonic()
+                try:
+                    placed = await asyncio.to_thread(lambda: self.fit(collection_factory()))
+                    self.logger.info(f"Projection refit: {placed} segments placed.")
+                except Exception as e:
+                    self.logger.error(f"Projection fit failed: {e}")
+            else:
+                await asyncio.to_thread(self.flush)
+
+_projection: Optional[Projection] = None
+
+def get_projection() -> Projection:
+    global _projection
+    if _projection is None:
+        _projection = Projection()
+    return _projection
@@ -0,0 +1,46 @@
+"""
+CPU-bound scoring functions run in the process pool (see src.core.offload).
+Everything here is module-level so it can be pickled by reference.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from src.core.offload import SharedArrayHandle, attach_array
+
+_SENTENCE_SPLIT = re.compile(r'[.!?]+')
+_sentiment_analyzer = None
+
+def _analyzer():
+    """One SentimentAnalyzer per worker process."""
+    global _sentiment_analyzer
+    if _sentiment_analyzer is None:
+        from src.nlp.sentiment import SentimentAnalyzer
+        _sentiment_analyzer = SentimentAnalyzer()
+    return _sentiment_analyzer
+
+def sentiment_scores(texts: List[str]) -> Optional[List[float]]:
+    """VADER compound score per text, or None if this worker has no VADER lexicon loaded."""
+    analyzer = _analyzer()
+    if analyzer.analyzer is None:
+        return None
+    return [analyzer.get_sentiment_score(text) for text in texts]
+
+def text_stats(contents: List[str]) -> Tuple[List[int], List[int], List[int]]:
+    """Character, sentence and word counts per article, the text inputs to ArticleBatch scoring."""
+    lengths, sentences, words = [], [], []
+    for content in contents:
+        lengths.append(len(content))
+        sentences.append(len(_SENTENCE_SPLIT.split(content)))
+        words.append(len(content.split()))
+    return lengths, sentences, words
+
+def silhouette(handle: SharedArrayHandle, labels: List[int]) -> float:
+    """Silhouette score of embeddings shared by the parent process."""
+    from sklearn.metrics import silhouette_score
+
+    shm, embeddings = attach_array(handle)
+    try:
+        return float(silhouette_score(embeddings, labels))
+    finally:
+        del embeddings
+        shm.close()
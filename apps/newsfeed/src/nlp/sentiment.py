@@ -1,22 +1,146 @@
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+import os
+import re
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from src.core.config import CONFIG
+from src.core.models import Article
+from src.core.offload import get_process_pool, run_in_process
+from src.core.performance_monitor import get_monitor
+from src.nlp import scoring
+
+SETUP_RETRY_SECONDS = 300 # After a failed VADER load, how long to wait before trying again
 
 class SentimentAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.analyzer = None
-        self.setup_nltk()
+        self._analyzer = None
+        self._retry_at = 0.0
+
+    @property
+    def analyzer(self):
+        """VADER analyzer, loaded on first use; None while the lexicon cannot be loaded."""
+        if self._analyzer is None and time.monotonic() >= self._retry_at:
+            self.setup_nltk()
+        return self._analyzer
 
     def setup_nltk(self):
+        """Load the VADER lexicon from the local cache, downloading it only when missing."""
         try:
-            nltk.download('vader_lexicon', quiet=True)
-            self.analyzer = SentimentIntensityAnalyzer()
+            import nltk
+            from nltk.sentiment import SentimentIntensityAnalyzer
+
+            data_dir = CONFIG["cache"]["nltk_data"]
+            if data_dir not in nltk.data.path:
+                nltk.data.path.insert(0, data_dir)
+
+            try:
+                nltk.data.find('sentiment/vader_lexicon.zip')
+            except LookupError:
+                if CONFIG["cache"]["offline"]:
+                    raise
+                os.makedirs(data_dir, exist_ok=True)
+                nltk.download('vader_lexicon', download_dir=data_dir, quiet=True)
+
+            self._analyzer = SentimentIntensityAnalyzer()
         except Exception as e:
             self.logger.warning(f"NLTK setup failed: {e}")
-            self.analyzer = None
+            self._analyzer = None
+            self._retry_at = time.monotonic() + SETUP_RETRY_SECONDS
 
-    def get_sentiment_score(self, text: str) -> float:
+    def get_sentiment_score(self, text: str) -> Optional[float]:
+        """VADER compound score, or None if the analyzer is not loaded."""
         if self.analyzer:
             return self.analyzer.polarity_scores(text)['compound']
-        return 0.0
+        return None
+
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n|\n')
+
+def lead_text(text: str, paragraphs: Optional[int], max_chars: Optional[int] = None) -> str:
+    """The first `paragraphs` paragraphs of an article (the whole text if None), capped at max_chars."""
+    if paragraphs:
+        parts = [p.strip() for p in _PARAGRAPH_SPLIT.split(text) if p.strip()]
+        text = "\n\n".join(parts[:paragraphs])
+    if max_chars:
+        text = text[:max_chars]
+    return text
+
+class SentimentStage:
+    """
+    Scores article sentiment once per article and writes it to Article.sentiment_score.
+    Results are cached by content hash in memory and in NewsDatabase; misses are scored
+    in batches across the process pool.
+    """
+    def __init__(self, db, cache_size: int = 10000):
+        self.db = db
+        self.settings = CONFIG["sentiment"]
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.logger = logging.getLogger(__name__)
+
+    def cache_key(self, article: Article) -> str:
+        content_hash = article.content_hash or hashlib.md5(article.content.encode()).hexdigest()
+        # The truncation settings are part of the key, so changing them rescores instead of reusing old scores
+        paragraphs, chars = self.settings["lead_paragraphs"], self.settings["lead_chars"]
+        mode = f"lead{paragraphs or 'all'}x{chars}" if paragraphs or chars else "full"
+        return f"{content_hash}:{mode}"
+
+    def _remember(self, key: str, score: float):
+        self.cache[key] = score
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def score(self, articles: List[Article]):
+        """Populate sentiment_score on every article, scoring only those never seen before."""
+        monitor = get_monitor()
+        keys = [self.cache_key(article) for article in articles]
+        scores = {key: self.cache[key] for key in keys if key in self.cache}
+
+        missing = [key for key in dict.fromkeys(keys) if key not in scores]
+        if missing:
+            scores.update(await asyncio.to_thread(self.db.get_sentiments, missing))
+        unique = len(set(keys))
+        monitor.record_cache("sentiment", hits=len(scores), misses=unique - len(scores))
+
+        texts = {}
+        for key, article in zip(keys, articles):
+            if key not in scores:
+                texts[key] = lead_text(article.content, self.settings["lead_paragraphs"], self.settings["lead_chars"])
+
+        if texts:
+            batch_size = self.settings["batch_size"]
+            items = list(texts.items())
+            batches = [items[i:i+batch_size] for i in range(0, len(items), batch_size)]
+            with monitor.track("sentiment"):
+                results = await asyncio.gather(*(
+                    run_in_process(scoring.sentiment_scores, [text for _, text in batch]) for batch in batches
+                ))
+            # A worker without VADER returns None: those articles stay neutral for now and are rescored next time
+            fresh = {key: value for batch, values in zip(batches, results) if values is not None
+                     for (key, _), value in zip(batch, values)}
+            scores.update(fresh)
+            if fresh:
+                await asyncio.to_thread(self.db.cache_sentiments, fresh)
+            if len(fresh) < len(texts):
+                self.logger.warning(f"VADER unavailable: {len(texts) - len(fresh)} articles left unscored")
+            self.logger.info(f"Scored sentiment for {len(fresh)} new articles ({len(articles) - len(texts)} cached)")
+
+        for key, article in zip(keys, articles):
+            if key in scores:
+                article.sentiment_score = scores[key]
+                self._remember(key, scores[key])
+            else:
+                article.sentiment_score = 0.0
+
+    def warm_up(self):
+        """Spawn the scoring workers and let each load its VADER lexicon; raises if any could not."""
+        workers = CONFIG["offload"]["process_workers"]
+        results = list(get_process_pool().map(scoring.sentiment_scores, [["Warm-up."]] * workers))
+        failed = sum(result is None for result in results)
+        if failed:
+            raise RuntimeError(f"VADER lexicon could not be loaded in {failed} of {workers} scoring workers")
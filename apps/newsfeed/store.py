@@ -1,63 +1,593 @@
-import chromadb
+import aiohttp
+import asyncio
+import base64
+import logging
+import threading
+import time
 import uuid
-import os
+import re
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
-def get_chroma_client():
-    chroma_host = os.getenv("CHROMA_HOST", "http://chroma:8000")
-    return chromadb.HttpClient(host=chroma_host.split("://")[1].split(":")[0], port=8000)
+from src.core.config import CONFIG
+from src.core.offload import run_in_thread
+from src.core.performance_monitor import get_monitor
+from src.data.broadcast_store import get_broadcast_store
+from src.data.database import NewsDatabase
+from src.data.vector_index import LocalCollection
 
-client = get_chroma_client()
+# One record per segment; persona commentary lives in the persona_comments SQLite table
+COLLECTION = "news_segments_v2"
+# Pre-v2 layout: one record per (segment, persona) with the comment in metadata. See `migrate`.
+LEGACY_COLLECTION = "news_segments"
+logger = logging.getLogger(__name__)
 
-def store_segment(persona_id, title, summary, comment, vector):
+_client = None
+_collection = None
+_collection_lock = threading.Lock()
+_db: Optional[NewsDatabase] = None
+
+def get_client():
+    """Chroma HTTP client, created on first use so importing the store never needs the server."""
+    global _client
+    if _client is None:
+        import chromadb
+        url = urlparse(CONFIG["store"]["chroma_host"])
+        _client = chromadb.HttpClient(host=url.hostname, port=url.port or 8000)
+    return _client
+
+def get_collection():
+    """
+    The segments collection, opened once per process: a Chroma server collection
+    (STORE_BACKEND=chroma) or the embedded LocalCollection (STORE_BACKEND=local).
     """
-    Store a news segment with its metadata and embedding in ChromaDB.
+    global _collection
+    with _collection_lock: # Writers and searches first call this from pool threads
+        if _collection is None:
+            settings = CONFIG["store"]
+            if settings["backend"] == "local":
+                _collection = LocalCollection(
+                    settings["local_dir"], COLLECTION, m=settings["hnsw_m"],
+                    ef_construction=settings["hnsw_ef_construction"], ef_search=settings["hnsw_ef"],
+                    save_every=settings["index_save_every"], exact_below=settings["exact_filter_below"]
+                )
+            elif settings["backend"] == "chroma":
+                _collection = get_client().get_or_create_collection(name=COLLECTION)
+            else:
+                raise ValueError(f"Unknown store backend: {settings['backend']}")
+    return _collection
+
+def close_collection():
+    """Persist the embedded index (a no-op for Chroma); call on shutdown after the writer is closed."""
+    global _collection
+    with _collection_lock:
+        if isinstance(_collection, LocalCollection):
+            _collection.close()
+            _collection = None
+
+def get_db() -> NewsDatabase:
+    global _db
+    if _db is None:
+        _db = NewsDatabase()
+    return _db
+
+def persona_flag(persona_id: str) -> str:
+    """Metadata key marking that a persona commented on a segment, for `where` filters."""
+    return f"persona_{persona_id}"
+
+def segment_record(title, summary, comments: Dict[str, str], vector, segment_id: Optional[str] = None,
+                   timestamp: Optional[str] = None) -> Dict:
+    return {
+        "id": segment_id or str(uuid.uuid4()),
+        "document": summary,
+        "metadata": {
+            "title": title,
+            "summary": summary,
+            "timestamp": datetime.now(timezone.utc).isoformat() if timestamp is None else timestamp,
+            **{persona_flag(persona_id): True for persona_id in comments},
+        },
+        "embedding": vector,
+        "comments": comments
+    }
+
+def created_at(metadata: Dict) -> float:
+    """Epoch seconds of a segment's ISO `timestamp` (0 for segments stored without one)."""
+    try:
+        return datetime.fromisoformat(metadata["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+def vector_blob(vector) -> bytes:
+    """Compact copy of an embedding kept next to its full-text row (float16)."""
+    return np.asarray(vector, dtype=np.float16).tobytes()
+
+def index_entry(record: Dict) -> Dict:
+    metadata = record["metadata"]
+    return {"id": record["id"], "title": metadata["title"], "summary": metadata["summary"],
+            "comments": record["comments"], "created_at": created_at(metadata),
+            "vector": vector_blob(record["embedding"])}
+
+def add_records(records: List[Dict]):
+    """Bulk write of segment records: commentary to SQLite, then one collection add (blocking)."""
+    db = get_db()
+    db.save_persona_comments({r["id"]: r["comments"] for r in records if r["comments"]})
+    db.index_segments([index_entry(r) for r in records])
+    with get_monitor().track("store_write", records=len(records), backend=CONFIG["store"]["backend"]):
+        get_collection().add(
+            ids=[r["id"] for r in records],
+            documents=[r["document"] for r in records],
+            metadatas=[r["metadata"] for r in records],
+            embeddings=[r["embedding"] for r in records]
+        )
+
+def store_segment(title, summary, comments, vector):
+    """
+    Store a news segment with its metadata and embedding in the segments collection.
     
     Args:
-        persona_id (str): The ID of the persona providing commentary
         title (str): The title of the news segment
         summary (str): The summary of the news content
-        comment (str): The persona's commentary on the segment
+        comments (dict): Persona ID -> that persona's commentary on the segment
         vector (list): The embedding vector for the segment
     
     Returns:
         str: The UUID of the stored document
     """
-    collection = client.get_or_create_collection(name="news_segments")
-    doc_id = str(uuid.uuid4())
+    record = segment_record(title, summary, comments, vector)
+    add_records([record])
+    return record["id"]
 
-    metadata = {
-        "persona": persona_id,
-        "title": title,
-        "summary": summary,
-        "comment": comment,
-    }
+class SegmentWriter:
+    """
+    Buffered, asynchronous segment writes. `add` only appends to a buffer; the buffer is written in
+    one bulk `add` from the thread pool once it holds `max_batch` records or `max_delay` seconds after
+    the first buffered record. Failed writes are retried with backoff and then kept for the next flush
+    (up to `max_pending` records). Call `close()` on shutdown.
+    """
+    def __init__(self, max_batch: Optional[int] = None, max_delay: Optional[float] = None,
+                 retries: Optional[int] = None, max_pending: Optional[int] = None):
+        settings = CONFIG["store"]
+        self.max_batch = max_batch or settings["write_batch"]
+        self.max_delay = max_delay if max_delay is not None else settings["write_delay"]
+        self.retries = retries if retries is not None else settings["write_retries"]
+        self.max_pending = max_pending or settings["max_pending"]
+        self.pending: List[Dict] = []
+        self.listeners: List[Callable[[List[Dict]], None]] = [] # Called (in a worker thread) with each written batch
+        self.monitor = get_monitor()
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes = set()
+
+    def add(self, title, summary, comments, vector) -> Optional[str]:
+        """Buffer one segment (with all its persona comments); returns its ID. Must be called from the event loop."""
+        if not vector:
+            logger.warning(f"Not storing segment '{title}': it has no embedding.")
+            return None
+        record = segment_record(title, summary, comments, vector)
+        self.pending.append(record)
+        if len(self.pending) >= self.max_batch:
+            self._schedule(0)
+        elif self._timer is None:
+            self._schedule(self.max_delay)
+        return record["id"]
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.create_task(self._flush_after(delay))
+
+    async def _flush_after(self, delay: float):
+        await asyncio.sleep(delay)
+        self._timer = None
+        flush = asyncio.create_task(self.flush())
+        # Held until done: a later _schedule must not cancel a write already in flight
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def flush(self):
+        """Write everything buffered so far."""
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        for attempt in range(self.retries + 1):
+            try:
+                await run_in_thread(add_records, batch)
+                self.monitor.increment("store_records_written_total", len(batch))
+                await self._notify(batch)
+                return
+            except Exception as e:
+                self.monitor.increment("store_write_failures_total")
+                if attempt < self.retries:
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                logger.error(f"Failed to write {len(batch)} segment records after {self.retries + 1} attempts: {e}")
+        # Keep the batch for the next flush, dropping the oldest records beyond max_pending
+        keep = batch + self.pending
+        dropped = len(keep) - self.max_pending
+        self.pending = keep[-self.max_pending:]
+        if dropped > 0:
+            self.monitor.increment("store_records_dropped_total", dropped)
+
+    async def _notify(self, batch: List[Dict]):
+        for listener in self.listeners:
+            try:
+                await run_in_thread(listener, batch)
+            except Exception as e:
+                logger.error(f"Segment write listener failed: {e}")
+
+    async def close(self):
+        """Flush outstanding records; call before the event loop stops."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+_writer: Optional[SegmentWriter] = None
+
+def get_segment_writer() -> SegmentWriter:
+    global _writer
+    if _writer is None:
+        _writer = SegmentWriter()
+    return _writer
+
+def attach_comments(ids: List[str], metadatas: List[Dict], persona: Optional[str] = None):
+    """Join persona commentary from the side table into each result's metadata (as `comments`)."""
+    comments = get_db().get_persona_comments(ids, persona)
+    for segment_id, metadata in zip(ids, metadatas):
+        metadata["comments"] = comments.get(segment_id, {})
+
+def encode_cursor(position: Tuple[float, int]) -> str:
+    return base64.urlsafe_b64encode(f"{position[0]!r}:{position[1]}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Inverse of encode_cursor; raises ValueError for anything else."""
+    created, rowid = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+    return float(created), int(rowid)
+
+def encode_embedding(vector, fmt: str):
+    """`f16`: base64 of little-endian float16 (a quarter of the JSON size); `list`: JSON floats."""
+    if fmt == "f16":
+        return base64.b64encode(np.asarray(vector, dtype="<f2").tobytes()).decode()
+    return [float(x) for x in vector]
+
+def persona_timeline(persona_id: str, limit: int, cursor: Optional[str] = None,
+                     descending: bool = False) -> Tuple[List[Dict], Optional[str]]:
+    """One page of a persona's timeline (oldest first unless `descending`) and the cursor for the next, if any."""
+    rows = get_db().persona_timeline(persona_id, limit + 1, decode_cursor(cursor) if cursor else None, descending)
+    next_cursor = encode_cursor(rows[limit - 1]["position"]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def timeline_items(rows: List[Dict], embedding: Optional[str] = None, chunk: int = 200) -> Iterator[Dict]:
+    """Timeline rows as API items, fetching embeddings (when asked for) one chunk at a time."""
+    for i in range(0, len(rows), chunk):
+        page = rows[i:i+chunk]
+        vectors = {}
+        if embedding:
+            found = get_collection().get(ids=[row["segment_id"] for row in page], include=["embeddings"])
+            vectors = dict(zip(found["ids"], found["embeddings"]))
+        for row in page:
+            item = {
+                "id": row["segment_id"],
+                "title": row["title"],
+                "summary": row["summary"],
+                "comment": row["comment"],
+                "timestamp": datetime.fromtimestamp(row["created_at"], timezone.utc).isoformat() if row["created_at"] else None
+            }
+            if embedding and row["segment_id"] in vectors:
+                item["embedding"] = encode_embedding(vectors[row["segment_id"]], embedding)
+            yield item
+
+def fts_terms(text: str) -> Optional[str]:
+    """FTS5 expression matching any word of `text` (BM25 ranks segments matching more of them higher)."""
+    words = re.findall(r"\w+", text.lower())
+    return " OR ".join(f'"{word}"' for word in dict.fromkeys(words)) or None
+
+def fts_phrase(text: str) -> Optional[str]:
+    """FTS5 expression matching `text` as a phrase."""
+    words = re.findall(r"\w+", text.lower())
+    return f'"{" ".join(words)}"' if words else None
 
-    collection.add(
-        documents=[summary],
-        ids=[doc_id],
-        metadatas=[metadata],
-        embeddings=[vector]
-    )
-    return doc_id
+def empty_results() -> Dict:
+    return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]], "scores": [[]]}
 
-def search_segments(query_text, persona=None, limit=5):
+class SegmentSearch:
+    """
+    Vector search over segments. Queries are embedded with the same Ollama model as the stored
+    segments (not Chroma's default embedder); query vectors are kept in an LRU cache, and full
+    results in a short-TTL cache keyed on (query, persona, limit).
+    """
+    def __init__(self):
+        settings = CONFIG["search"]
+        self.query_cache_size = settings["query_cache_size"]
+        self.result_cache_size = settings["result_cache_size"]
+        self.result_ttl = settings["result_ttl"]
+        self.query_vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.results: "OrderedDict[tuple, tuple]" = OrderedDict() # key -> (expires_at, results)
+        self.monitor = get_monitor()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.split())
+
+    async def embed_query(self, query: str) -> List[float]:
+        query = self.normalize(query)
+        vector = self.query_vectors.get(query)
+        if vector is not None:
+            self.query_vectors.move_to_end(query)
+            self.monitor.record_cache("query_embedding", hits=1)
+            return vector
+        self.monitor.record_cache("query_embedding", misses=1)
+
+        with self.monitor.track("query_embedding"):
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{CONFIG['ollama_api']['base_url']}/api/embeddings",
+                    json={'model': CONFIG["models"]["embedding_model"], 'prompt': query},
+                    timeout=aiohttp.ClientTimeout(total=30)
+                ) as response:
+                    response.raise_for_status()
+                    vector = (await response.json())['embedding']
+
+        self.query_vectors[query] = vector
+        if len(self.query_vectors) > self.query_cache_size:
+            self.query_vectors.popitem(last=False)
+        return vector
+
+    async def search(self, query: str, persona: Optional[str] = None, limit: int = 5, keyword: Optional[str] = None) -> Dict:
+        key = (self.normalize(query), persona, limit, keyword)
+        now = time.monotonic()
+        cached = self.results.get(key)
+        if cached is not None and cached[0] > now:
+            self.results.move_to_end(key)
+            self.monitor.record_cache("search_results", hits=1)
+            return cached[1]
+        self.monitor.record_cache("search_results", misses=1)
+
+        with self.monitor.track("search", persona=persona, limit=limit, keyword=keyword):
+            vector = await self.embed_query(query)
+            results = await run_in_thread(self._hybrid_query, query, vector, persona, keyword, limit)
+
+        self.results[key] = (now + self.result_ttl, results)
+        if len(self.results) > self.result_cache_size:
+            self.results.popitem(last=False)
+        return results
+
+    def _hybrid_query(self, query: str, vector: List[float], persona: Optional[str],
+                      keyword: Optional[str], limit: int) -> Dict:
+        """
+        Rank segments by alpha * cosine similarity + (1 - alpha) * normalised BM25 of the query.
+        Keyword and persona filters select the candidates before anything is ranked: with a
+        keyword, the filtered set comes from the full-text index and is vector-scored exactly;
+        without one, candidates are the union of the nearest neighbours and the BM25 top hits.
+        Candidates are scored with the embeddings kept next to their full-text rows; only segments
+        indexed without one (before `reindex`) are fetched from the vector store.
+        """
+        settings = CONFIG["search"]
+        db = get_db()
+        collection = get_collection()
+        n = max(limit, settings["candidates"])
+
+        keyword_match = fts_phrase(keyword) if keyword else None
+        if keyword and keyword_match is None:
+            return empty_results()
+        query_match = fts_terms(query)
+        lexical = db.search_segments_fts(query_match, n, persona, keyword_match) if query_match else {}
+
+        if keyword_match:
+            candidate_ids = list(db.search_segments_fts(keyword_match, settings["filtered_candidates"], persona))
+        else:
+            nearest = collection.query(
+                query_embeddings=[vector],
+                n_results=n,
+                where={persona_flag(persona): True} if persona else None,
+                include=[]
+            )
+            candidate_ids = list(dict.fromkeys(nearest["ids"][0] + list(lexical)))
+        if not candidate_ids:
+            return empty_results()
+
+        stored = db.segment_vectors(candidate_ids)
+        vectors = {segment_id: np.frombuffer(blob, dtype=np.float16) for segment_id, blob in stored.items()}
+        missing = [segment_id for segment_id in candidate_ids if segment_id not in vectors]
+        if missing:
+            fetched = collection.get(ids=missing, include=["embeddings"])
+            vectors.update(zip(fetched["ids"], fetched["embeddings"]))
+        ids = [segment_id for segment_id in candidate_ids if segment_id in vectors]
+        if not ids:
+            return empty_results()
+        embeddings = np.asarray([vectors[segment_id] for segment_id in ids], dtype=np.float32)
+        q = np.asarray(vector, dtype=np.float32)
+        similarity = embeddings @ q / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(q) + 1e-12)
+
+        bm25 = np.array([-lexical.get(segment_id, 0.0) for segment_id in ids], dtype=np.float32) # SQLite bm25 is negated
+        if bm25.max() > 0:
+            bm25 /= bm25.max()
+        alpha = settings["hybrid_alpha"]
+        scores = alpha * (similarity + 1) / 2 + (1 - alpha) * bm25
+
+        top = np.argsort(-scores)[:limit]
+        rows = collection.get(ids=[ids[i] for i in top], include=["documents", "metadatas"])
+        by_id = dict(zip(rows["ids"], zip(rows["documents"], rows["metadatas"])))
+        top = [i for i in top if ids[i] in by_id]
+        top_ids = [ids[i] for i in top]
+        metadatas = [by_id[segment_id][1] for segment_id in top_ids]
+        attach_comments(top_ids, metadatas, persona)
+        return {
+            "ids": [top_ids],
+            "documents": [[by_id[segment_id][0] for segment_id in top_ids]],
+            "metadatas": [metadatas],
+            "distances": [[float(1 - similarity[i]) for i in top]],
+            "scores": [[float(scores[i]) for i in top]]
+        }
+
+_search: Optional[SegmentSearch] = None
+
+async def search_segments(query_text, persona=None, limit=5, keyword=None):
     """
     Search for news segments semantically similar to the query.
     
     Args:
         query_text (str): The search query
-        persona (str, optional): Filter by specific persona
+        persona (str, optional): Only segments this persona commented on (and only their comment)
         limit (int): Maximum number of results to return
+        keyword (str, optional): Only segments whose title, summary or comments contain this phrase
         
     Returns:
-        dict: Search results from ChromaDB
+        dict: Chroma-shaped results (ids, documents, metadatas, distances) plus hybrid `scores`,
+        with persona comments in each metadata's `comments`
     """
-    collection = client.get_collection("news_segments")
-    where_filter = {"persona": persona} if persona else None
-    
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=limit,
-        where=where_filter
-    )
-    return results
+    global _search
+    if _search is None:
+        _search = SegmentSearch()
+    return await _search.search(query_text, persona, limit, keyword)
+
+def migrate(page_size: int = 500, drop_legacy: bool = False) -> Dict[str, int]:
+    """
+    Copy the legacy one-record-per-persona collection into the one-record-per-segment layout.
+    Records sharing title, summary and embedding are one segment; their comments go to the side
+    table. Safe to re-run: segment IDs are derived from the content, so existing ones are overwritten.
+    """
+    legacy = get_client().get_collection(LEGACY_COLLECTION)
+    segments: Dict[str, Dict] = {}
+    read = 0
+    while True:
+        page = legacy.get(offset=read, limit=page_size, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+        for document, metadata, embedding in zip(page["documents"], page["metadatas"], page["embeddings"]):
+            vector = [float(x) for x in embedding]
+            title = metadata.get("title", "")
+            summary = metadata.get("summary", document)
+            segment_id = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{title}\n{summary}\n{vector[:8]}"))
+            record = segments.setdefault(
+                segment_id, segment_record(title, summary, {}, vector, segment_id, metadata.get("timestamp", ""))
+            )
+            if metadata.get("persona"):
+                record["comments"][metadata["persona"]] = metadata.get("comment", "")
+                record["metadata"][persona_flag(metadata["persona"])] = True
+        read += len(page["ids"])
+
+    records = list(segments.values())
+    for i in range(0, len(records), page_size):
+        batch = records[i:i+page_size]
+        get_db().save_persona_comments({r["id"]: r["comments"] for r in batch if r["comments"]})
+        get_db().index_segments([index_entry(r) for r in batch])
+        get_collection().upsert(
+            ids=[r["id"] for r in batch],
+            documents=[r["document"] for r in batch],
+            metadatas=[r["metadata"] for r in batch],
+            embeddings=[r["embedding"] for r in batch]
+        )
+    if drop_legacy:
+        get_client().delete_collection(LEGACY_COLLECTION)
+    return {"legacy_records": read, "segments": len(records)}
+
+def archived_scripts() -> Dict[str, str]:
+    """{segment_id: segment script} from every broadcast in the archive database."""
+    scripts = {}
+    for broadcast in get_broadcast_store().iter_range():
+        for segment in broadcast.get("segments", []):
+            if segment.get("segment_id") and segment.get("summary"):
+                scripts[segment["segment_id"]] = segment["summary"]
+    return scripts
+
+def reindex(page_size: int = 500) -> int:
+    """
+    Rebuild the full-text index and its embedding copies from the collection (for segments stored
+    before them). Segments stored without their script get it back from the broadcast archive.
+    """
+    db = get_db()
+    collection = get_collection()
+    scripts = None
+    read = 0
+    while True:
+        page = collection.get(offset=read, limit=page_size, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+        missing = [i for i, metadata in enumerate(page["metadatas"]) if not metadata.get("summary")]
+        if missing:
+            if scripts is None:
+                scripts = archived_scripts()
+            repaired = [i for i in missing if page["ids"][i] in scripts]
+            for i in repaired:
+                page["metadatas"][i]["summary"] = page["documents"][i] = scripts[page["ids"][i]]
+            if repaired:
+                collection.upsert(
+                    ids=[page["ids"][i] for i in repaired],
+                    documents=[page["documents"][i] for i in repaired],
+                    metadatas=[page["metadatas"][i] for i in repaired],
+                    embeddings=[page["embeddings"][i] for i in repaired]
+                )
+        comments = db.get_persona_comments(page["ids"])
+        db.index_segments([
+            {"id": segment_id, "title": metadata.get("title", ""), "summary": metadata.get("summary", ""),
+             "comments": comments.get(segment_id, {}), "created_at": created_at(metadata),
+             "vector": vector_blob(embedding)}
+            for segment_id, metadata, embedding in zip(page["ids"], page["metadatas"], page["embeddings"])
+        ])
+        read += len(page["ids"])
+    return read
+
+def verify_index(sample: int = 20) -> Dict[str, int]:
+    """
+    Check that segments can be found by a word from their body: for a random sample of indexed
+    segments, search the summary column for the longest word of each summary.
+    """
+    db = get_db()
+    segments, empty = db.sample_segments(sample)
+    found = 0
+    for segment_id, summary in segments:
+        word = max(re.findall(r"\w+", summary.lower()), key=len, default=None)
+        if word and segment_id in db.search_segments_fts(f"summary : {fts_phrase(word)}", limit=1000):
+            found += 1
+    return {"checked": len(segments), "found": found, "without_summary": empty}
+
+def import_chroma(page_size: int = 500) -> int:
+    """Copy the segments collection from the Chroma server into the embedded backend."""
+    if CONFIG["store"]["backend"] != "local":
+        raise ValueError("Set STORE_BACKEND=local to import into the embedded backend.")
+    source = get_client().get_collection(COLLECTION)
+    target = get_collection()
+    read = 0
+    while True:
+        page = source.get(offset=read, limit=page_size, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+        target.upsert(ids=page["ids"], documents=page["documents"], metadatas=page["metadatas"], embeddings=page["embeddings"])
+        read += len(page["ids"])
+    close_collection()
+    return read
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Segment store maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help=f"Convert '{LEGACY_COLLECTION}' to the one-vector-per-segment layout.")
+    migrate_parser.add_argument("--page-size", type=int, default=500)
+    migrate_parser.add_argument("--drop-legacy", action="store_true", help="Delete the legacy collection afterwards.")
+    reindex_parser = commands.add_parser("reindex", help="Rebuild the full-text search index from the collection.")
+    reindex_parser.add_argument("--page-size", type=int, default=500)
+    verify_parser = commands.add_parser("verify-index", help="Check that sampled segments are found by a word from their body.")
+    verify_parser.add_argument("--sample", type=int, default=20)
+    import_parser = commands.add_parser("import-chroma", help="Copy the Chroma collection into the embedded backend (STORE_BACKEND=local).")
+    import_parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        stats = migrate(args.page_size, args.drop_legacy)
+        print(f"Migrated {stats['legacy_records']} legacy records into {stats['segments']} segments.")
+    elif args.command == "reindex":
+        print(f"Indexed {reindex(args.page_size)} segments.")
+    elif args.command == "verify-index":
+        stats = verify_index(args.sample)
+        print(f"Found {stats['found']} of {stats['checked']} sampled segments by a word from their summary; "
+              f"{stats['without_summary']} segments have no summary (run reindex).")
+        if stats["found"] < stats["checked"]:
+            raise SystemExit(1)
+    elif args.command == "import-chroma":
+        print(f"Imported {import_chroma(args.page_size)} segments.")
@@ -4,8 +4,9 @@ export async function GET(
   request: Request,
   { params }: { params: { id: string } }
 ) {
+  const { search } = new URL(request.url);
   const res = await fetch(
-    `${process.env.NEXT_PUBLIC_NEWS_API}/persona/${params.id}/timeline`
+    `${process.env.NEXT_PUBLIC_NEWS_API}/persona/${params.id}/timeline${search}`
   );
   const data = await res.json();
   return NextResponse.json(data);
@@ -11,7 +11,7 @@ export default function PersonaTimeline() {
 
   useEffect(() => {
     setLoading(true);
-    fetch(`/api/personas/${id}/timeline`)
+    fetch(`/api/personas/${id}/timeline?embedding=list`)
       .then((r) => r.json())
       .then(async (items) => {
         const coords = await embedAndCluster(items.map((i: any) => i.embedding));
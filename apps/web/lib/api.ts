@@ -9,7 +9,16 @@ export async function refreshNews(feeds?: string[]): Promise<{ broadcast_id: str
     body: JSON.stringify(feeds ?? []),
   });
   if (!res.ok) throw new Error("Refresh failed");
-  return await res.json();
+  // The refresh runs as a background job; wait for it to finish
+  let job = await res.json();
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, 2000));
+    const poll = await fetch(`${baseUrl}/jobs/${job.job_id}`);
+    if (!poll.ok) throw new Error("Refresh failed");
+    job = await poll.json();
+  }
+  if (job.status !== "succeeded" || !job.broadcast_id) throw new Error(job.error ?? "No new broadcast");
+  return { broadcast_id: job.broadcast_id };
 }
 
 export async function getBroadcast(id: string): Promise<Broadcast> {